@@ -1,11 +1,18 @@
+from typing import Dict
 import numpy as np
-from GalaxyBuilder.planet_utils import teff
 
 import constants as const
+import instrument
 import planet_utils as p_util
-from generate_galaxy import Star, Planet, Atmosphere
+from records import Atmosphere
 
 
+# main species of terrestrial atmospheres and how likely each one is
+gasses = ["N2", "CO2", "O2", "CH4"]
+gas_p = [0.5, 0.3, 0.15, 0.05]
+
+
+@instrument.timed("terrestrial_atmos")
 def gen_terrestrial_atmos(lum: float, sma: float, p_atmos: float, lil_g: float) -> Atmosphere:
     """Generate an atmosphere for a small, rocky planet
 
@@ -18,8 +25,6 @@ def gen_terrestrial_atmos(lum: float, sma: float, p_atmos: float, lil_g: float)
     Returns:
         Atmosphere: A randomly generated terrestrial planet atmosphere
     """
-    gasses = ["N2", "CO2", "O2", "CH4"]
-    gas_p = [0.5, 0.3, 0.15, 0.05]
     if np.random.uniform(0, 1) > p_atmos:
         albedo = 0.2
         teff = p_util.teff(albedo, lum, sma)
@@ -53,6 +58,7 @@ def gen_terrestrial_atmos(lum: float, sma: float, p_atmos: float, lil_g: float)
     return atmos
 
 
+@instrument.timed("gas_atmos")
 def gen_gas_atmos(lum: float, sma: float, lil_g: float) -> Atmosphere:
     """Generate a gas giant atmosphere
 
@@ -75,3 +81,154 @@ def gen_gas_atmos(lum: float, sma: float, lil_g: float) -> Atmosphere:
     scale_h = p_util.scale_height(temp, lil_g, p_util.find_molecular_mass(comp))
     atmos = Atmosphere(scale_h, 1.0, comp, eta, temp, 0.0, albedo)
     return atmos
+
+
+@instrument.timed("terrestrial_atmos")
+def gen_terrestrial_atmos_batch(
+    lum: np.ndarray, sma: np.ndarray, p_atmos: np.ndarray, lil_g: np.ndarray, rng: np.random.Generator = None
+) -> Dict[str, np.ndarray]:
+    """Generate atmospheres for many small, rocky planets at once
+
+    Same distributions as gen_terrestrial_atmos, including the rare runaway greenhouse,
+    with every draw made for the whole batch.
+
+    Args:
+        lum (np.ndarray): Stellar luminosity in solar units
+        sma (np.ndarray): semimajor axis in au
+        p_atmos (np.ndarray): Probability of having an atmosphere
+        lil_g (np.ndarray): Surface gravity
+        rng (np.random.Generator, optional): Random generator. Defaults to the global np.random state.
+
+    Returns:
+        Dict[str, np.ndarray]: Atmosphere columns (scale_height, pressure, comp, eta, temp, ocean, albedo),
+            comp being an (n, species) fraction matrix in const.atmos_species order
+    """
+    if rng is None:
+        rng = np.random
+    lum, sma, p_atmos, lil_g = np.broadcast_arrays(lum, sma, p_atmos, lil_g)
+    n = len(sma)
+    rows = np.arange(n)
+    has_atmos = rng.uniform(0, 1, n) <= p_atmos
+
+    # two distinct species, weighted like np.random.choice(gasses, 2, replace=False, p=gas_p)
+    first = np.minimum(np.searchsorted(np.cumsum(gas_p), rng.uniform(0, 1, n), side="right"), len(gasses) - 1)
+    rest_p = np.tile(gas_p, (n, 1))
+    rest_p[rows, first] = 0
+    rest_cum = np.cumsum(rest_p, axis=1)
+    second = (rest_cum <= (rng.uniform(0, 1, n) * rest_cum[:, -1])[:, None]).sum(axis=1)
+    second = np.minimum(second, len(gasses) - 1)
+    frac_1 = rng.uniform(0.5, 1, n)
+    frac_2 = rng.uniform((1 - frac_1) * 0.9, 1 - frac_1)
+    species = np.array([const.atmos_species.index(gas) for gas in gasses])
+    comp = np.zeros((n, len(const.atmos_species)))
+    comp[rows, species[first]] = frac_1
+    comp[rows, species[second]] = frac_2
+    comp[:, const.atmos_species.index("Other")] = 1 - frac_1 - frac_2
+    pressure = rng.wald(1, 5, n)
+
+    # rare runaway greenhouse
+    runaway = rng.uniform(0, 100, n) > 99.9
+    pressure = np.where(runaway, 10**pressure, pressure)
+    eta = np.where(runaway, rng.uniform(2, 3, n), rng.uniform(0.3, 1, n))
+
+    clouds = rng.uniform(0, 1, n)
+    ocean = rng.uniform(0, 1, n)
+    land = 1 - ocean
+    surf_alb = (0.2 * land) + (0.1 * ocean)
+    albedo = (clouds * 0.8) + ((1 - clouds) * surf_alb)
+    teff = p_util.teff(albedo, lum, sma)
+    with np.errstate(invalid="ignore"):
+        temp = p_util.atmos_temp(teff, eta)
+    scale_h = p_util.scale_height(teff, lil_g, p_util.find_molecular_mass(comp))
+
+    # airless bodies
+    bare = ~has_atmos
+    albedo[bare] = 0.2
+    comp[bare] = 0
+    comp[bare, const.atmos_species.index("Other")] = 1
+    return {
+        "scale_height": np.where(bare, 0.0, scale_h),
+        "pressure": np.where(bare, 0.0, pressure),
+        "comp": comp,
+        "eta": np.where(bare, 0.0, eta),
+        "temp": np.where(bare, p_util.teff(albedo, lum, sma), temp),
+        "ocean": np.where(bare, 0.0, ocean),
+        "albedo": albedo,
+    }
+
+
+@instrument.timed("gas_atmos")
+def gen_gas_atmos_batch(
+    lum: np.ndarray, sma: np.ndarray, lil_g: np.ndarray, rng: np.random.Generator = None
+) -> Dict[str, np.ndarray]:
+    """Generate atmospheres for many gas giants at once
+
+    Same distributions as gen_gas_atmos, with every draw made for the whole batch.
+
+    Args:
+        lum (np.ndarray): Stellar luminosity in solar units
+        sma (np.ndarray): Semimajor axis in AU
+        lil_g (np.ndarray): Surface (1 bar) gravity
+        rng (np.random.Generator, optional): Random generator. Defaults to the global np.random state.
+
+    Returns:
+        Dict[str, np.ndarray]: Atmosphere columns, as for gen_terrestrial_atmos_batch
+    """
+    if rng is None:
+        rng = np.random
+    lum, sma, lil_g = np.broadcast_arrays(lum, sma, lil_g)
+    n = len(sma)
+    albedo = rng.uniform(0.4, 0.6, n)
+    teff = p_util.teff(albedo, lum, sma)
+    other_frac = rng.uniform(0, 0.03, n)
+    H_frac = rng.uniform(0.8, 0.98, n)
+    comp = np.zeros((n, len(const.atmos_species)))
+    comp[:, const.atmos_species.index("H2")] = H_frac
+    comp[:, const.atmos_species.index("He")] = 1 - (H_frac + other_frac)
+    comp[:, const.atmos_species.index("Other")] = other_frac
+    eta = rng.normal(1.65, 0.2, n)
+    with np.errstate(invalid="ignore"):
+        temp = p_util.atmos_temp(teff, eta)
+    return {
+        "scale_height": p_util.scale_height(temp, lil_g, p_util.find_molecular_mass(comp)),
+        "pressure": np.ones(n),
+        "comp": comp,
+        "eta": eta,
+        "temp": temp,
+        "ocean": np.zeros(n),
+        "albedo": albedo,
+    }
+
+
+def gen_atmos_batch(
+    lum: np.ndarray,
+    sma: np.ndarray,
+    lil_g: np.ndarray,
+    p_atmos: np.ndarray,
+    gas: np.ndarray,
+    rng: np.random.Generator = None,
+) -> Dict[str, np.ndarray]:
+    """Generate atmospheres for a mixed batch of rocky planets and gas giants in one pass
+
+    Args:
+        lum (np.ndarray): Stellar luminosity in solar units
+        sma (np.ndarray): Semimajor axis in AU
+        lil_g (np.ndarray): Surface gravity
+        p_atmos (np.ndarray): Probability of having an atmosphere, only used for rocky planets
+        gas (np.ndarray): True for gas giants and neptunes
+        rng (np.random.Generator, optional): Random generator. Defaults to the global np.random state.
+
+    Returns:
+        Dict[str, np.ndarray]: Atmosphere columns, as for gen_terrestrial_atmos_batch
+    """
+    lum, sma, lil_g, p_atmos, gas = np.broadcast_arrays(lum, sma, lil_g, p_atmos, gas)
+    rocky = ~gas
+    rocky_atmos = gen_terrestrial_atmos_batch(lum[rocky], sma[rocky], p_atmos[rocky], lil_g[rocky], rng)
+    gas_atmos = gen_gas_atmos_batch(lum[gas], sma[gas], lil_g[gas], rng)
+    columns = {}
+    for key in rocky_atmos:
+        column = np.empty((len(sma),) + rocky_atmos[key].shape[1:])
+        column[rocky] = rocky_atmos[key]
+        column[gas] = gas_atmos[key]
+        columns[key] = column
+    return columns
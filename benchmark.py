@@ -0,0 +1,179 @@
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+from typing import Callable, Dict, List, Sequence
+import numpy as np
+
+import atmospheres as atms
+import generate_galaxy as gen
+import positioner as posi
+
+
+default_sizes = [1_000, 10_000, 100_000, 1_000_000]
+
+
+def measure(func: Callable[[], object], n: int, repeat: int = 3, memory: bool = True) -> dict:
+    """Time a benchmark case and record its peak memory
+
+    The best of repeat runs is kept. Peak memory comes from a separate run under
+    tracemalloc, so tracing does not skew the timings; numpy buffers are included.
+
+    Args:
+        func (Callable[[], object]): Runs the case once
+        n (int): Items (systems, stars, planets, ...) produced per run
+        repeat (int, optional): Timed runs. Defaults to 3.
+        memory (bool, optional): Measure peak memory. Defaults to True.
+
+    Returns:
+        dict: n, seconds, per_sec and peak_mb (None when not measured)
+    """
+    best = np.inf
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    peak_mb = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak_mb = tracemalloc.get_traced_memory()[1] / 2**20
+        finally:
+            tracemalloc.stop()
+    return {"n": n, "seconds": best, "per_sec": n / best if best > 0 else np.inf, "peak_mb": peak_mb}
+
+
+def _scalar_cases(calls: int) -> Dict[str, Callable[[], object]]:
+    # the per object generators, each called calls times
+    star = gen.generate_star(0)
+    lum, sma = star.luminosity, float(np.mean(star.hab_zone))
+    return {
+        "generate_star": lambda: [gen.generate_star(i) for i in range(calls)],
+        "generate_planet": lambda: [gen.generate_planet(star, 1, sma) for _ in range(calls)],
+        "gen_terrestrial_atmos": lambda: [atms.gen_terrestrial_atmos(lum, sma, 0.95, 9.8) for _ in range(calls)],
+        "gen_gas_atmos": lambda: [atms.gen_gas_atmos(lum, 5 * sma, 25.0) for _ in range(calls)],
+        "local_kpc": lambda: [posi.local_kpc(500.0) for _ in range(calls)],
+    }
+
+
+def run_benchmarks(
+    sizes: Sequence[int] = default_sizes,
+    scalar_calls: int = 2_000,
+    scalar_max: int = 10_000,
+    workers: int = 1,
+    repeat: int = 3,
+    memory: bool = True,
+    seed: int = 0,
+) -> dict:
+    """Run the benchmark suite
+
+    Args:
+        sizes (Sequence[int], optional): Galaxy sizes in systems. Defaults to 1k to 1M.
+        scalar_calls (int, optional): Calls per run for the per object generators. Defaults to 2_000.
+        scalar_max (int, optional): Largest galaxy built one generate_system call at a time. Defaults to 10_000.
+        workers (int, optional): Worker processes for generate_galaxy. Defaults to 1.
+        repeat (int, optional): Timed runs per case, 1 for sizes above 100k. Defaults to 3.
+        memory (bool, optional): Measure peak memory. Defaults to True.
+        seed (int, optional): Seed for every case. Defaults to 0.
+
+    Returns:
+        dict: "meta" describing the machine and "results" mapping case names to measurements
+    """
+    np.random.seed(seed)
+    results = {}
+    # the rare runaway greenhouse atmosphere takes a root of a negative number in the scalar path
+    with np.errstate(invalid="ignore"):
+        _run_cases(results, sizes, scalar_calls, scalar_max, workers, repeat, memory, seed)
+    meta = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.platform(),
+        "cpus": os.cpu_count(),
+        "workers": workers,
+    }
+    return {"meta": meta, "results": results}
+
+
+def _run_cases(results, sizes, scalar_calls, scalar_max, workers, repeat, memory, seed) -> None:
+    for name, func in _scalar_cases(scalar_calls).items():
+        results[name] = measure(func, scalar_calls, repeat, memory)
+    for n in sizes:
+        runs = repeat if n <= 100_000 else 1
+        if n <= scalar_max:
+            results[f"generate_system[{n}]"] = measure(
+                lambda: [gen.generate_system(500.0, i) for i in range(n)], n, runs, memory
+            )
+        rng = np.random.default_rng(seed)
+        results[f"local_kpc_batch[{n}]"] = measure(lambda: posi.local_kpc(500.0, n, rng), n, runs, memory)
+        results[f"generate_galaxy[{n}]"] = measure(
+            lambda: gen.generate_galaxy(n, seed=seed, workers=workers), n, runs, memory
+        )
+
+
+def compare(results: dict, baseline: dict, tolerance: float = 0.2) -> List[str]:
+    """Find cases that got slower or hungrier than a baseline run
+
+    Args:
+        results (dict): Output of run_benchmarks
+        baseline (dict): Earlier output of run_benchmarks
+        tolerance (float, optional): Allowed relative loss in throughput or growth in peak memory. Defaults to 0.2.
+
+    Returns:
+        List[str]: One message per regression, empty when there are none
+    """
+    regressions = []
+    for name, new in results["results"].items():
+        old = baseline["results"].get(name)
+        if old is None:
+            continue
+        if new["per_sec"] < old["per_sec"] * (1 - tolerance):
+            regressions.append(f"{name}: {new['per_sec']:.4g}/s, baseline {old['per_sec']:.4g}/s")
+        if new["peak_mb"] is not None and old.get("peak_mb") is not None:
+            if new["peak_mb"] > old["peak_mb"] * (1 + tolerance) + 1.0:
+                regressions.append(f"{name}: peak {new['peak_mb']:.1f} MB, baseline {old['peak_mb']:.1f} MB")
+    return regressions
+
+
+def report(results: dict) -> str:
+    lines = [f"{'case':<32}{'n':>10}{'seconds':>11}{'per sec':>13}{'peak MB':>10}"]
+    for name, r in results["results"].items():
+        peak = "-" if r["peak_mb"] is None else f"{r['peak_mb']:.1f}"
+        lines.append(f"{name:<32}{r['n']:>10}{r['seconds']:>11.4f}{r['per_sec']:>13.4g}{peak:>10}")
+    return "\n".join(lines)
+
+
+def main(argv: Sequence[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark galaxy generation")
+    parser.add_argument("--sizes", type=int, nargs="+", default=default_sizes, help="galaxy sizes in systems")
+    parser.add_argument("--scalar-calls", type=int, default=2_000, help="calls per per-object benchmark")
+    parser.add_argument("--scalar-max", type=int, default=10_000, help="largest size run through generate_system")
+    parser.add_argument("--workers", type=int, default=1)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip peak memory measurements")
+    parser.add_argument("--out", default="benchmark.json", help="where to save the results")
+    parser.add_argument("--baseline", help="earlier results to check for regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2)
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.sizes, args.scalar_calls, args.scalar_max, args.workers, args.repeat, not args.no_memory
+    )
+    print(report(results))
+    with open(args.out, "w") as f:
+        json.dump(results, f, indent=1)
+    if args.baseline:
+        with open(args.baseline) as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        for line in regressions:
+            print("REGRESSION", line)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,105 @@
+import argparse
+import os
+import sys
+import time
+from typing import Sequence
+import numpy as np
+
+import catalog
+import generate_galaxy as gen
+
+
+formats = ["catalog", "npz"]
+
+
+def parse_args(argv: Sequence[str] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        prog="python -m build_galaxy",
+        description="Generate a galaxy and save it to disk",
+    )
+    parser.add_argument("--systems", type=int, required=True, help="number of star systems")
+    parser.add_argument("--map-size", type=float, default=500.0, help="half width of the map in pc (default 500)")
+    parser.add_argument("--seed", type=int, default=None, help="master seed (default: fresh entropy)")
+    parser.add_argument("--workers", type=int, default=1, help="worker processes (default 1)")
+    parser.add_argument("--chunk-size", type=int, default=50_000, help="systems per chunk (default 50000)")
+    parser.add_argument(
+        "--format",
+        choices=formats,
+        default="catalog",
+        help="catalog: streamed, resumable directory of memory mappable columns; npz: one compressed file built "
+        "in memory (default catalog)",
+    )
+    parser.add_argument(
+        "--out", required=True, help="output directory (catalog) or file (npz, .npz is added if missing)"
+    )
+    parser.add_argument(
+        "--overwrite",
+        action="store_true",
+        help="start a catalog over instead of resuming it, or write into a non-empty directory that is not one",
+    )
+    parser.add_argument("--profile", action="store_true", help="print a ranked report of time per stage")
+    parser.add_argument("--quiet", action="store_true", help="no progress bar or summary")
+    args = parser.parse_args(argv)
+    if args.systems < 0:
+        parser.error("--systems must not be negative")
+    if args.workers < 1 or args.chunk_size < 1:
+        parser.error("--workers and --chunk-size must be positive")
+    return args
+
+
+def main(argv: Sequence[str] = None) -> int:
+    args = parse_args(argv)
+    start = time.perf_counter()
+    # the progress bar shows live systems/s and the time left
+    if args.format == "catalog":
+        try:
+            manifest = gen.stream_galaxy(
+                args.out,
+                args.systems,
+                seed=args.seed,
+                map_size=args.map_size,
+                workers=args.workers,
+                chunk_size=args.chunk_size,
+                resume=not args.overwrite,
+                overwrite=args.overwrite,
+                progress=not args.quiet,
+                profile=args.profile,
+            )
+        except FileExistsError as err:
+            print(f"build_galaxy: {err}", file=sys.stderr)
+            return 1
+        except ValueError as err:
+            # the catalog at --out was started with other parameters or is damaged
+            print(f"build_galaxy: {err}, pass --overwrite to start it over", file=sys.stderr)
+            return 1
+        n_systems, n_planets, seed = manifest["n_systems"], manifest["n_planets"], manifest["params"]["seed"]
+    else:
+        # np.savez_compressed adds the suffix itself when it is missing, report the real file
+        if not args.out.endswith(".npz"):
+            args.out += ".npz"
+        seed = args.seed
+        if seed is None:
+            seed = np.random.SeedSequence().entropy
+        galaxy = gen.generate_galaxy(
+            args.systems,
+            seed=seed,
+            map_size=args.map_size,
+            workers=args.workers,
+            chunk_size=args.chunk_size,
+            profile=args.profile,
+            progress=not args.quiet,
+        )
+        catalog.save_npz(args.out, galaxy.stars, galaxy.planets, galaxy.offsets, galaxy.moons)
+        n_systems, n_planets = len(galaxy), int(galaxy.offsets[-1])
+    elapsed = time.perf_counter() - start
+    if not args.quiet:
+        rate = n_systems / elapsed if elapsed > 0 else float("inf")
+        print(
+            f"{n_systems} systems, {n_planets} planets written to {os.path.abspath(args.out)} "
+            f"in {elapsed:.1f} s ({rate:,.0f} systems/s, seed {seed})"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,263 @@
+import json
+import os
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+# A catalog is a directory of raw little-endian column files plus a json manifest:
+#     manifest.json            generation parameters, progress and column dtypes
+#     offsets.bin              int64, n_systems + 1 planet row offsets
+#     stars.<column>.bin       one row per system
+#     planets.<column>.bin     one row per planet, grouped by system
+#     moons.<column>.bin       one row per moon, grouped by planet (see moons.columns)
+# The manifest is only rewritten after every column of a chunk is on disk, so the row
+# counts it records always describe complete data.
+MANIFEST = "manifest.json"
+# files built from the columns by other modules, dropped when the columns are rewritten
+DERIVED = ("spatial.", "sorted.")
+DERIVED_FILES = (MANIFEST + ".tmp", "overlay.journal", "names.json")
+FORMAT = "galaxybuilder-catalog"
+VERSION = 1
+
+
+def _column_file(path: str, table: str, column: str) -> str:
+    return os.path.join(path, f"{table}.{column}.bin")
+
+
+def read_manifest(path: str) -> dict:
+    with open(os.path.join(path, MANIFEST)) as f:
+        manifest = json.load(f)
+    if manifest.get("format") != FORMAT:
+        raise ValueError(f"{path} is not a galaxy catalog")
+    return manifest
+
+
+def write_manifest(path: str, manifest: dict) -> None:
+    # write then rename, a crash leaves either the old or the new manifest
+    tmp = os.path.join(path, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=1)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, os.path.join(path, MANIFEST))
+
+
+def catalog_files(path: str) -> List[str]:
+    """Names of the files in path that belong to the catalog there
+
+    The manifest, the offsets and the column files the manifest lists, plus whatever other
+    modules built from them. Anything else in the directory is not the catalog's.
+    """
+    manifest = read_manifest(path)
+    names = [MANIFEST, "offsets.bin"]
+    for table, columns in (manifest["columns"] or {}).items():
+        names.extend(os.path.basename(_column_file(path, table, key)) for key in columns)
+    names.extend(name for name in os.listdir(path) if name.startswith(DERIVED) or name in DERIVED_FILES)
+    return [name for name in names if os.path.exists(os.path.join(path, name))]
+
+
+def _describe(table: Dict[str, np.ndarray]) -> Dict[str, list]:
+    return {key: [np.asarray(col).dtype.newbyteorder("<").str, list(np.shape(col)[1:])] for key, col in table.items()}
+
+
+class CatalogWriter:
+    """Append-only writer for an on-disk catalog
+
+    Chunks are appended to the column files one at a time, so memory use is bounded by
+    the chunk size. Opening an existing, partially written catalog with resume=True
+    truncates the column files back to the last completed chunk and continues from there.
+    """
+
+    def __init__(self, path: str, params: dict, resume: bool = True, overwrite: bool = False):
+        """Open a catalog for writing
+
+        Args:
+            path (str): Catalog directory
+            params (dict): Generation parameters, which a resumed catalog must match
+            resume (bool, optional): Continue a catalog already at path. Defaults to True.
+            overwrite (bool, optional): Write into a non-empty directory that is not a catalog,
+                leaving its other files alone. Defaults to False.
+        """
+        self.path = path
+        os.makedirs(path, exist_ok=True)
+        is_catalog = os.path.exists(os.path.join(path, MANIFEST))
+        if resume and is_catalog:
+            manifest = read_manifest(path)
+            for key, value in params.items():
+                if manifest["params"].get(key) != value:
+                    raise ValueError(f"Cannot resume {path}: {key} is {manifest['params'].get(key)}, not {value}")
+            self.manifest = manifest
+            self._truncate()
+        else:
+            if is_catalog:
+                self._clear()
+            elif os.listdir(path) and not overwrite:
+                raise FileExistsError(f"{path} is not empty and not a catalog, pass overwrite to write into it")
+            self.manifest = {
+                "format": FORMAT,
+                "version": VERSION,
+                "params": params,
+                "chunks_done": 0,
+                "n_systems": 0,
+                "n_planets": 0,
+                "n_moons": 0,
+                "columns": None,
+            }
+            np.zeros(1, dtype="<i8").tofile(os.path.join(path, "offsets.bin"))
+            write_manifest(path, self.manifest)
+
+    def _clear(self) -> None:
+        # remove the columns the old manifest lists and whatever was built on them,
+        # anything else in the directory is not ours to delete
+        for name in catalog_files(self.path):
+            os.remove(os.path.join(self.path, name))
+
+    @property
+    def chunks_done(self) -> int:
+        return self.manifest["chunks_done"]
+
+    @property
+    def n_systems(self) -> int:
+        return self.manifest["n_systems"]
+
+    @property
+    def _n_moons(self) -> int:
+        # catalogs written before moon tables have no count
+        return self.manifest.get("n_moons", 0)
+
+    def _files(self):
+        yield os.path.join(self.path, "offsets.bin"), np.dtype("<i8"), 1, self.n_systems + 1
+        columns = self.manifest["columns"] or {}
+        rows_of = {"stars": self.n_systems, "planets": self.manifest["n_planets"], "moons": self._n_moons}
+        for table, rows in rows_of.items():
+            for key, (dtype, tail) in columns.get(table, {}).items():
+                yield _column_file(self.path, table, key), np.dtype(dtype), int(np.prod(tail)), rows
+
+    def _truncate(self) -> None:
+        # drop anything written by a chunk that never made it into the manifest
+        for fname, dtype, width, rows in self._files():
+            size = rows * width * dtype.itemsize
+            if not os.path.exists(fname) or os.path.getsize(fname) < size:
+                raise ValueError(f"Cannot resume {self.path}: {fname} is missing data")
+            with open(fname, "r+b") as f:
+                f.truncate(size)
+
+    def append(
+        self,
+        stars: Dict[str, np.ndarray],
+        planets: Dict[str, np.ndarray],
+        offsets: np.ndarray,
+        moons: Dict[str, np.ndarray] = None,
+    ) -> None:
+        """Append one chunk and mark it complete
+
+        Args:
+            stars (Dict[str, np.ndarray]): Stars table of the chunk
+            planets (Dict[str, np.ndarray]): Planets table of the chunk, system indices starting at 0
+            offsets (np.ndarray): Planet offsets of the chunk, starting at 0
+            moons (Dict[str, np.ndarray], optional): Moons table of the chunk, planet rows starting at 0.
+                Defaults to None, for catalogs without moons.
+        """
+        columns = {"stars": _describe(stars), "planets": _describe(planets)}
+        if moons:
+            columns["moons"] = _describe(moons)
+        first = self.manifest["columns"] is None
+        if first:
+            self.manifest["columns"] = columns
+        elif self.manifest["columns"] != columns:
+            raise ValueError("Chunk columns do not match the catalog")
+
+        planets = dict(planets, system=planets["system"] + self.n_systems)
+        tables = [("stars", stars), ("planets", planets)]
+        if moons:
+            tables.append(("moons", dict(moons, planet=moons["planet"] + self.manifest["n_planets"])))
+        for table, cols in tables:
+            for key, col in cols.items():
+                dtype = np.dtype(columns[table][key][0])
+                # the first chunk starts every column file afresh
+                with open(_column_file(self.path, table, key), "wb" if first else "ab") as f:
+                    np.ascontiguousarray(col, dtype=dtype).tofile(f)
+                    os.fsync(f.fileno())
+        with open(os.path.join(self.path, "offsets.bin"), "ab") as f:
+            (np.asarray(offsets[1:], dtype="<i8") + self.manifest["n_planets"]).tofile(f)
+            os.fsync(f.fileno())
+
+        self.manifest["chunks_done"] += 1
+        self.manifest["n_systems"] += len(offsets) - 1
+        self.manifest["n_planets"] += int(offsets[-1])
+        self.manifest["n_moons"] = self._n_moons + (len(moons["planet"]) if moons else 0)
+        write_manifest(self.path, self.manifest)
+
+
+def open_columns(path: str, mode: str = "r") -> Tuple[dict, Dict[str, np.ndarray], Dict[str, np.ndarray], np.ndarray]:
+    """Memory map every column of a catalog
+
+    Nothing is read up front; pages are loaded as the returned arrays are indexed.
+
+    Args:
+        path (str): Catalog directory
+        mode (str, optional): np.memmap mode. Defaults to "r".
+
+    Returns:
+        Tuple[dict, Dict[str, np.ndarray], Dict[str, np.ndarray], np.ndarray]: Manifest, stars
+            and planets columns, planet offsets
+    """
+    manifest = read_manifest(path)
+    stars = _map_table(path, manifest, "stars", mode)
+    planets = _map_table(path, manifest, "planets", mode)
+    offsets = np.memmap(os.path.join(path, "offsets.bin"), dtype="<i8", mode=mode, shape=(manifest["n_systems"] + 1,))
+    return manifest, stars, planets, offsets
+
+
+def open_moons(path: str, mode: str = "r") -> Dict[str, np.ndarray]:
+    """Memory map the moons table of a catalog, empty for catalogs written without one"""
+    return _map_table(path, read_manifest(path), "moons", mode)
+
+
+def _map_table(path: str, manifest: dict, table: str, mode: str) -> Dict[str, np.ndarray]:
+    rows = {"stars": manifest["n_systems"], "planets": manifest["n_planets"], "moons": manifest.get("n_moons", 0)}
+    columns = {}
+    for key, (dtype, tail) in (manifest["columns"] or {}).get(table, {}).items():
+        shape = (rows[table],) + tuple(tail)
+        if rows[table] == 0:
+            # np.memmap refuses empty files
+            columns[key] = np.zeros(shape, dtype=dtype)
+        else:
+            columns[key] = np.memmap(_column_file(path, table, key), dtype=dtype, mode=mode, shape=shape)
+    return columns
+
+
+def save_npz(
+    fname: str,
+    stars: Dict[str, np.ndarray],
+    planets: Dict[str, np.ndarray],
+    offsets: np.ndarray,
+    moons: Dict[str, np.ndarray] = None,
+) -> None:
+    """Write catalog tables to one compressed .npz file, for sharing small galaxies
+
+    Arrays are stored as stars.<column>, planets.<column>, moons.<column> and offsets.
+    """
+    arrays = {f"stars.{key}": col for key, col in stars.items()}
+    arrays.update({f"planets.{key}": col for key, col in planets.items()})
+    arrays.update({f"moons.{key}": col for key, col in (moons or {}).items()})
+    np.savez_compressed(fname, offsets=offsets, **arrays)
+
+
+def load_npz(
+    fname: str,
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray], np.ndarray, Dict[str, np.ndarray]]:
+    """Read catalog tables written by save_npz
+
+    Returns:
+        Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray], np.ndarray, Dict[str, np.ndarray]]: Stars and
+            planets columns, planet offsets and moons columns (empty if none were saved)
+    """
+    tables = {"stars": {}, "planets": {}, "moons": {}}
+    with np.load(fname) as data:
+        for name in data.files:
+            if name != "offsets":
+                table, key = name.split(".", 1)
+                tables[table][key] = data[name]
+        offsets = data["offsets"]
+    return tables["stars"], tables["planets"], offsets, tables["moons"]
@@ -37,3 +37,7 @@ n_p_prob = [
     0.011235955056179775,
     0.011235955056179775,
 ]
+
+# atmosphere species, in the column order used by batched catalogs, and their molecular masses in kg
+atmos_species = ["N2", "CO2", "O2", "CH4", "H2", "He", "Other"]
+species_mass = [4.6518e-26, 7.3079e-26, 5.3134e-26, 2.664e-26, 3.348e-27, 6.646477e-27, 3e-26]
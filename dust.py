@@ -0,0 +1,292 @@
+import json
+import os
+from typing import List, Tuple
+import numpy as np
+
+import positioner as posi
+import star_utils as sutil
+
+
+# A dust field is a directory of raw little-endian float32 grids plus a json description:
+#     dust.json                       origin, voxel size, shape and generation parameters
+#     dust.density.bin                (nx, ny, nz) extinction per pc in magnitudes, x slowest
+#     dust.cum_x.bin                  (nx + 1, ny, nz) extinction summed along x from the low face
+#     dust.cum_y.bin, dust.cum_z.bin  the same along y and z
+# The cumulative grids turn the extinction along any axis aligned run of voxels into the
+# difference of two lookups, whatever the run's length.
+FIELD = "dust.json"
+axes = "xyz"
+
+
+def _grid(path: str, name: str, shape: tuple, mode: str = "w+") -> np.ndarray:
+    if path is None:
+        return np.zeros(shape, dtype=np.float32)
+    return np.memmap(os.path.join(path, f"dust.{name}.bin"), dtype="<f4", mode=mode, shape=shape)
+
+
+class DustField:
+    """Voxelized interstellar extinction with per axis cumulative sums
+
+    The extinction between two points is the integral of the field along the segment.
+    The segment is cut into a few pieces, each short enough across its main axis to stay
+    within about one voxel sideways, and each piece is read off the cumulative grid of
+    its main axis. A lookup costs a handful of gathers per piece instead of one per voxel
+    crossed, and is exact for segments along an axis.
+    """
+
+    def __init__(self, density: np.ndarray, origin: np.ndarray, voxel: float, cumulative: List[np.ndarray] = None):
+        """Wrap a density grid, summing it along each axis unless the sums are given
+
+        Args:
+            density (np.ndarray): (nx, ny, nz) extinction per pc in magnitudes
+            origin (np.ndarray): Low (x, y, z) corner of the grid in pc
+            voxel (float): Voxel edge in pc
+            cumulative (List[np.ndarray], optional): Sums along x, y and z from the low face,
+                as built by cumulate. Defaults to None, which builds them in memory.
+        """
+        self.density = density
+        self.origin = np.asarray(origin, dtype=float)
+        self.voxel = float(voxel)
+        self.shape = np.array(density.shape, dtype=np.int64)
+        if cumulative is None:
+            cumulative = [cumulate(density, axis, voxel) for axis in range(3)]
+        self.cumulative = cumulative
+
+    @property
+    def bounds(self) -> Tuple[np.ndarray, np.ndarray]:
+        """Low and high (x, y, z) corners of the grid in pc"""
+        return self.origin, self.origin + self.shape * self.voxel
+
+    def density_at(self, points: np.ndarray) -> np.ndarray:
+        """Extinction per pc at points, 0 outside the grid"""
+        points = np.asarray(points, dtype=float)
+        cells = np.floor((points - self.origin) / self.voxel).astype(np.int64)
+        inside = np.all((cells >= 0) & (cells < self.shape), axis=-1)
+        cells = np.where(inside[..., None], cells, 0)
+        values = np.asarray(self.density[cells[..., 0], cells[..., 1], cells[..., 2]], dtype=float)
+        return np.where(inside, values, 0.0)
+
+    def _prefix(self, axis: int, s: np.ndarray, i: np.ndarray, j: np.ndarray) -> np.ndarray:
+        # extinction from the low face to voxel coordinate s along axis, in the run of
+        # voxels at indices i, j along the other two axes
+        n = int(self.shape[axis])
+        s = np.clip(s, 0, n)
+        v = np.minimum(s.astype(np.int64), n - 1)
+        index = [i, j]
+        index.insert(axis, v)
+        cum_shape = self.shape.copy()
+        cum_shape[axis] += 1
+        cum = self.cumulative[axis].reshape(-1)[np.ravel_multi_index(index, cum_shape)]
+        dens = self.density.reshape(-1)[np.ravel_multi_index(index, self.shape)]
+        return cum + (s - v) * dens * self.voxel
+
+    def extinction(
+        self, start: np.ndarray, end: np.ndarray, max_pieces: int = 16, tolerance: float = 1.0
+    ) -> np.ndarray:
+        """Extinction in magnitudes along straight lines between pairs of points
+
+        Args:
+            start (np.ndarray): (..., 3) start points in pc, such as one observer
+            end (np.ndarray): (..., 3) end points in pc, broadcast against start
+            max_pieces (int, optional): Most pieces a segment is cut into. Defaults to 16.
+            tolerance (float, optional): Sideways drift allowed within a piece, in voxels. Defaults to 1.0.
+
+        Returns:
+            np.ndarray: Extinction per pair, parts of segments outside the grid adding nothing
+        """
+        start, end = np.broadcast_arrays(np.asarray(start, dtype=float), np.asarray(end, dtype=float))
+        out_shape = start.shape[:-1]
+        a = (start.reshape(-1, 3) - self.origin) / self.voxel
+        d = (end.reshape(-1, 3) - start.reshape(-1, 3)) / self.voxel
+        n = len(a)
+        size = np.abs(d)
+        axis = np.argmax(size, axis=1)
+        along = size[np.arange(n), axis]
+        drift = np.sort(size, axis=1)[:, 1]
+        pieces = np.clip(np.ceil(drift / tolerance), 1, max_pieces).astype(np.int64)
+
+        total = np.zeros(n)
+        for ax in range(3):
+            others = [other for other in range(3) if other != ax]
+            rows = np.flatnonzero(axis == ax)
+            count = pieces[rows]
+            pair = np.repeat(np.arange(len(rows)), count)
+            k = np.arange(len(pair)) - np.repeat(np.cumsum(count) - count, count)
+            step = 1.0 / count
+            t0 = k * step[pair]
+            t_mid = t0 + 0.5 * step[pair]
+            # sideways voxel of each piece, taken at its middle
+            i = np.floor(a[rows, others[0]][pair] + t_mid * d[rows, others[0]][pair]).astype(np.int64)
+            j = np.floor(a[rows, others[1]][pair] + t_mid * d[rows, others[1]][pair]).astype(np.int64)
+            inside = (i >= 0) & (i < self.shape[others[0]]) & (j >= 0) & (j < self.shape[others[1]])
+            pair, i, j, t0 = pair[inside], i[inside], j[inside], t0[inside]
+            s0 = a[rows, ax][pair] + t0 * d[rows, ax][pair]
+            s1 = s0 + step[pair] * d[rows, ax][pair]
+            integral = np.abs(self._prefix(ax, s1, i, j) - self._prefix(ax, s0, i, j))
+            total[rows] = np.bincount(pair, weights=integral, minlength=len(rows))
+
+        # integrals along the main axis, stretched to the segment's length
+        stretch = np.divide(np.linalg.norm(d, axis=1), along, out=np.zeros(n), where=along > 0)
+        return (total * stretch).reshape(out_shape)
+
+    def apparent_magnitude(self, abs_mag: np.ndarray, observer: np.ndarray, stars: np.ndarray, **options) -> np.ndarray:
+        """Apparent magnitudes of stars seen from observers, dimmed by the dust in between
+
+        Args:
+            abs_mag (np.ndarray): Absolute magnitudes of the stars
+            observer (np.ndarray): (..., 3) observer positions in pc
+            stars (np.ndarray): (..., 3) star positions in pc, broadcast against observer
+            **options: max_pieces and tolerance passed to extinction
+
+        Returns:
+            np.ndarray: Apparent magnitude per observer/star pair
+        """
+        observer, stars = np.broadcast_arrays(np.asarray(observer, dtype=float), np.asarray(stars, dtype=float))
+        dist = np.linalg.norm(stars - observer, axis=-1)
+        return sutil.apparent_magnitude(abs_mag, dist, self.extinction(observer, stars, **options))
+
+    def save(self, path: str, params: dict = None) -> None:
+        """Write the field to a directory, readable with open_dust"""
+        os.makedirs(path, exist_ok=True)
+        for name, grid in [("density", self.density)] + [(f"cum_{c}", g) for c, g in zip(axes, self.cumulative)]:
+            out = _grid(path, name, grid.shape)
+            out[...] = grid
+            out.flush()
+        _write_meta(path, self, params)
+
+
+def _write_meta(path: str, field: DustField, params: dict = None) -> None:
+    meta = {
+        "origin": field.origin.tolist(),
+        "voxel": field.voxel,
+        "shape": field.shape.tolist(),
+        "params": params or {},
+    }
+    with open(os.path.join(path, FIELD), "w") as f:
+        json.dump(meta, f)
+
+
+def cumulate(density: np.ndarray, axis: int, voxel: float, out: np.ndarray = None, block: int = 16) -> np.ndarray:
+    """Sum a density grid along one axis from its low face, one slab at a time
+
+    Args:
+        density (np.ndarray): (nx, ny, nz) extinction per pc
+        axis (int): Axis to sum along
+        voxel (float): Voxel edge in pc
+        out (np.ndarray, optional): Output grid, one longer than density along axis. Defaults to a new array.
+        block (int, optional): Slab thickness across the summed axis. Defaults to 16.
+
+    Returns:
+        np.ndarray: Extinction from the low face to each voxel boundary
+    """
+    shape = list(density.shape)
+    shape[axis] += 1
+    if out is None:
+        out = np.zeros(shape, dtype=np.float32)
+    across = (axis + 1) % 3
+    for first in range(0, density.shape[across], block):
+        slab = [slice(None)] * 3
+        slab[across] = slice(first, first + block)
+        sums = np.cumsum(np.asarray(density[tuple(slab)], dtype=float), axis=axis) * voxel
+        face = list(slab)
+        face[axis] = slice(0, 1)
+        rest = list(slab)
+        rest[axis] = slice(1, None)
+        out[tuple(face)] = 0.0
+        out[tuple(rest)] = sums
+    return out
+
+
+def generate_dust(
+    path: str = None,
+    map_size: float = 500.0,
+    voxel: float = 4.0,
+    n_clouds: int = None,
+    seed: int = None,
+    diffuse: float = 7e-4,
+    diffuse_height: float = 100.0,
+    cloud_peak: float = 0.02,
+    cloud_size: float = 10.0,
+) -> DustField:
+    """Generate a field of dust clouds over the map volume
+
+    The field is a thin diffuse layer around the galactic plane plus gaussian clouds placed
+    like the stars. Every cloud touches only the voxels within three widths of its center.
+
+    Args:
+        path (str, optional): Directory to build the field in, memory mapped. Defaults to None, in memory.
+        map_size (float, optional): Half width of the map in pc. Defaults to 500.0.
+        voxel (float, optional): Voxel edge in pc. Defaults to 4.0.
+        n_clouds (int, optional): Number of clouds. Defaults to 2000 per (1 kpc)^3.
+        seed (int, optional): Random seed. Defaults to None, which picks fresh entropy.
+        diffuse (float, optional): Diffuse extinction in the plane in mag/pc. Defaults to 7e-4.
+        diffuse_height (float, optional): Gaussian scale height of the diffuse layer in pc. Defaults to 100.0.
+        cloud_peak (float, optional): Median central extinction of a cloud in mag/pc. Defaults to 0.02.
+        cloud_size (float, optional): Median gaussian width of a cloud in pc. Defaults to 10.0.
+
+    Returns:
+        DustField: The field, backed by the files in path if given
+    """
+    rng = np.random.default_rng(seed)
+    n = int(np.ceil(2 * map_size / voxel))
+    shape = (n, n, n)
+    origin = np.full(3, -map_size)
+    if n_clouds is None:
+        n_clouds = int(round(2000 * (2 * map_size / 1000) ** 3))
+    if path is not None:
+        os.makedirs(path, exist_ok=True)
+    density = _grid(path, "density", shape)
+
+    centers = (np.arange(n) + 0.5) * voxel - map_size
+    layer = (diffuse * np.exp(-0.5 * (centers / diffuse_height) ** 2)).astype(np.float32)
+    density[...] = layer[None, None, :]
+
+    x, y, z = posi.local_kpc(xymax=map_size, nstars=n_clouds, rng=rng)
+    position = np.column_stack([x, y, z])
+    width = cloud_size * rng.lognormal(0.0, 0.5, (n_clouds, 1)) * rng.lognormal(0.0, 0.3, (n_clouds, 3))
+    peak = cloud_peak * rng.lognormal(0.0, 1.0, n_clouds)
+    lo = np.clip(np.floor((position - 3 * width - origin) / voxel), 0, n).astype(np.int64)
+    hi = np.clip(np.ceil((position + 3 * width - origin) / voxel), 0, n).astype(np.int64)
+    for c in range(n_clouds):
+        # gaussians are separable, so a cloud is the outer product of three profiles
+        profile = [
+            np.exp(-0.5 * ((centers[lo[c, ax] : hi[c, ax]] - position[c, ax]) / width[c, ax]) ** 2) for ax in range(3)
+        ]
+        box = tuple(slice(lo[c, ax], hi[c, ax]) for ax in range(3))
+        density[box] += (peak[c] * profile[0][:, None, None] * profile[1][None, :, None] * profile[2]).astype(
+            np.float32
+        )
+
+    cumulative = []
+    for ax in range(3):
+        cum_shape = list(shape)
+        cum_shape[ax] += 1
+        cumulative.append(cumulate(density, ax, voxel, out=_grid(path, f"cum_{axes[ax]}", tuple(cum_shape))))
+    field = DustField(density, origin, voxel, cumulative)
+    if path is not None:
+        for grid in [density] + cumulative:
+            grid.flush()
+        params = {
+            "map_size": map_size,
+            "n_clouds": n_clouds,
+            "seed": seed,
+            "diffuse": diffuse,
+            "diffuse_height": diffuse_height,
+            "cloud_peak": cloud_peak,
+            "cloud_size": cloud_size,
+        }
+        _write_meta(path, field, params)
+    return field
+
+
+def open_dust(path: str) -> DustField:
+    """Memory map a dust field written by generate_dust or DustField.save"""
+    with open(os.path.join(path, FIELD)) as f:
+        meta = json.load(f)
+    shape = tuple(meta["shape"])
+    cumulative = []
+    for ax in range(3):
+        cum_shape = list(shape)
+        cum_shape[ax] += 1
+        cumulative.append(_grid(path, f"cum_{axes[ax]}", tuple(cum_shape), mode="r"))
+    return DustField(_grid(path, "density", shape, mode="r"), meta["origin"], meta["voxel"], cumulative)
@@ -0,0 +1,113 @@
+from typing import Iterator, Tuple
+import numpy as np
+
+import constants as const
+import planet_utils as putil
+
+
+def _splitmix64(x: np.ndarray) -> np.ndarray:
+    # counter based hash, a fixed random looking uint64 for every input; overflow wraps
+    x = x.astype(np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def orbital_phases(rows: np.ndarray, seed: int = 0) -> np.ndarray:
+    """Starting orbital phases of planets
+
+    Every planet row gets its own phase from a hash of the seed and the row, so a planet
+    keeps its phase whichever other planets are looked at alongside it.
+
+    Args:
+        rows (np.ndarray): Planet rows in the catalog
+        seed (int, optional): Seed. Defaults to 0.
+
+    Returns:
+        np.ndarray: Phase in radians at time 0, in [0, 2 pi)
+    """
+    key = _splitmix64(np.asarray(rows, dtype=np.int64).astype(np.uint64) ^ _splitmix64(np.array([seed]))[0])
+    # top 53 bits as a uniform double on [0, 1)
+    return (key >> np.uint64(11)).astype(float) * (2 * np.pi / 2.0**53)
+
+
+class Ephemeris:
+    """Positions of planets on circular orbits around their stars over time
+
+    Orbits lie in each system's x-y plane. Positions are relative to the parent star, in au,
+    and times are in days from an arbitrary epoch at which every planet sits at its seeded
+    phase.
+    """
+
+    def __init__(self, galaxy, systems: np.ndarray = None, seed: int = 0):
+        """Set up the orbits of the planets of some systems
+
+        Args:
+            galaxy (GalaxyCatalog): In-memory or memory-mapped catalog
+            systems (np.ndarray, optional): System indices. Defaults to every system.
+            seed (int, optional): Seed of the orbital phases. Defaults to 0.
+        """
+        offsets = np.asarray(galaxy.offsets)
+        if systems is None:
+            systems = np.arange(len(offsets) - 1)
+        systems = np.atleast_1d(np.asarray(systems, dtype=np.int64))
+        starts = offsets[systems]
+        counts = offsets[systems + 1] - starts
+        skip = np.cumsum(counts) - counts
+        self.rows = np.repeat(starts - skip, counts) + np.arange(int(counts.sum()))
+        # position of each planet's system in systems
+        self.system = np.repeat(np.arange(len(systems)), counts)
+        self.offsets = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+        planets = galaxy.planets
+        self.sma = np.asarray(planets["sma"][self.rows], dtype=float)
+        host = np.asarray(galaxy.stars["mass"])[systems][self.system] * const.sun_mass
+        mass = host + np.asarray(planets["mass"][self.rows]) * const.earth_mass
+        self.period = putil.orbital_period(self.sma * const.au * 1000, mass) / 86400
+        self.phase = orbital_phases(self.rows, seed)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def angles(self, times: np.ndarray) -> np.ndarray:
+        """Orbital angles in radians, shape times.shape + (planets,)"""
+        times = np.asarray(times, dtype=float)
+        # whole orbits are dropped before scaling to radians, which keeps long runs precise
+        turns = np.mod(times[..., None] / self.period, 1.0)
+        return self.phase + 2 * np.pi * turns
+
+    def positions(self, times: np.ndarray) -> np.ndarray:
+        """Planet positions at some times
+
+        Args:
+            times (np.ndarray): Times in days, any shape
+
+        Returns:
+            np.ndarray: x, y in au relative to the star, shape times.shape + (planets, 2)
+        """
+        angle = self.angles(times)
+        out = np.empty(angle.shape + (2,))
+        np.cos(angle, out=out[..., 0])
+        np.sin(angle, out=out[..., 1])
+        out *= self.sma[:, None]
+        return out
+
+    def frames(self, start: float, step: float, count: int, block: int = 256) -> Iterator[Tuple[float, np.ndarray]]:
+        """Stream animation frames at evenly spaced times
+
+        Frames are computed block frames at a time, so only one block is held in memory
+        however long the animation runs.
+
+        Args:
+            start (float): Time of the first frame in days
+            step (float): Days between frames
+            count (int): Number of frames
+            block (int, optional): Frames computed per batch. Defaults to 256.
+
+        Yields:
+            Tuple[float, np.ndarray]: Frame time and (planets, 2) positions in au
+        """
+        for first in range(0, count, block):
+            times = start + step * np.arange(first, min(first + block, count))
+            for time, positions in zip(times.tolist(), self.positions(times)):
+                yield time, positions
@@ -0,0 +1,317 @@
+from typing import Iterator, List, Sequence, Tuple, Union
+import numpy as np
+
+import catalog
+import octree
+
+
+# named views, as (horizontal axis, vertical axis) unit vectors in galactic x, y, z
+views = {
+    "top": np.array([[1.0, 0.0, 0.0], [0.0, 1.0, 0.0]]),
+    "edge": np.array([[1.0, 0.0, 0.0], [0.0, 0.0, 1.0]]),
+    "side": np.array([[0.0, 1.0, 0.0], [0.0, 0.0, 1.0]]),
+}
+
+
+def projection_basis(view: Union[str, Tuple[float, float], np.ndarray]) -> np.ndarray:
+    """Image axes for a view of the galaxy
+
+    Args:
+        view (Union[str, Tuple[float, float], np.ndarray]): "top", "edge" or "side", an (azimuth,
+            elevation) camera direction in degrees, or a (2, 3) array of image axes
+
+    Returns:
+        np.ndarray: (2, 3) horizontal and vertical image axes
+    """
+    if isinstance(view, str):
+        return views[view]
+    view = np.asarray(view, dtype=float)
+    if view.shape == (2, 3):
+        return view
+    az, el = np.radians(view)
+    right = [-np.sin(az), np.cos(az), 0.0]
+    up = [-np.sin(el) * np.cos(az), -np.sin(el) * np.sin(az), np.cos(el)]
+    return np.array([right, up])
+
+
+def _edges(extent, ndim: int) -> np.ndarray:
+    # (ndim, 2) lower and upper limits from a half width or explicit ranges
+    extent = np.asarray(extent, dtype=float)
+    if extent.ndim == 0:
+        return np.tile([-extent, extent], (ndim, 1))
+    return extent.reshape(ndim, 2)
+
+
+def _accumulate(hist: np.ndarray, coords: np.ndarray, limits: np.ndarray) -> None:
+    # add points ((n, ndim) coordinates) to a histogram in place, dropping those outside
+    shape = np.array(hist.shape)
+    cell = np.floor((coords - limits[:, 0]) / (limits[:, 1] - limits[:, 0]) * shape).astype(np.int64)
+    inside = np.all((cell >= 0) & (cell < shape), axis=1)
+    flat = np.ravel_multi_index(tuple(cell[inside].T), hist.shape)
+    hist += np.bincount(flat, minlength=hist.size).reshape(hist.shape)
+
+
+def density_map(
+    x: np.ndarray,
+    y: np.ndarray,
+    z: np.ndarray,
+    view: Union[str, Tuple[float, float], np.ndarray] = "top",
+    bins: Union[int, Sequence[int]] = 1024,
+    extent: Union[float, Sequence] = 500.0,
+) -> np.ndarray:
+    """Bin projected positions into a 2D histogram
+
+    Args:
+        x (np.ndarray): Galactic x positions in pc
+        y (np.ndarray): Galactic y positions in pc
+        z (np.ndarray): Galactic z positions in pc
+        view (optional): View passed to projection_basis. Defaults to "top".
+        bins (Union[int, Sequence[int]], optional): Pixels along each image axis. Defaults to 1024.
+        extent (optional): Half width of the image in pc, or ((u0, u1), (v0, v1)). Defaults to 500.0.
+
+    Returns:
+        np.ndarray: (bins_u, bins_v) star counts, first axis horizontal
+    """
+    hist = np.zeros(np.broadcast_to(bins, 2), dtype=np.int64)
+    coords = np.column_stack([x, y, z]) @ projection_basis(view).T
+    _accumulate(hist, coords, _edges(extent, 2))
+    return hist
+
+
+def density_cube(
+    x: np.ndarray,
+    y: np.ndarray,
+    z: np.ndarray,
+    bins: Union[int, Sequence[int]] = 128,
+    extent: Union[float, Sequence] = 500.0,
+) -> np.ndarray:
+    """Bin positions into a 3D histogram
+
+    Args:
+        x (np.ndarray): Galactic x positions in pc
+        y (np.ndarray): Galactic y positions in pc
+        z (np.ndarray): Galactic z positions in pc
+        bins (Union[int, Sequence[int]], optional): Cells along each axis. Defaults to 128.
+        extent (optional): Half width of the cube in pc, or ((x0, x1), (y0, y1), (z0, z1)). Defaults to 500.0.
+
+    Returns:
+        np.ndarray: (bins_x, bins_y, bins_z) star counts
+    """
+    hist = np.zeros(np.broadcast_to(bins, 3), dtype=np.int64)
+    _accumulate(hist, np.column_stack([x, y, z]), _edges(extent, 3))
+    return hist
+
+
+def iter_positions(path: str, block: int = 1_000_000) -> Iterator[Tuple[np.ndarray, np.ndarray, np.ndarray]]:
+    """Read system positions from an on-disk catalog in blocks of rows
+
+    Args:
+        path (str): Catalog directory
+        block (int, optional): Rows per block. Defaults to 1_000_000.
+
+    Yields:
+        Tuple[np.ndarray, np.ndarray, np.ndarray]: x, y and z positions in pc
+    """
+    _, stars, _, _ = catalog.open_columns(path)
+    n = len(stars["gal_x"]) if stars else 0
+    for start in range(0, n, block):
+        yield tuple(np.asarray(stars[key][start : start + block]) for key in ("gal_x", "gal_y", "gal_z"))
+
+
+def _catalog_extent(path: str) -> float:
+    return float(catalog.read_manifest(path)["params"].get("map_size", 500.0))
+
+
+def catalog_density_map(
+    path: str,
+    view: Union[str, Tuple[float, float], np.ndarray] = "top",
+    bins: Union[int, Sequence[int]] = 1024,
+    extent: Union[float, Sequence] = None,
+    block: int = 1_000_000,
+) -> np.ndarray:
+    """2D density map of an on-disk catalog, read block by block in constant memory
+
+    Args:
+        path (str): Catalog directory
+        view (optional): View passed to projection_basis. Defaults to "top".
+        bins (Union[int, Sequence[int]], optional): Pixels along each image axis. Defaults to 1024.
+        extent (optional): As for density_map. Defaults to the catalog's map size.
+        block (int, optional): Rows read at a time. Defaults to 1_000_000.
+
+    Returns:
+        np.ndarray: (bins_u, bins_v) star counts
+    """
+    if extent is None:
+        extent = _catalog_extent(path)
+    basis = projection_basis(view)
+    limits = _edges(extent, 2)
+    hist = np.zeros(np.broadcast_to(bins, 2), dtype=np.int64)
+    for x, y, z in iter_positions(path, block):
+        _accumulate(hist, np.column_stack([x, y, z]) @ basis.T, limits)
+    return hist
+
+
+def catalog_density_cube(
+    path: str, bins: Union[int, Sequence[int]] = 128, extent: Union[float, Sequence] = None, block: int = 1_000_000
+) -> np.ndarray:
+    """3D density cube of an on-disk catalog, read block by block in constant memory
+
+    Args:
+        path (str): Catalog directory
+        bins (Union[int, Sequence[int]], optional): Cells along each axis. Defaults to 128.
+        extent (optional): As for density_cube. Defaults to the catalog's map size.
+        block (int, optional): Rows read at a time. Defaults to 1_000_000.
+
+    Returns:
+        np.ndarray: (bins_x, bins_y, bins_z) star counts
+    """
+    if extent is None:
+        extent = _catalog_extent(path)
+    limits = _edges(extent, 3)
+    hist = np.zeros(np.broadcast_to(bins, 3), dtype=np.int64)
+    for x, y, z in iter_positions(path, block):
+        _accumulate(hist, np.column_stack([x, y, z]), limits)
+    return hist
+
+
+def log_scale(hist: np.ndarray) -> np.ndarray:
+    """Map counts to 0-255 on a log scale, empty cells black
+
+    Args:
+        hist (np.ndarray): Star counts
+
+    Returns:
+        np.ndarray: uint8 intensities of the same shape
+    """
+    top = np.log1p(hist.max()) if hist.size else 0.0
+    if top == 0:
+        return np.zeros(hist.shape, dtype=np.uint8)
+    return np.round(np.log1p(hist) / top * 255).astype(np.uint8)
+
+
+def save_density_image(hist: np.ndarray, fname: str, cmap: str = "inferno") -> None:
+    """Write a 2D density map as a log scaled image, north (positive vertical axis) up
+
+    Args:
+        hist (np.ndarray): (bins_u, bins_v) counts from density_map or catalog_density_map
+        fname (str): Output file, format picked from the extension (png recommended)
+        cmap (str, optional): Matplotlib colormap. Defaults to "inferno".
+    """
+    import matplotlib.image
+
+    matplotlib.image.imsave(fname, log_scale(hist).T[::-1], cmap=cmap, vmin=0, vmax=255)
+
+
+def render_catalog(
+    path: str,
+    fname: str,
+    view: Union[str, Tuple[float, float], np.ndarray] = "top",
+    bins: Union[int, Sequence[int]] = 1024,
+    extent: Union[float, Sequence] = None,
+) -> np.ndarray:
+    """Render an on-disk catalog straight to a density image
+
+    Args:
+        path (str): Catalog directory
+        fname (str): Output image file
+        view (optional): View passed to projection_basis. Defaults to "top".
+        bins (Union[int, Sequence[int]], optional): Pixels along each image axis. Defaults to 1024.
+        extent (optional): As for density_map. Defaults to the catalog's map size.
+
+    Returns:
+        np.ndarray: The counts behind the image
+    """
+    hist = catalog_density_map(path, view, bins, extent)
+    save_density_image(hist, fname)
+    return hist
+
+
+def hover_text(galaxy, indices: np.ndarray) -> List[str]:
+    """Hover labels with the name, class and planets of some systems
+
+    Only the rows of the given systems are read, so this is cheap on memory mapped catalogs.
+
+    Args:
+        galaxy (GalaxyCatalog): In-memory or memory-mapped catalog
+        indices (np.ndarray): System indices
+
+    Returns:
+        List[str]: One label per system
+    """
+    s = galaxy.stars
+    labels = []
+    for index in np.asarray(indices).tolist():
+        start, stop = int(galaxy.offsets[index]), int(galaxy.offsets[index + 1])
+        types = "".join(galaxy.planets["type"][start:stop].tolist())
+        labels.append(
+            f"{str(index).zfill(4)}A ({s['harv_class'][index]}, {s['temperature'][index]:.0f} K)"
+            f"<br>{stop - start} planets: {types}"
+        )
+    return labels
+
+
+class LodViewer:
+    """Level of detail 3D view of a large galaxy
+
+    An octree over the system positions picks at most budget representative systems in
+    the current view box, and hover labels are built only for those.
+    """
+
+    def __init__(self, galaxy, budget: int = 50_000, tree: octree.Octree = None):
+        """Set up the viewer
+
+        Args:
+            galaxy (GalaxyCatalog): In-memory or memory-mapped catalog
+            budget (int, optional): Most points drawn at once. Defaults to 50_000.
+            tree (octree.Octree, optional): Octree over the catalog positions. Defaults to building one.
+        """
+        self.galaxy = galaxy
+        self.budget = budget
+        if tree is None:
+            s = galaxy.stars
+            tree = octree.Octree(np.column_stack([s["gal_x"], s["gal_y"], s["gal_z"]]))
+        self.tree = tree
+
+    def select(self, center: Sequence[float] = None, half_width: float = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Systems shown for a cubic view, or the whole galaxy when no view is given"""
+        if center is None:
+            return self.tree.select(self.budget)
+        center = np.asarray(center, dtype=float)
+        return self.tree.select(self.budget, center - half_width, center + half_width)
+
+    def figure(self, center: Sequence[float] = None, half_width: float = None):
+        """Build the plotly figure for a view
+
+        Args:
+            center (Sequence[float], optional): (x, y, z) center of the view in pc. Defaults to the whole galaxy.
+            half_width (float, optional): Half width of the view in pc, needed with center.
+
+        Returns:
+            go.Figure: 3D scatter of the selected systems, marker size growing with the systems each stands for
+        """
+        import plotly.graph_objects as go
+
+        indices, weight = self.select(center, half_width)
+        # rows in catalog order read the memory maps front to back
+        order = np.argsort(indices)
+        indices, weight = indices[order], weight[order]
+        s = self.galaxy.stars
+        x, y, z = (np.asarray(s[key][indices]) for key in ("gal_x", "gal_y", "gal_z"))
+        fig = go.Figure(
+            data=[
+                go.Scatter3d(
+                    x=x,
+                    y=y,
+                    z=z,
+                    mode="markers",
+                    marker=dict(size=1 + np.log10(weight), color="white"),
+                    hovertext=hover_text(self.galaxy, indices),
+                    hoverinfo="text",
+                )
+            ]
+        )
+        fig.update_layout(scene=dict(bgcolor="black"))
+        return fig
+
+    def show(self, center: Sequence[float] = None, half_width: float = None) -> None:
+        self.figure(center, half_width).show()
@@ -1,99 +1,20 @@
-from dataclasses import dataclass
-from typing import List, Tuple
+from collections import deque
+from array import array
+from dataclasses import dataclass, field
+import os
+from typing import Dict, List, Tuple
 from string import ascii_lowercase as letters
-import random
-import matplotlib.pyplot as plt
 import numpy as np
-from tqdm import tqdm
 
+import catalog
+import instrument
 import star_utils as sutil
 import planet_utils as putil
 import constants as const
 import atmospheres as atms
+import moons
 import positioner as posi
-
-
-@dataclass(frozen=True)
-class Atmosphere:
-    scale_height: float  # km
-    pressure: float  # surface pressure in atmospheres
-    comp: dict  # composition, two main species
-    eta: float  # absorbtion factor
-    temp: float  # average surface temp in K
-    ocean: float  # surface ocean coverage fraction
-    albedo: float  # surface albedo
-
-    def __post_init__(self):
-        assert sum(self.comp.values()) == 1, "Composition percentages do not sum to 1"
-
-    def getitems(self):
-        print(vars(self))
-
-
-@dataclass(frozen=True)
-class Planet:
-    name: str  # planet name
-    parent: str  # Parent star
-    type: str  # plaent type
-    mass: float  # mass in earth masses
-    sma: float  # semimajor axis in AU
-    axial_tilt: float  # degrees
-    rotation_period: float  # days
-    radius: float  # earth units
-    density: float  # kg/m^3
-    atmos: Atmosphere  # a class holding atmosphere properties
-    moons: dict  # dict of moon orbital distance (in planet radii) to mass (in planet masses)
-    gravity: float  # surface/1bar gravity in g
-
-    def getitems(self):
-        print(vars(self))
-
-
-@dataclass(frozen=True)
-class Station:
-    population: float
-    name: str
-    type: str
-    parent: str
-
-    def getitems(self):
-        print(vars(self))
-
-
-@dataclass(frozen=True)
-class Star:
-    name: str
-    temperature: float  # Surface temp in Kelvin
-    mass: float  # mass in solar masses
-    age: float  # Age in GYr
-    metallicity: float  # Metallicity in solar units
-    magnitude: float
-    luminosity: float
-    radius: float
-    hab_zone: List[float]
-    lifespan: float
-    harv_class: str
-
-    def getitems(self):
-        print(vars(self))
-
-
-@dataclass(frozen=True)
-class StarSystem:
-    gal_x: float  # Galactic X position in pc from Earth (spin/antispin)
-    gal_y: float  # Galactic Y position in pc from Earth (coreward/rimward)
-    gal_z: float  # Galactic Z position in pc from Earth (north/south polar)
-    star: Star
-    planets: List[Planet]
-
-    def getitems(self):
-        print("X: ", self.gal_x)
-        print("Y: ", self.gal_y)
-        print("Z: ", self.gal_z)
-        print("N_planets: ", len(self.planets))
-
-    # stations: List[Station]
-    # asteroid_belts: dict  # dict of asteroid belts listing belt number and distance from star (AU)
+from records import Atmosphere, Planet, Star, Station, StarSystem  # noqa: F401, re-exported
 
 
 def gen_subearth(star: Star, sma: float, name: str, type: str) -> Planet:
@@ -111,8 +32,8 @@ def gen_subearth(star: Star, sma: float, name: str, type: str) -> Planet:
         mass * const.earth_mass,
         star.age,
     )
-    nmoons = np.random.randint(0, 2)
-    return Planet(name, star.name, type, mass, sma, tilt, spin, radius, density, atmos, nmoons, surf_g)
+    planet_moons = moons.gen_moons("S", mass, radius, density, sma, star.mass)
+    return Planet(name, star.name, type, mass, sma, tilt, spin, radius, density, atmos, planet_moons, surf_g)
 
 
 def gen_terrestrial(star: Star, sma: float, name: str, type: str) -> Planet:
@@ -134,9 +55,9 @@ def gen_terrestrial(star: Star, sma: float, name: str, type: str) -> Planet:
         mass * const.earth_mass,
         star.age,
     )
-    nmoons = np.random.randint(0, 2)
+    planet_moons = moons.gen_moons("T", mass, radius, density, sma, star.mass)
 
-    return Planet(name, star.name, type, mass, sma, tilt, spin, radius, density, atmos, nmoons, surf_g)
+    return Planet(name, star.name, type, mass, sma, tilt, spin, radius, density, atmos, planet_moons, surf_g)
 
 
 def gen_neptune(star: Star, sma: float, name: str, type: str) -> Planet:
@@ -152,9 +73,9 @@ def gen_neptune(star: Star, sma: float, name: str, type: str) -> Planet:
         mass * const.earth_mass,
         star.age,
     )
-    nmoons = np.random.randint(5, 30)
+    planet_moons = moons.gen_moons("N", mass, radius, density, sma, star.mass)
 
-    return Planet(name, star.name, type, mass, sma, tilt, spin, radius, density, atmos, nmoons, surf_g)
+    return Planet(name, star.name, type, mass, sma, tilt, spin, radius, density, atmos, planet_moons, surf_g)
 
 
 def gen_gas_giant(star: Star, sma: float, name: str, type: str) -> Planet:
@@ -170,11 +91,12 @@ def gen_gas_giant(star: Star, sma: float, name: str, type: str) -> Planet:
         mass * const.earth_mass,
         star.age,
     )
-    nmoons = np.random.randint(30, 120)
+    planet_moons = moons.gen_moons("G", mass, radius, density, sma, star.mass)
 
-    return Planet(name, star.name, type, mass, sma, tilt, spin, radius, density, atmos, nmoons, surf_g)
+    return Planet(name, star.name, type, mass, sma, tilt, spin, radius, density, atmos, planet_moons, surf_g)
 
 
+@instrument.timed("planet")
 def generate_planet(star: Star, number: int, sma: float) -> Planet:
     name = star.name + str(number)
 
@@ -186,7 +108,8 @@ def generate_planet(star: Star, number: int, sma: float) -> Planet:
     elif 2.0 < star.mass:
         planet_p = [0.2, 0.2, 0.3, 0.3]
     planet_types = ["S", "T", "N", "G"]
-    type = np.random.choice(planet_types, 1, p=planet_p)
+    with instrument.stage("planet_type"):
+        type = np.random.choice(planet_types, 1, p=planet_p)
 
     # based on type, generate planet
     match type:
@@ -201,11 +124,12 @@ def generate_planet(star: Star, number: int, sma: float) -> Planet:
     return planet
 
 
+@instrument.timed("star")
 def generate_star(index: int) -> Star:
     # these random distributions are absolute trash, sorry
     mass = np.random.triangular(0.1, 0.4, 3.0)
     lifetime = sutil.stellar_lifespan(mass)
-    age = random.uniform(0, lifetime)
+    age = np.random.uniform(0, lifetime)
     feh = np.random.triangular(left=-1.0, mode=0, right=0.5)
     temp = sutil.stellar_temp(mass)
     lum = sutil.calculate_luminosity(mass)
@@ -221,22 +145,25 @@ def generate_star(index: int) -> Star:
         magnitude=mag,
         luminosity=lum,
         radius=rad,
-        hab_zone=[hab_in, hab_out],
+        hab_zone=(hab_in, hab_out),
         lifespan=lifetime / 1e9,
         harv_class=sutil.stellar_class(temp),
     )
     return star
 
 
+@instrument.timed("system")
 def generate_system(map_size: float, index: int) -> StarSystem:
     # generate coordinates
-    sysx, sysy, sysz = posi.local_kpc(xymax=map_size)
+    sysx, sysy, sysz = (float(pos[0]) for pos in posi.local_kpc(xymax=map_size))
     # generate star
     star = generate_star(index=index)
     # get number of planets
-    nplanets = np.random.choice(15, p=const.n_p_prob) + 1
+    with instrument.stage("planet_count"):
+        nplanets = np.random.choice(15, p=const.n_p_prob) + 1
     planets = []
-    smas = np.sort(np.random.exponential(0.8, nplanets) * 10) * np.sqrt(star.mass)
+    with instrument.stage("sma"):
+        smas = np.sort(np.random.exponential(0.8, nplanets) * 10) * np.sqrt(star.mass)
     # smas = np.sort(np.random.uniform(0.1, 60, nplanets))
     # make planets
     for sma, let in zip(smas, list(letters)):
@@ -249,48 +176,614 @@ def generate_system(map_size: float, index: int) -> StarSystem:
     return StarSystem(sysx, sysy, sysz, star, planets)
 
 
-def test_func() -> None:
-    # testing for sma distribution
-    # not bad
-    # a = np.random.f(2.5, 25, 100000) * 10
-
-    # weird but not horrible
-    # a = np.abs(np.random.vonmises(1, 1, 100000) * 20)
-    a = np.random.choice(15, size=100000, p=const.n_p_prob) + 1
-    plt.hist(a, bins=200, density=True)
-    plt.show()
-    # for n in range(0, 10):
-    #     b, c = putil.gen_tilt_spin(const.au * 1000, const.earth_radius, const.sun_mass, const.earth_mass, 5e9)
-    #     print(b, c)
-    # a = atms.gen_gas_atmos(1, 5.2, 2.36)
-    # a.getitems()
-    return
-
-
-def visualize_solar_system(ssystem: StarSystem):
-    nplanets = len(ssystem.planets)
-    x = []
-    y = np.arange(nplanets)
-    colors = []
-    for planet in ssystem.planets:
-        planet.getitems()
-        x.append(planet.sma)
-        if planet.type == "T":
-            colors.append("green")
-        elif planet.type == "S":
-            colors.append("grey")
-        elif planet.type == "N":
-            colors.append("blue")
-        else:
-            colors.append("orange")
-
-    plt.scatter(x, y, c=colors)
-    plt.vlines(ssystem.star.hab_zone, 0, nplanets, colors=["green"])
-    plt.show()
+@dataclass(frozen=True)
+class GalaxyCatalog:
+    stars: Dict[str, np.ndarray]  # one row per system, galactic position included
+    planets: Dict[str, np.ndarray]  # one row per planet, grouped by parent system
+    offsets: np.ndarray  # planets of system i are rows offsets[i]:offsets[i + 1]
+    # one row per moon, grouped by parent planet row, see moons.columns. Empty for catalogs
+    # without moon tables, where planets only carry n_moons.
+    moons: Dict[str, np.ndarray] = field(default_factory=dict)
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> StarSystem:
+        return self.system(index)
+
+    def take(self, indices: np.ndarray) -> "GalaxyCatalog":
+        """Catalog of some of the systems, in the given order and renumbered from 0
+
+        Args:
+            indices (np.ndarray): System indices
+
+        Returns:
+            GalaxyCatalog: Stars, planets and moons tables of those systems
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        offsets = np.asarray(self.offsets)
+        starts = offsets[indices]
+        counts = offsets[indices + 1] - starts
+        skip = np.cumsum(counts) - counts
+        rows = np.repeat(starts - skip, counts) + np.arange(int(counts.sum()))
+        stars = {key: np.asarray(col[indices]) for key, col in self.stars.items()}
+        planets = {key: np.asarray(col[rows]) for key, col in self.planets.items()}
+        planets["system"] = np.repeat(np.arange(len(indices)), counts)
+        new_offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(counts, out=new_offsets[1:])
+        moon_table = {}
+        if self.moons:
+            first, stop = self.moon_rows(rows)
+            n = stop - first
+            moon_rows = np.repeat(first - (np.cumsum(n) - n), n) + np.arange(int(n.sum()))
+            moon_table = {key: np.asarray(col[moon_rows]) for key, col in self.moons.items()}
+            moon_table["planet"] = np.repeat(np.arange(len(rows)), n)
+        return GalaxyCatalog(stars, planets, new_offsets, moon_table)
+
+    def moon_rows(self, rows: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        """First and stop moon table rows of planet rows, found by bisecting the planet column"""
+        column = self.moons["planet"]
+        return np.searchsorted(column, rows, side="left"), np.searchsorted(column, np.add(rows, 1), side="left")
+
+    @classmethod
+    def from_systems(cls, systems: List[StarSystem]) -> "GalaxyCatalog":
+        """Build catalog tables from StarSystem objects, such as hand-made ones
+
+        Names are not stored in the tables. Moons given as a dict go to the moon table;
+        moons given only as a count are kept in n_moons without moon rows.
+
+        Args:
+            systems (List[StarSystem]): Systems in order
+
+        Returns:
+            GalaxyCatalog: Stars and planets tables
+        """
+        stars = {key: [] for key in ["gal_x", "gal_y", "gal_z", *Star._fields[1:]] if key != "hab_zone"}
+        stars.update(hab_in=[], hab_out=[])
+        planets = {"system": [], "type": [], "n_moons": [], "comp": []}
+        planets.update({key: [] for key in Planet._values + Atmosphere._values})
+        moon_table = {key: [] for key in moons.columns}
+        offsets = [0]
+        for index, system in enumerate(systems):
+            for key in ("gal_x", "gal_y", "gal_z"):
+                stars[key].append(getattr(system, key))
+            for key in stars:
+                if key not in ("gal_x", "gal_y", "gal_z", "hab_in", "hab_out"):
+                    stars[key].append(getattr(system.star, key))
+            stars["hab_in"].append(system.star.hab_zone[0])
+            stars["hab_out"].append(system.star.hab_zone[1])
+            for planet in system.planets:
+                if isinstance(planet.moons, dict):
+                    for distance, ratio in sorted(planet.moons.items()):
+                        moon_table["planet"].append(len(planets["system"]))
+                        moon_table["sma"].append(distance)
+                        moon_table["mass"].append(ratio)
+                        moon_table["density"].append(np.nan)
+                        moon_table["period"].append(
+                            putil.orbital_period(
+                                distance * planet.radius * const.earth_radius,
+                                planet.mass * (1 + ratio) * const.earth_mass,
+                            )
+                            / 86400
+                        )
+                planets["system"].append(index)
+                planets["type"].append(str(np.ravel(planet.type)[0]))
+                planets["n_moons"].append(len(planet.moons) if isinstance(planet.moons, dict) else planet.moons)
+                planets["comp"].append(planet.atmos.fractions)
+                for key in Planet._values:
+                    planets[key].append(getattr(planet, key))
+                for key in Atmosphere._values:
+                    planets[key].append(getattr(planet.atmos, key))
+            offsets.append(offsets[-1] + len(system.planets))
+        # same column order and dtypes as generated catalogs
+        star_keys = ["gal_x", "gal_y", "gal_z", *Star._fields[1:8], "hab_in", "hab_out", "lifespan", "harv_class"]
+        stars = {key: np.array(stars[key], dtype="U3" if key == "harv_class" else float) for key in star_keys}
+        planet_keys = ["system", "type", *Planet._values, "n_moons", *Atmosphere._fields]
+        dtypes = {"system": np.int64, "type": "U1", "n_moons": np.int64}
+        planets = {key: np.array(planets[key], dtype=dtypes.get(key, float)) for key in planet_keys}
+        planets["comp"] = planets["comp"].reshape(-1, len(const.atmos_species))
+        moon_table = {key: np.array(col, dtype=moons.empty_table()[key].dtype) for key, col in moon_table.items()}
+        return cls(stars, planets, np.array(offsets, dtype=np.int64), moon_table)
+
+    def star(self, index: int) -> Star:
+        """Build the Star of one system from the stars table
+
+        Args:
+            index (int): System index
+
+        Returns:
+            Star: A Star object holding a copy of the row
+        """
+        index = range(len(self))[index]
+        s = self.stars
+        return Star(
+            name=str(index).zfill(4) + "A",
+            temperature=float(s["temperature"][index]),
+            mass=float(s["mass"][index]),
+            age=float(s["age"][index]),
+            metallicity=float(s["metallicity"][index]),
+            magnitude=float(s["magnitude"][index]),
+            luminosity=float(s["luminosity"][index]),
+            radius=float(s["radius"][index]),
+            hab_zone=(float(s["hab_in"][index]), float(s["hab_out"][index])),
+            lifespan=float(s["lifespan"][index]),
+            harv_class=str(s["harv_class"][index]),
+        )
+
+    def _planet_data(self, start: int, stop: int) -> array:
+        # planet rows flattened in the order Planet stores its fields
+        p = self.planets
+        columns = [p[key][start:stop] for key in Planet._values + Atmosphere._values]
+        block = np.column_stack(columns + [p["comp"][start:stop]]).astype(float)
+        data = array("d")
+        data.frombytes(block.tobytes())
+        return data
+
+    def _planet_moons(self, start: int, stop: int) -> list:
+        # moons of planet rows start:stop as {distance: mass} dicts, or counts without a moon table
+        if not self.moons:
+            return [int(n) for n in self.planets["n_moons"][start:stop]]
+        first, last = (int(row) for row in self.moon_rows([start, stop])[0])
+        planet = np.asarray(self.moons["planet"][first:last]) - start
+        sma = np.asarray(self.moons["sma"][first:last]).tolist()
+        mass = np.asarray(self.moons["mass"][first:last]).tolist()
+        bounds = np.searchsorted(planet, np.arange(stop - start + 1)).tolist()
+        counts = self.planets["n_moons"][start:stop].tolist()
+        # planets added with only a moon count have no rows, keep the count for them
+        return [
+            dict(zip(sma[a:b], mass[a:b])) if b - a == n else n for a, b, n in zip(bounds[:-1], bounds[1:], counts)
+        ]
+
+    def _planet_view(self, row: int, star: Star, data: array, offset: int, planet_moons) -> Planet:
+        p = self.planets
+        name = star.name + letters[row - int(self.offsets[p["system"][row]])]
+        return Planet._view(name, star.name, str(p["type"][row]), planet_moons, data, offset)
+
+    def planet(self, row: int, star: Star = None) -> Planet:
+        """Build one Planet from the planets table
+
+        Args:
+            row (int): Planet row in the planets table
+            star (Star, optional): Parent star, built from the stars table if not given
+
+        Returns:
+            Planet: A Planet object holding a copy of the row
+        """
+        row = range(len(self.planets["system"]))[row]
+        if star is None:
+            star = self.star(int(self.planets["system"][row]))
+        return self._planet_view(row, star, self._planet_data(row, row + 1), 0, self._planet_moons(row, row + 1)[0])
+
+    def system(self, index: int) -> StarSystem:
+        """Build a StarSystem, with its star and planets, from the catalog tables
+
+        Args:
+            index (int): System index
+
+        Returns:
+            StarSystem: A StarSystem object holding a copy of the rows
+        """
+        index = range(len(self))[index]
+        star = self.star(index)
+        start, stop = int(self.offsets[index]), int(self.offsets[index + 1])
+        # the planets of a system share one array
+        data = self._planet_data(start, stop)
+        planet_moons = self._planet_moons(start, stop)
+        planets = list(
+            tuple(
+                self._planet_view(row, star, data, (row - start) * Planet.size, planet_moons[row - start])
+                for row in range(start, stop)
+            )
+        )
+        s = self.stars
+        return StarSystem(
+            float(s["gal_x"][index]), float(s["gal_y"][index]), float(s["gal_z"][index]), star, planets
+        )
+
+
+planet_types = ["S", "T", "N", "G"]
+# planet type probabilities for star mass < 0.5, 0.5 to 2.0 and > 2.0 solar masses
+planet_type_p = np.array([[0.3, 0.4, 0.2, 0.1], [0.2, 0.4, 0.2, 0.2], [0.2, 0.2, 0.3, 0.3]])
+
+
+@instrument.timed("star")
+def _batch_stars(rng: np.random.Generator, n: int) -> Dict[str, np.ndarray]:
+    mass = rng.triangular(0.1, 0.4, 3.0, n)
+    lifetime = sutil.stellar_lifespan(mass)
+    age = rng.uniform(0, lifetime)
+    feh = rng.triangular(-1.0, 0, 0.5, n)
+    temp = sutil.stellar_temp(mass)
+    lum = sutil.calculate_luminosity(mass)
+    hab_in, hab_out = sutil.habitable_zone(lum)
+    return {
+        "temperature": temp,
+        "mass": mass,
+        "age": age / 1e9,
+        "metallicity": feh,
+        "magnitude": sutil.absolute_magnitude(lum),
+        "luminosity": lum,
+        "radius": sutil.star_radius(mass),
+        "hab_in": hab_in,
+        "hab_out": hab_out,
+        "lifespan": lifetime / 1e9,
+        "harv_class": sutil.stellar_class(temp).astype("U3"),
+    }
+
+
+@instrument.timed("planets")
+def _batch_planets(
+    rng: np.random.Generator, stars: Dict[str, np.ndarray], offsets: np.ndarray
+) -> Tuple[Dict[str, np.ndarray], Dict[str, np.ndarray]]:
+    system = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    n = len(system)
+    smass = stars["mass"][system]
+    lum = stars["luminosity"][system]
+
+    # smas sorted within each system
+    with instrument.stage("sma"):
+        sma = rng.exponential(0.8, n) * 10
+        sma = sma[np.lexsort((sma, system))] * np.sqrt(smass)
+
+    # planet type, picked with the star mass dependent probabilities
+    with instrument.stage("planet_type"):
+        bucket = (smass >= 0.5).astype(int) + (smass > 2.0)
+        type_cum = np.cumsum(planet_type_p, axis=1)[bucket]
+        kind = np.minimum((type_cum <= rng.uniform(0, 1, n)[:, None]).sum(axis=1), 3)
+
+    mass = np.empty(n)
+    radius = np.empty(n)
+    p_atmos = np.zeros(n)
+
+    sub = kind == 0
+    k = np.count_nonzero(sub)
+    mass[sub] = rng.uniform(0.001, 0.5, k)
+    cmf = rng.uniform(0.0, 0.1, k)
+    radius[sub] = putil.rocky_radius(mass[sub], cmf) * rng.uniform(0.90, 1.00, k)
+    p_atmos[sub] = 0.001
+
+    ter = kind == 1
+    k = np.count_nonzero(ter)
+    mass[ter] = rng.uniform(0.1, 2.0, k)
+    cmf = rng.triangular(0.1, 0.26, 0.4, k)
+    radius[ter] = putil.rocky_radius(mass[ter], cmf) * rng.uniform(0.95, 1.05, k)
+    in_hz = (stars["hab_in"][system[ter]] < sma[ter]) & (sma[ter] < stars["hab_out"][system[ter]])
+    p_atmos[ter] = np.where(in_hz, 0.95, 0.01)
+
+    nep = kind == 2
+    k = np.count_nonzero(nep)
+    mass[nep] = rng.triangular(3.0, 10.0, 30.0, k)
+    radius[nep] = mass[nep] ** 0.55 * rng.uniform(0.95, 1.05, k)
+
+    gas = kind == 3
+    k = np.count_nonzero(gas)
+    mass[gas] = rng.triangular(30.0, 100.0, 600.0, k)
+    radius[gas] = (138.6627041 * (mass[gas] ** 0.01) - 135.6762705) * rng.uniform(0.98, 1.02, k)
+
+    density = putil.planet_density(mass, radius)
+    surf_g = putil.surface_grav(mass, radius)
+    tilt, spin = putil.gen_tilt_spin(
+        sma * const.au * 1000,
+        radius * const.earth_radius,
+        smass * const.sun_mass,
+        mass * const.earth_mass,
+        stars["age"][system],
+        rng=rng,
+    )
+
+    ptype = np.array(planet_types)[kind]
+    n_moons, moon_table = moons.gen_moons_batch(ptype, mass, radius, density, sma, smass, rng=rng)
+
+    planets = {
+        "system": system,
+        "type": ptype,
+        "mass": mass,
+        "sma": sma,
+        "axial_tilt": tilt,
+        "rotation_period": spin,
+        "radius": radius,
+        "density": density,
+        "gravity": surf_g,
+        "n_moons": n_moons,
+    }
+    planets.update(atms.gen_atmos_batch(lum, sma, surf_g, p_atmos, gas=nep | gas, rng=rng))
+    return planets, moon_table
+
+
+def concatenate_catalogs(parts: List[GalaxyCatalog]) -> GalaxyCatalog:
+    """Join catalogs end to end, renumbering systems
+
+    Args:
+        parts (List[GalaxyCatalog]): Catalogs in order
+
+    Returns:
+        GalaxyCatalog: One catalog holding every system of the parts
+    """
+    starts = np.cumsum([0] + [len(part) for part in parts])
+    first_rows = np.cumsum([0] + [int(part.offsets[-1]) for part in parts])
+    stars = {key: np.concatenate([part.stars[key] for part in parts]) for key in parts[0].stars}
+    planets = {key: np.concatenate([part.planets[key] for part in parts]) for key in parts[0].planets}
+    planets["system"] = np.concatenate([part.planets["system"] + start for part, start in zip(parts, starts)])
+    offsets = np.concatenate([[0]] + [part.offsets[1:] + rows for part, rows in zip(parts, first_rows)])
+    moon_table = {}
+    if any(part.moons for part in parts):
+        # parts without a moon table add no moon rows
+        tables = [part.moons or moons.empty_table() for part in parts]
+        moon_table = {key: np.concatenate([table[key] for table in tables]) for key in tables[0]}
+        moon_table["planet"] = np.concatenate([table["planet"] + rows for table, rows in zip(tables, first_rows)])
+    return GalaxyCatalog(stars, planets, offsets.astype(np.int64), moon_table)
+
+
+def chunk_rng(seed: int, chunk: int) -> np.random.Generator:
+    """Random generator for one chunk of a galaxy
+
+    Each chunk gets its own stream spawned from the master seed, so a chunk's contents
+    depend only on (seed, chunk) and not on which process or in which order it runs.
+
+    Args:
+        seed (int): Master seed of the galaxy
+        chunk (int): Chunk number
+
+    Returns:
+        np.random.Generator: Generator for the chunk
+    """
+    return np.random.default_rng(np.random.SeedSequence(seed, spawn_key=(chunk,)))
+
+
+@instrument.timed("chunk")
+def generate_chunk(rng: np.random.Generator, n_systems: int, map_size: float = 500.0) -> GalaxyCatalog:
+    """Generate a block of systems in vectorized batches
+
+    Every quantity is drawn for all systems (or all planets) at once, with the same
+    distributions as generate_system. System indices in the result start at 0.
+
+    Args:
+        rng (np.random.Generator): Random generator
+        n_systems (int): Number of star systems
+        map_size (float, optional): Half width of the map in pc. Defaults to 500.0.
+
+    Returns:
+        GalaxyCatalog: Stars and planets tables
+    """
+    x, y, z = posi.local_kpc(xymax=map_size, nstars=n_systems, rng=rng)
+    return generate_systems_at(rng, x, y, z)
+
+
+def generate_systems_at(rng: np.random.Generator, x: np.ndarray, y: np.ndarray, z: np.ndarray) -> GalaxyCatalog:
+    """Generate stars and planets for systems at given positions in vectorized batches
+
+    Args:
+        rng (np.random.Generator): Random generator
+        x (np.ndarray): Galactic x positions in pc
+        y (np.ndarray): Galactic y positions in pc
+        z (np.ndarray): Galactic z positions in pc
+
+    Returns:
+        GalaxyCatalog: Stars, planets and moons tables, one system per position
+    """
+    n_systems = len(x)
+    stars = {"gal_x": x, "gal_y": y, "gal_z": z}
+    stars.update(_batch_stars(rng, n_systems))
+    with instrument.stage("planet_count"):
+        n_planets = rng.choice(15, size=n_systems, p=const.n_p_prob) + 1
+    offsets = np.zeros(n_systems + 1, dtype=np.int64)
+    np.cumsum(n_planets, out=offsets[1:])
+    planets, moon_table = _batch_planets(rng, stars, offsets)
+    return GalaxyCatalog(stars, planets, offsets, moon_table)
+
+
+def chunk_bounds(n_systems: int, chunk_size: int) -> List[Tuple[int, int]]:
+    """Split a galaxy into (first system, system count) chunks of fixed size"""
+    return [(start, min(chunk_size, n_systems - start)) for start in range(0, n_systems, chunk_size)]
+
+
+def _generate_numbered_chunk(task: Tuple[int, int, int, float]) -> GalaxyCatalog:
+    seed, chunk, n_systems, map_size = task
+    return generate_chunk(chunk_rng(seed, chunk), n_systems, map_size)
+
+
+def generate_galaxy(
+    n_systems: int,
+    seed: int = None,
+    map_size: float = 500.0,
+    workers: int = 1,
+    chunk_size: int = 50_000,
+    profile: bool = False,
+    progress: bool = False,
+) -> GalaxyCatalog:
+    """Generate a whole galaxy in vectorized batches
+
+    The galaxy is cut into chunks of chunk_size systems, each drawn from its own random
+    stream derived from the seed. No Star or Planet objects are built; use the returned
+    catalog to materialize them on demand. The result depends only on seed, map_size and
+    chunk_size, so it is identical for any number of workers.
+
+    Args:
+        n_systems (int): Number of star systems
+        seed (int, optional): Master seed. Defaults to None, which picks fresh entropy.
+        map_size (float, optional): Half width of the map in pc. Defaults to 500.0.
+        workers (int, optional): Number of worker processes. Defaults to 1, which runs in process.
+        chunk_size (int, optional): Systems per chunk. Defaults to 50_000.
+        profile (bool, optional): Time the generation stages, in every worker, and print a ranked
+            report at the end. Defaults to False.
+        progress (bool, optional): Show a tqdm progress bar. Defaults to False.
+
+    Returns:
+        GalaxyCatalog: Stars and planets tables
+    """
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    tasks = [(seed, chunk, count, map_size) for chunk, (_, count) in enumerate(chunk_bounds(n_systems, chunk_size))]
+    if not tasks:
+        return generate_chunk(np.random.default_rng(seed), 0, map_size)
+    parts = []
+    with instrument.profiling(profile), _progress_bar(progress, total=n_systems, unit="sys") as bar:
+        for part in _iter_chunks(tasks, workers):
+            parts.append(part)
+            bar.update(len(part))
+    return concatenate_catalogs(parts)
+
+
+def stream_galaxy(
+    path: str,
+    n_systems: int,
+    seed: int = None,
+    map_size: float = 500.0,
+    workers: int = 1,
+    chunk_size: int = 50_000,
+    resume: bool = True,
+    progress: bool = True,
+    profile: bool = False,
+    overwrite: bool = False,
+) -> dict:
+    """Generate a galaxy chunk by chunk straight into an on-disk catalog
+
+    Only the chunks in flight are held in memory. Each chunk is appended to the catalog
+    as soon as it is generated, and an interrupted run picks up after the last completed
+    chunk when called again with the same arguments. The catalog holds the same galaxy
+    generate_galaxy returns for the same seed, map_size and chunk_size.
+
+    Args:
+        path (str): Catalog directory
+        n_systems (int): Number of star systems
+        seed (int, optional): Master seed. Defaults to None, which reuses the seed of a run being
+            resumed or picks fresh entropy.
+        map_size (float, optional): Half width of the map in pc. Defaults to 500.0.
+        workers (int, optional): Number of worker processes. Defaults to 1.
+        chunk_size (int, optional): Systems per chunk. Defaults to 50_000.
+        resume (bool, optional): Continue a partial catalog at path instead of overwriting it. Defaults to True.
+        progress (bool, optional): Show a tqdm progress bar. Defaults to True.
+        profile (bool, optional): Time the generation stages, in every worker, and print a ranked
+            report at the end. Defaults to False.
+        overwrite (bool, optional): Write into a non-empty directory that is not a catalog. Defaults to False.
+
+    Returns:
+        dict: The catalog manifest
+    """
+    if seed is None and resume and os.path.exists(os.path.join(path, catalog.MANIFEST)):
+        seed = catalog.read_manifest(path)["params"]["seed"]
+    if seed is None:
+        seed = np.random.SeedSequence().entropy
+    params = {
+        "n_systems": n_systems,
+        "seed": seed,
+        "map_size": map_size,
+        "chunk_size": chunk_size,
+        "species": const.atmos_species,
+    }
+    writer = catalog.CatalogWriter(path, params, resume=resume, overwrite=overwrite)
+
+    bounds = chunk_bounds(n_systems, chunk_size)
+    tasks = [(seed, chunk, count, map_size) for chunk, (_, count) in enumerate(bounds)][writer.chunks_done :]
+    with instrument.profiling(profile), _progress_bar(
+        progress, total=n_systems, initial=writer.n_systems, unit="sys"
+    ) as bar:
+        for part in _iter_chunks(tasks, workers):
+            with instrument.stage("write"):
+                writer.append(part.stars, part.planets, part.offsets, part.moons)
+            bar.update(len(part))
+    return writer.manifest
+
+
+def save_galaxy(galaxy: GalaxyCatalog, path: str, overwrite: bool = False) -> dict:
+    """Write an in-memory catalog to disk in the format read by open_galaxy
+
+    Args:
+        galaxy (GalaxyCatalog): Catalog to save
+        path (str): Catalog directory, a catalog already there is replaced
+        overwrite (bool, optional): Write into a non-empty directory that is not a catalog. Defaults to False.
+
+    Returns:
+        dict: The catalog manifest
+    """
+    params = {"n_systems": len(galaxy), "species": const.atmos_species}
+    writer = catalog.CatalogWriter(path, params, resume=False, overwrite=overwrite)
+    writer.append(galaxy.stars, galaxy.planets, galaxy.offsets, galaxy.moons)
+    return writer.manifest
+
+
+def open_galaxy(path: str) -> GalaxyCatalog:
+    """Open an on-disk catalog without reading it
+
+    Every column is memory mapped, so opening costs the same for any galaxy size and only
+    the pages behind the rows that are used get read. Indexing the result builds a single
+    StarSystem from its rows.
+
+    A single .npz file written by catalog.save_npz is read into memory instead.
+
+    Args:
+        path (str): Catalog directory written by stream_galaxy or save_galaxy, or a .npz file
+
+    Returns:
+        GalaxyCatalog: Catalog backed by read-only memory maps
+    """
+    if os.path.isfile(path):
+        return GalaxyCatalog(*catalog.load_npz(path))
+    manifest, stars, planets, offsets = catalog.open_columns(path)
+    if manifest["params"].get("species", const.atmos_species) != const.atmos_species:
+        raise ValueError(f"{path} uses atmosphere species {manifest['params']['species']}")
+    return GalaxyCatalog(stars, planets, offsets, catalog.open_moons(path))
+
+
+class _NoProgress:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def update(self, n: int = 1) -> None:
+        pass
+
+
+def _progress_bar(progress: bool, **options):
+    # tqdm is only imported when a bar is actually shown
+    if not progress:
+        return _NoProgress()
+    from tqdm import tqdm
+
+    return tqdm(**options)
+
+
+def _instrumented_chunk(task: Tuple[int, int, int, float]) -> Tuple[GalaxyCatalog, dict]:
+    # run in a worker, sending the stage stats of the chunk back with it
+    instrument.reset()
+    instrument.enable()
+    try:
+        return _generate_numbered_chunk(task), instrument.snapshot()
+    finally:
+        instrument.disable()
+
+
+def _iter_chunks(tasks: List[Tuple[int, int, int, float]], workers: int):
+    # yield chunks in task order, keeping at most two per worker in flight
+    if workers <= 1:
+        for task in tasks:
+            yield _generate_numbered_chunk(task)
+        return
+    instrumented = instrument.enabled()
+
+    def collect(future) -> GalaxyCatalog:
+        if not instrumented:
+            return future.result()
+        part, stats = future.result()
+        instrument.merge(stats)
+        return part
+
+    # only runs that use workers pay for importing the process pool machinery
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for task in tasks:
+            pending.append(pool.submit(_instrumented_chunk if instrumented else _generate_numbered_chunk, task))
+            if len(pending) >= 2 * workers:
+                yield collect(pending.popleft())
+        while pending:
+            yield collect(pending.popleft())
 
 
 def main():
-    random.seed(a=4)
+    np.random.seed(4)
     # generate systems
     test1: StarSystem = generate_system(map_size=500.0, index=0)
     test1.star.getitems()
@@ -0,0 +1,139 @@
+from contextlib import contextmanager
+from functools import wraps
+import sys
+import time
+from typing import Callable, Dict, List, TextIO
+
+
+# Opt-in timing of the generation stages. Stages nest, so a stage's time includes the
+# stages inside it. While disabled, stage() hands back a shared do-nothing context and
+# timed functions make one flag check before calling through.
+_enabled = False
+_stats: Dict[str, List[float]] = {}  # stage -> [calls, seconds]
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NULL = _NullStage()
+
+
+class _Stage:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+        return False
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def disable() -> None:
+    enable(False)
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+def reset() -> None:
+    _stats.clear()
+
+
+def record(name: str, seconds: float, calls: int = 1) -> None:
+    entry = _stats.setdefault(name, [0, 0.0])
+    entry[0] += calls
+    entry[1] += seconds
+
+
+def stage(name: str):
+    """Context manager timing a block as one call of a stage, a no-op while disabled"""
+    return _Stage(name) if _enabled else _NULL
+
+
+def timed(name: str) -> Callable:
+    """Decorator timing every call of a function as a stage"""
+
+    def decorate(func: Callable) -> Callable:
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(name, time.perf_counter() - start)
+
+        return wrapper
+
+    return decorate
+
+
+def snapshot() -> Dict[str, List[float]]:
+    """Copy of the stats gathered so far, for sending back from a worker process"""
+    return {name: list(entry) for name, entry in _stats.items()}
+
+
+def merge(stats: Dict[str, List[float]]) -> None:
+    """Add stats gathered elsewhere, such as in a worker process"""
+    for name, (calls, seconds) in stats.items():
+        record(name, seconds, calls)
+
+
+def report(stats: Dict[str, List[float]] = None) -> str:
+    """Stages ranked by total time
+
+    Args:
+        stats (Dict[str, List[float]], optional): Stats to report. Defaults to those gathered so far.
+
+    Returns:
+        str: A table of calls, total and per call time and share of the slowest stage
+    """
+    if stats is None:
+        stats = _stats
+    ranked = sorted(stats.items(), key=lambda item: item[1][1], reverse=True)
+    top = ranked[0][1][1] if ranked and ranked[0][1][1] > 0 else 1.0
+    lines = [f"{'stage':<24}{'calls':>12}{'total s':>11}{'per call us':>14}{'share':>8}"]
+    for name, (calls, seconds) in ranked:
+        per_call = seconds / calls * 1e6 if calls else 0.0
+        lines.append(f"{name:<24}{int(calls):>12}{seconds:>11.4f}{per_call:>14.2f}{seconds / top:>8.1%}")
+    return "\n".join(lines)
+
+
+@contextmanager
+def profiling(on: bool = True, out: TextIO = None):
+    """Gather stage stats for a block and print the ranked report when it ends
+
+    Args:
+        on (bool, optional): Do nothing when False, so callers can pass their profile flag through.
+            Defaults to True.
+        out (TextIO, optional): Where the report goes. Defaults to sys.stderr.
+    """
+    if not on:
+        yield
+        return
+    reset()
+    enable()
+    try:
+        yield
+    finally:
+        disable()
+        print(report(), file=out if out is not None else sys.stderr)
@@ -0,0 +1,161 @@
+from typing import Dict, Tuple
+import numpy as np
+
+import constants as const
+import instrument
+import planet_utils as p_util
+
+
+# Moons are stored as a ragged table: one row per moon, grouped by parent planet row and
+# sorted outward, so the moons of planet rows [a, b) are one contiguous run of rows.
+#     planet    int64, parent planet row
+#     sma       orbital distance in planet radii
+#     mass      mass in planet masses
+#     density   kg/m^3
+#     period    orbital period in days
+columns = ("planet", "sma", "mass", "density", "period")
+
+# candidate moons drawn per planet type, [low, high)
+candidate_counts = {"S": (0, 2), "T": (0, 2), "N": (5, 30), "G": (30, 120)}
+# log10 of the moon to planet mass ratio, uniform between the bounds
+mass_ratio_log = {"S": (-9.0, -3.0), "T": (-8.0, -1.7), "N": (-10.0, -3.5), "G": (-12.0, -4.0)}
+# moons at least this dense are rocky and hold together down to the rigid body Roche limit,
+# icy ones are torn apart at the fluid limit, a fixed multiple of the rigid one
+rigid_density = 2500.0
+fluid_over_rigid = p_util.roche_liquid(1.0, 1.0, 1.0) / p_util.roche_rigid(1.0, 1.0, 1.0)
+# moons are only stable well inside the planet's Hill sphere
+hill_fraction = 0.5
+
+
+def empty_table() -> Dict[str, np.ndarray]:
+    """A moon table with no rows"""
+    return {key: np.zeros(0, dtype=np.int64 if key == "planet" else float) for key in columns}
+
+
+def sorted_uniform(counts: np.ndarray, rng: np.random.Generator = None) -> np.ndarray:
+    """Uniform draws on [0, 1), sorted within consecutive groups, without sorting
+
+    The i-th smallest of m uniforms is distributed as the sum of i standard exponentials
+    over the sum of m + 1 of them, so one exponential draw per value plus one per group
+    and a cumulative sum give every group already in order.
+
+    Args:
+        counts (np.ndarray): Values per group
+        rng (np.random.Generator, optional): Random generator. Defaults to the np.random module.
+
+    Returns:
+        np.ndarray: counts.sum() values, ascending within each group
+    """
+    if rng is None:
+        rng = np.random
+    counts = np.asarray(counts, dtype=np.int64)
+    sums = np.cumsum(rng.standard_exponential(int(counts.sum()) + len(counts)))
+    ends = np.cumsum(counts + 1) - 1
+    before = np.concatenate([[0.0], sums[ends[:-1]]])
+    # drop each group's closing draw, then scale by the group total
+    keep = np.ones(len(sums), dtype=bool)
+    keep[ends] = False
+    group = np.repeat(np.arange(len(counts)), counts)
+    return (sums[keep] - before[group]) / (sums[ends] - before)[group]
+
+
+def hill_radius(sma: np.ndarray, mass: np.ndarray, star_mass: np.ndarray) -> np.ndarray:
+    """Hill sphere radius of a planet
+
+    Args:
+        sma (np.ndarray): Semimajor axis of the planet in au
+        mass (np.ndarray): Planet mass in earth masses
+        star_mass (np.ndarray): Star mass in solar masses
+
+    Returns:
+        np.ndarray: Hill radius in m
+    """
+    return sma * const.au * 1000 * np.cbrt(mass * const.earth_mass / (3 * star_mass * const.sun_mass))
+
+
+@instrument.timed("moons")
+def gen_moons_batch(
+    type: np.ndarray,
+    mass: np.ndarray,
+    radius: np.ndarray,
+    density: np.ndarray,
+    sma: np.ndarray,
+    star_mass: np.ndarray,
+    rng: np.random.Generator = None,
+) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+    """Generate the moons of many planets at once
+
+    Every planet draws a number of candidate moons for its type. Each candidate gets a mass,
+    a density and an orbit log-uniform between the planet's surface and half its Hill radius,
+    and candidates inside their Roche limit are dropped. Orbits are drawn in order, so the
+    table comes out grouped by planet and sorted outward without a sort.
+
+    Args:
+        type (np.ndarray): Planet types, "S", "T", "N" or "G"
+        mass (np.ndarray): Planet masses in earth masses
+        radius (np.ndarray): Planet radii in earth units
+        density (np.ndarray): Planet densities in kg/m^3
+        sma (np.ndarray): Planet semimajor axes in au
+        star_mass (np.ndarray): Masses of the parent stars in solar masses
+        rng (np.random.Generator, optional): Random generator. Defaults to the np.random module.
+
+    Returns:
+        Tuple[np.ndarray, Dict[str, np.ndarray]]: Moons per planet and the moon table, with
+            planet indices into the given arrays
+    """
+    if rng is None:
+        rng = np.random
+    type = np.asarray(type)
+    mass, radius, density, sma, star_mass = (
+        np.asarray(a, dtype=float) for a in (mass, radius, density, sma, star_mass)
+    )
+    n = len(type)
+    lo = np.zeros(n, dtype=np.int64)
+    hi = np.ones(n, dtype=np.int64)
+    ratio_lo = np.zeros(n)
+    ratio_hi = np.zeros(n)
+    for kind, (low, high) in candidate_counts.items():
+        of_kind = type == kind
+        lo[of_kind], hi[of_kind] = low, high
+        ratio_lo[of_kind], ratio_hi[of_kind] = mass_ratio_log[kind]
+    # uniform then floor works for both a Generator and the np.random module
+    candidates = np.floor(rng.uniform(lo, hi)).astype(np.int64)
+
+    planet = np.repeat(np.arange(n), candidates)
+    k = len(planet)
+    outer = hill_fraction * hill_radius(sma, mass, star_mass) / (radius * const.earth_radius)
+    # planets with no room outside their own surface get no moons
+    log_outer = np.log(np.maximum(outer, 1.0))
+    distance = np.exp(sorted_uniform(candidates, rng) * log_outer[planet])
+    moon_density = rng.uniform(1000.0, 3500.0, k)
+
+    # Roche limits in m around a primary of one earth radius, so in primary radii once
+    # divided by the earth radius. Moons inside the limit or the planet itself are dropped.
+    roche = p_util.roche_rigid(1.0, density[planet], moon_density)
+    roche[moon_density < rigid_density] *= fluid_over_rigid
+    keep = distance * const.earth_radius > np.maximum(roche, const.earth_radius)
+    planet, distance, moon_density = planet[keep], distance[keep], moon_density[keep]
+    ratio = 10 ** rng.uniform(ratio_lo[planet], ratio_hi[planet])
+
+    host = mass[planet] * const.earth_mass
+    period = p_util.orbital_period(distance * radius[planet] * const.earth_radius, host * (1 + ratio)) / 86400
+    table = {"planet": planet, "sma": distance, "mass": ratio, "density": moon_density, "period": period}
+    return np.bincount(planet, minlength=n), table
+
+
+def gen_moons(type: str, mass: float, radius: float, density: float, sma: float, star_mass: float) -> dict:
+    """Generate the moons of one planet
+
+    Args:
+        type (str): Planet type
+        mass (float): Planet mass in earth masses
+        radius (float): Planet radius in earth units
+        density (float): Planet density in kg/m^3
+        sma (float): Planet semimajor axis in au
+        star_mass (float): Star mass in solar masses
+
+    Returns:
+        dict: Moon orbital distance in planet radii to mass in planet masses
+    """
+    _, table = gen_moons_batch(*([value] for value in (type, mass, radius, density, sma, star_mass)))
+    return dict(zip(table["sma"].tolist(), table["mass"].tolist()))
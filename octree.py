@@ -0,0 +1,198 @@
+import heapq
+from typing import List, Tuple
+import numpy as np
+
+
+# bits per axis in the morton codes, 3 * 21 = 63 fits in an int64
+MORTON_BITS = 21
+
+
+def _spread_bits(v: np.ndarray) -> np.ndarray:
+    # put two zero bits between each of the low 21 bits of v
+    v = v.astype(np.uint64) & np.uint64(0x1FFFFF)
+    v = (v | (v << np.uint64(32))) & np.uint64(0x1F00000000FFFF)
+    v = (v | (v << np.uint64(16))) & np.uint64(0x1F0000FF0000FF)
+    v = (v | (v << np.uint64(8))) & np.uint64(0x100F00F00F00F00F)
+    v = (v | (v << np.uint64(4))) & np.uint64(0x10C30C30C30C30C3)
+    v = (v | (v << np.uint64(2))) & np.uint64(0x1249249249249249)
+    return v
+
+
+def _compact_bits(v: np.ndarray) -> np.ndarray:
+    # inverse of _spread_bits
+    v = v.astype(np.uint64) & np.uint64(0x1249249249249249)
+    v = (v | (v >> np.uint64(2))) & np.uint64(0x10C30C30C30C30C3)
+    v = (v | (v >> np.uint64(4))) & np.uint64(0x100F00F00F00F00F)
+    v = (v | (v >> np.uint64(8))) & np.uint64(0x1F0000FF0000FF)
+    v = (v | (v >> np.uint64(16))) & np.uint64(0x1F00000000FFFF)
+    v = (v | (v >> np.uint64(32))) & np.uint64(0x1FFFFF)
+    return v
+
+
+class Octree:
+    """Octree over system positions for level of detail views
+
+    Points are sorted along a morton (z-order) curve, so every node is one contiguous run
+    of the sorted points and its children are consecutive runs inside it. The tree is
+    built level by level with array operations. A node that is drawn collapsed shows an
+    evenly strided sample of its run, which takes points from each child in proportion
+    to its count.
+    """
+
+    def __init__(self, points: np.ndarray, leaf_size: int = 64, max_depth: int = MORTON_BITS):
+        """Build the tree
+
+        Args:
+            points (np.ndarray): (n, 3) positions in pc
+            leaf_size (int, optional): Nodes with more points than this are split. Defaults to 64.
+            max_depth (int, optional): Deepest level, at most MORTON_BITS. Defaults to MORTON_BITS.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        n = len(points)
+        self.origin = points.min(axis=0) if n else np.zeros(3)
+        self.extent = float(max(np.max(points.max(axis=0) - self.origin), 1.0)) if n else 1.0
+        max_depth = min(max_depth, MORTON_BITS)
+        scale = 2**MORTON_BITS
+        cell = np.clip(np.floor((points - self.origin) / self.extent * scale), 0, scale - 1).astype(np.uint64)
+        codes = _spread_bits(cell[:, 0]) | (_spread_bits(cell[:, 1]) << np.uint64(1))
+        codes |= _spread_bits(cell[:, 2]) << np.uint64(2)
+        self.order = np.argsort(codes, kind="stable")
+        self.points = points[self.order]
+        codes = codes[self.order]
+
+        # per level: run starts, stops and the parent node of each run
+        starts = [np.array([0], dtype=np.int64)]
+        stops = [np.array([n], dtype=np.int64)]
+        prefixes = [np.zeros(1, dtype=np.uint64)]
+        parents = [np.array([-1], dtype=np.int64)]
+        depths = [np.zeros(1, dtype=np.int64)]
+        first_id = 0
+        for depth in range(1, max_depth + 1):
+            split = (stops[-1] - starts[-1]) > leaf_size
+            if not np.any(split):
+                break
+            pre = codes >> np.uint64(3 * (MORTON_BITS - depth))
+            run_start = np.concatenate([[0], np.flatnonzero(pre[1:] != pre[:-1]) + 1]).astype(np.int64)
+            run_stop = np.append(run_start[1:], n)
+            parent = np.searchsorted(starts[-1], run_start, side="right") - 1
+            # runs under a leaf fall between the kept nodes of the last level
+            keep = (parent >= 0) & split[parent] & (run_start < stops[-1][parent])
+            starts.append(run_start[keep])
+            stops.append(run_stop[keep])
+            prefixes.append(pre[run_start[keep]])
+            parents.append(parent[keep] + first_id)
+            depths.append(np.full(np.count_nonzero(keep), depth))
+            first_id += len(starts[-2])
+
+        self.start = np.concatenate(starts)
+        self.stop = np.concatenate(stops)
+        self.depth = np.concatenate(depths)
+        self.parent = np.concatenate(parents)
+        prefix = np.concatenate(prefixes)
+        # children of a node are consecutive ids
+        counts = np.bincount(self.parent[1:], minlength=len(self.start))
+        self.n_children = counts
+        self.first_child = np.full(len(self.start), -1, dtype=np.int64)
+        has = counts > 0
+        self.first_child[has] = np.searchsorted(self.parent[1:], np.flatnonzero(has)) + 1
+        cells = np.column_stack([_compact_bits(prefix >> np.uint64(axis)) for axis in range(3)])
+        self.node_size = self.extent / 2.0**self.depth
+        self.node_lo = self.origin + cells * self.node_size[:, None]
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    @property
+    def n_nodes(self) -> int:
+        return len(self.start)
+
+    def count(self, node: int) -> int:
+        return int(self.stop[node] - self.start[node])
+
+    def children(self, node: int) -> range:
+        first = int(self.first_child[node])
+        return range(first, first + int(self.n_children[node])) if first >= 0 else range(0)
+
+    def _sample_slots(self, node: int, k: int) -> np.ndarray:
+        count = self.count(node)
+        if count <= k:
+            return np.arange(self.start[node], self.stop[node])
+        return self.start[node] + (np.arange(k) * count) // k
+
+    def sample(self, node: int, k: int) -> np.ndarray:
+        """Evenly strided sample of up to k system indices from a node"""
+        return self.order[self._sample_slots(node, k)]
+
+    def count_of(self, nodes: np.ndarray) -> np.ndarray:
+        return self.stop[nodes] - self.start[nodes]
+
+    def _visible(self, first: int, stop: int, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        # which of the nodes first:stop overlap the box [lo, hi]
+        node_lo = self.node_lo[first:stop]
+        node_hi = node_lo + self.node_size[first:stop, None]
+        return np.flatnonzero(np.all((node_lo <= hi) & (node_hi >= lo), axis=1)) + first
+
+    def select(
+        self, budget: int, lo: np.ndarray = None, hi: np.ndarray = None, per_node: int = 8
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """Pick at most budget representative systems inside a view box
+
+        Starting from the root, the most populous visible node is opened into its children
+        for as long as the points on screen stay within budget. Collapsed nodes show
+        per_node sampled points, opened leaves show all of theirs.
+
+        Args:
+            budget (int): Maximum number of points returned
+            lo (np.ndarray, optional): Lower (x, y, z) corner of the view. Defaults to everything.
+            hi (np.ndarray, optional): Upper (x, y, z) corner of the view. Defaults to everything.
+            per_node (int, optional): Points shown for a collapsed node. Defaults to 8.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: System indices and the number of systems each one stands for
+        """
+        lo = np.full(3, -np.inf) if lo is None else np.asarray(lo, dtype=float)
+        hi = np.full(3, np.inf) if hi is None else np.asarray(hi, dtype=float)
+        if len(self) == 0 or not len(self._visible(0, 1, lo, hi)):
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        def shown(node: int, opened: bool) -> int:
+            return self.count(node) if opened else min(self.count(node), per_node)
+
+        frontier = [(-self.count(0), 0)]
+        closed: List[Tuple[int, bool]] = []
+        total = shown(0, False)
+        while frontier:
+            _, node = heapq.heappop(frontier)
+            children = self.children(node)
+            kids = self._visible(children.start, children.stop, lo, hi)
+            if len(children) and not len(kids):
+                # none of the points of the node are in view
+                total -= shown(node, False)
+                continue
+            if len(kids):
+                new_total = total - shown(node, False) + int(np.minimum(self.count_of(kids), per_node).sum())
+            else:
+                new_total = total - shown(node, False) + shown(node, True)
+            if new_total > budget:
+                closed.append((node, False))
+                continue
+            total = new_total
+            if len(kids):
+                for kid, count in zip(kids.tolist(), self.count_of(kids).tolist()):
+                    heapq.heappush(frontier, (-count, kid))
+            else:
+                closed.append((node, True))
+
+        slots = []
+        weights = []
+        for node, opened in closed:
+            node_slots = self._sample_slots(node, self.count(node) if opened else per_node)
+            slots.append(node_slots)
+            weights.append(np.full(len(node_slots), self.count(node) / len(node_slots)))
+        if not slots:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+        slots = np.concatenate(slots)
+        weight = np.concatenate(weights)
+        # nodes straddling the view edge can contribute points outside it
+        inside = np.all((self.points[slots] >= lo) & (self.points[slots] <= hi), axis=1)
+        return self.order[slots[inside]], weight[inside]
@@ -0,0 +1,264 @@
+import json
+import os
+import shutil
+from typing import Dict, Iterator, List, Optional
+import numpy as np
+
+import catalog
+import generate_galaxy as gen
+import moons
+
+
+# Edits live in an append-only journal of json lines next to the catalog columns:
+#     {"journal": "galaxybuilder-overlay", "base_systems": n}     header
+#     {"op": "add", "id": i, "stars": {...}, "planets": {...}, "moons": {...}, "names": {...}}
+#     {"op": "replace", "id": i, ...same as add}
+#     {"op": "delete", "id": i}
+# Added systems get ids after the base catalog's, and ids never change until compact()
+# rewrites the catalog. Custom names that survive compaction are kept in names.json.
+JOURNAL = "overlay.journal"
+JOURNAL_FORMAT = "galaxybuilder-overlay"
+NAMES = "names.json"
+
+
+def _system_record(system: "gen.StarSystem") -> dict:
+    table = gen.GalaxyCatalog.from_systems([system])
+    return {
+        "stars": {key: col[0].item() for key, col in table.stars.items()},
+        "planets": {key: col.tolist() for key, col in table.planets.items() if key != "system"},
+        "moons": {key: col.tolist() for key, col in table.moons.items()},
+        "names": {"star": system.star.name, "planets": [planet.name for planet in system.planets]},
+    }
+
+
+def _record_catalog(record: dict) -> "gen.GalaxyCatalog":
+    stars = {key: np.array([value]) for key, value in record["stars"].items()}
+    stars["harv_class"] = stars["harv_class"].astype("U3")
+    n = len(record["names"]["planets"])
+    planets = {"system": np.zeros(n, dtype=np.int64)}
+    for key, values in record["planets"].items():
+        planets[key] = np.array(values, dtype={"type": "U1", "n_moons": np.int64}.get(key, float))
+    planets["comp"] = planets["comp"].reshape(n, -1)
+    empty = moons.empty_table()
+    moon_table = {key: np.array(record["moons"][key], dtype=empty[key].dtype) for key in empty}
+    return gen.GalaxyCatalog(stars, planets, np.array([0, n], dtype=np.int64), moon_table)
+
+
+def _named(system: "gen.StarSystem", names: dict) -> "gen.StarSystem":
+    old = system.star
+    star = gen.Star(names["star"], *(getattr(old, key) for key in gen.Star._fields[1:]))
+    planets = [
+        gen.Planet(name, star.name, *(getattr(planet, key) for key in gen.Planet._fields[2:]))
+        for name, planet in zip(names["planets"], system.planets)
+    ]
+    return gen.StarSystem(system.gal_x, system.gal_y, system.gal_z, star, planets)
+
+
+class OverlayCatalog:
+    """A catalog with journaled edits on top
+
+    Adding, replacing or deleting a system appends one line to the journal, whatever the
+    size of the catalog underneath. Reads merge the journal in: an edited system is built
+    from its journal record, every other system from the memory mapped base catalog.
+    compact() folds the edits into the columns as a separate, whole catalog step.
+    """
+
+    def __init__(self, path: str):
+        """Open a catalog and replay its journal
+
+        Args:
+            path (str): Catalog directory written by stream_galaxy or save_galaxy
+        """
+        self.path = path
+        self.base = gen.open_galaxy(path)
+        self.n_base = len(self.base)
+        self.n_ids = self.n_base
+        self._edits: Dict[int, Optional[dict]] = {}  # id -> latest record, None once deleted
+        self._built: Dict[int, gen.GalaxyCatalog] = {}
+        self.names: Dict[int, dict] = {}
+        if os.path.exists(os.path.join(path, NAMES)):
+            with open(os.path.join(path, NAMES)) as f:
+                self.names = {int(key): value for key, value in json.load(f).items()}
+        self._replay()
+
+    @property
+    def journal_path(self) -> str:
+        return os.path.join(self.path, JOURNAL)
+
+    def _replay(self) -> None:
+        if not os.path.exists(self.journal_path):
+            return
+        good = 0
+        with open(self.journal_path, "rb") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # torn write at the end, dropped below
+                    break
+                if not line.endswith(b"\n"):
+                    break
+                good += len(line)
+                if "journal" in entry:
+                    if entry["base_systems"] != self.n_base:
+                        raise ValueError(
+                            f"{self.journal_path} was written over {entry['base_systems']} systems, "
+                            f"the catalog has {self.n_base}"
+                        )
+                    continue
+                self._apply(entry)
+        if good < os.path.getsize(self.journal_path):
+            with open(self.journal_path, "r+b") as f:
+                f.truncate(good)
+
+    def _apply(self, entry: dict) -> None:
+        index = entry["id"]
+        self._built.pop(index, None)
+        if entry["op"] == "delete":
+            self._edits[index] = None
+        else:
+            self._edits[index] = entry
+            self.n_ids = max(self.n_ids, index + 1)
+
+    def _append(self, entry: dict) -> None:
+        lines = []
+        if not os.path.exists(self.journal_path):
+            lines.append(json.dumps({"journal": JOURNAL_FORMAT, "base_systems": self.n_base}))
+        lines.append(json.dumps(entry))
+        with open(self.journal_path, "a") as f:
+            f.write("".join(line + "\n" for line in lines))
+            f.flush()
+            os.fsync(f.fileno())
+        self._apply(entry)
+
+    def _check(self, index: int) -> int:
+        if not 0 <= index < self.n_ids or self._edits.get(index, True) is None:
+            raise KeyError(f"No system {index}")
+        return int(index)
+
+    def add(self, system: "gen.StarSystem") -> int:
+        """Add a system, returning its id"""
+        index = self.n_ids
+        self._append({"op": "add", "id": index, **_system_record(system)})
+        return index
+
+    def replace(self, index: int, system: "gen.StarSystem") -> None:
+        """Replace a system, keeping its id"""
+        self._append({"op": "replace", "id": self._check(index), **_system_record(system)})
+
+    def delete(self, index: int) -> None:
+        """Delete a system, its id is not reused"""
+        self._append({"op": "delete", "id": self._check(index)})
+
+    def __len__(self) -> int:
+        return self.n_ids - sum(record is None for record in self._edits.values())
+
+    def __contains__(self, index: int) -> bool:
+        return 0 <= index < self.n_ids and self._edits.get(index, True) is not None
+
+    def ids(self) -> np.ndarray:
+        """Ids of every system, in order"""
+        deleted = [index for index, record in self._edits.items() if record is None]
+        return np.setdiff1d(np.arange(self.n_ids), deleted)
+
+    def __getitem__(self, index: int) -> "gen.StarSystem":
+        return self.system(index)
+
+    def __iter__(self) -> Iterator["gen.StarSystem"]:
+        for index in self.ids().tolist():
+            yield self.system(index)
+
+    def system(self, index: int) -> "gen.StarSystem":
+        """Build one system, from the journal if it was edited, else from the base catalog"""
+        index = self._check(index)
+        record = self._edits.get(index)
+        if record is None:
+            system = self.base.system(index)
+            return _named(system, self.names[index]) if index in self.names else system
+        if index not in self._built:
+            self._built[index] = _record_catalog(record)
+        return _named(self._built[index].system(0), record["names"])
+
+    def _blocks(self, block: int) -> Iterator["gen.GalaxyCatalog"]:
+        # merged tables of every live system in id order, a block of ids at a time
+        ids = self.ids()
+        for start in range(0, len(ids), block):
+            parts = []
+            run = []
+            for index in ids[start : start + block].tolist():
+                if self._edits.get(index) is None:
+                    run.append(index)
+                    continue
+                if run:
+                    parts.append(self.base.take(run))
+                    run = []
+                parts.append(_record_catalog(self._edits[index]))
+            if run:
+                parts.append(self.base.take(run))
+            yield gen.concatenate_catalogs(parts)
+
+    def to_catalog(self) -> "gen.GalaxyCatalog":
+        """Merged in-memory catalog of every live system, renumbered in id order"""
+        if not len(self):
+            return self.base.take([])
+        return gen.concatenate_catalogs(list(self._blocks(len(self))))
+
+    def edited_ids(self) -> List[int]:
+        """Ids of the systems added or replaced since the last compaction"""
+        return sorted(index for index, record in self._edits.items() if record is not None)
+
+    def compact(self, block: int = 50_000) -> np.ndarray:
+        """Rewrite the catalog with the edits folded in and start an empty journal
+
+        The new catalog is written block by block next to the old one and its files are swapped
+        in when complete, leaving any other files in the directory alone. Systems are renumbered
+        in id order without the deleted ones, so systems keeping their generated names take the
+        names of their new index. Custom names go to names.json, and derived indexes are dropped
+        with the old columns.
+
+        Args:
+            block (int, optional): Systems per written block. Defaults to 50_000.
+
+        Returns:
+            np.ndarray: New index of every old id, -1 for deleted systems
+        """
+        ids = self.ids()
+        remap = np.full(self.n_ids, -1, dtype=np.int64)
+        remap[ids] = np.arange(len(ids))
+        names = {int(remap[index]): value for index, value in self.names.items() if remap[index] >= 0}
+        for index, record in self._edits.items():
+            if record is not None:
+                names[int(remap[index])] = record["names"]
+
+        tmp = self.path.rstrip(os.sep) + ".compacting"
+        params = dict(catalog.read_manifest(self.path)["params"], n_systems=len(ids), edited=True)
+        # a scratch directory of our own, left over if an earlier compaction was interrupted
+        writer = catalog.CatalogWriter(tmp, params, resume=False, overwrite=True)
+        for part in self._blocks(block) if len(ids) else [self.base.take(ids)]:
+            # an empty catalog takes no moon rows, but still gets the moon columns
+            writer.append(part.stars, part.planets, part.offsets, part.moons or moons.empty_table())
+        with open(os.path.join(tmp, NAMES), "w") as f:
+            json.dump({str(key): value for key, value in sorted(names.items())}, f)
+
+        # swap only the catalog's own files, other files in the directory stay where they are.
+        # The old manifest goes first and the new one comes last, so until the swap is done
+        # the directory is not mistaken for a complete catalog.
+        self.base = None
+        stale = catalog.catalog_files(self.path)
+        os.remove(os.path.join(self.path, catalog.MANIFEST))
+        for name in stale:
+            if name != catalog.MANIFEST:
+                os.remove(os.path.join(self.path, name))
+        for name in catalog.catalog_files(tmp):
+            if name != catalog.MANIFEST:
+                os.replace(os.path.join(tmp, name), os.path.join(self.path, name))
+        os.replace(os.path.join(tmp, catalog.MANIFEST), os.path.join(self.path, catalog.MANIFEST))
+        shutil.rmtree(tmp)
+        self.__init__(self.path)
+        return remap
+
+
+def open_overlay(path: str) -> OverlayCatalog:
+    """Open an on-disk catalog for editing, with any journaled edits applied"""
+    return OverlayCatalog(path)
+
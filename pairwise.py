@@ -0,0 +1,171 @@
+from collections import deque
+from typing import Iterator, Tuple
+import numpy as np
+
+# every worker opens the shared inputs and the output matrix once, set by _init_worker
+_worker_state = {}
+
+
+def _positions(galaxy, systems: np.ndarray) -> np.ndarray:
+    stars = galaxy.stars
+    if systems is None:
+        return np.column_stack([stars["gal_x"], stars["gal_y"], stars["gal_z"]]).astype(float)
+    systems = np.asarray(systems, dtype=np.int64)
+    return np.column_stack([np.asarray(stars[c])[systems] for c in ("gal_x", "gal_y", "gal_z")]).astype(float)
+
+
+def _inputs(galaxy, rows: np.ndarray, cols: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    a = _positions(galaxy, rows)
+    b = a if cols is None else _positions(galaxy, cols)
+    # distances do not care where the origin is, and small coordinates round less
+    center = 0.5 * (a.mean(axis=0) + b.mean(axis=0)) if len(a) and len(b) else np.zeros(3)
+    a -= center
+    if b is not a:
+        b -= center
+    return a, b
+
+
+def _tile(a: np.ndarray, b: np.ndarray, speed: float, jump_time: float, jump_range: float) -> np.ndarray:
+    # distances (or travel times) between every point of a and every point of b.
+    # |a - b|^2 = |a|^2 + |b|^2 - 2 a.b runs as one matrix product, about three times faster than
+    # differencing each axis; the rounding it adds stays near 1e-5 pc, below float32 storage.
+    out = a @ (-2.0 * b.T)
+    out += np.einsum("ij,ij->i", a, a)[:, None]
+    out += np.einsum("ij,ij->i", b, b)
+    np.maximum(out, 0.0, out=out)
+    np.sqrt(out, out=out)
+    if speed is None:
+        return out
+    jumps = np.ceil(out / jump_range) if jump_time else None
+    out /= speed
+    if jumps is not None:
+        out += jumps * jump_time
+    return out
+
+
+def _block(a: np.ndarray, b: np.ndarray, params: tuple, bounds: Tuple[int, int, int, int]) -> np.ndarray:
+    r0, r1, c0, c1 = bounds
+    out = _tile(a[r0:r1], b[c0:c1], *params)
+    if a is b and r0 == c0:
+        # a system is exactly 0 from itself, whatever the rounding above left there
+        np.fill_diagonal(out, 0.0)
+    return out
+
+
+def _tiles(n_rows: int, n_cols: int, tile: int) -> Iterator[Tuple[int, int, int, int]]:
+    for r0 in range(0, n_rows, tile):
+        for c0 in range(0, n_cols, tile):
+            yield r0, min(r0 + tile, n_rows), c0, min(c0 + tile, n_cols)
+
+
+def _init_worker(path: str, a: np.ndarray, b: np.ndarray, params: tuple) -> None:
+    _worker_state["out"] = np.lib.format.open_memmap(path, mode="r+")
+    _worker_state["a"], _worker_state["b"], _worker_state["params"] = a, b, params
+
+
+def _fill_tile(bounds: Tuple[int, int, int, int]) -> None:
+    r0, r1, c0, c1 = bounds
+    state = _worker_state
+    state["out"][r0:r1, c0:c1] = _block(state["a"], state["b"], state["params"], bounds)
+
+
+def _matrix(a: np.ndarray, b: np.ndarray, params: tuple, path: str, tile: int, workers: int, dtype: str) -> np.ndarray:
+    shape = (len(a), len(b))
+    if path is None:
+        if workers > 1:
+            raise ValueError("workers share the output through a file, give a path to use more than one")
+        out = np.empty(shape, dtype=dtype)
+    else:
+        # an .npy file, so np.load(path, mmap_mode="r") opens it again with its shape and dtype
+        out = np.lib.format.open_memmap(path, mode="w+", dtype=dtype, shape=shape)
+    tiles = _tiles(shape[0], shape[1], tile)
+    if workers <= 1:
+        for r0, r1, c0, c1 in tiles:
+            out[r0:r1, c0:c1] = _block(a, b, params, (r0, r1, c0, c1))
+    else:
+        out.flush()
+        # only runs that use workers pay for importing the process pool machinery
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(path, a, b, params)) as pool:
+            pending = deque()
+            for bounds in tiles:
+                pending.append(pool.submit(_fill_tile, bounds))
+                # a few tiles per worker in flight, so a huge matrix does not queue millions of tasks
+                if len(pending) >= 4 * workers:
+                    pending.popleft().result()
+            while pending:
+                pending.popleft().result()
+    if path is not None:
+        out.flush()
+    return out
+
+
+def distance_matrix(
+    galaxy,
+    rows: np.ndarray = None,
+    cols: np.ndarray = None,
+    path: str = None,
+    tile: int = 2048,
+    workers: int = 1,
+    dtype: str = "<f4",
+) -> np.ndarray:
+    """Straight line distances between two sets of systems
+
+    The matrix is filled one tile at a time, so working memory stays at a few tiles
+    whatever its size. With a path it is written to a memory-mapped .npy file and a
+    50k x 50k float32 matrix needs 10 GB of disk but only tiles of RAM.
+
+    Args:
+        galaxy (GalaxyCatalog): In-memory or memory-mapped catalog
+        rows (np.ndarray, optional): System indices of the rows. Defaults to every system.
+        cols (np.ndarray, optional): System indices of the columns. Defaults to rows.
+        path (str, optional): .npy file to write the matrix to. Defaults to an in-memory array.
+        tile (int, optional): Edge of the square tiles computed at once. Defaults to 2048.
+        workers (int, optional): Worker processes, more than one needs a path. Defaults to 1.
+        dtype (str, optional): Stored precision. Defaults to "<f4".
+
+    Returns:
+        np.ndarray: (len(rows), len(cols)) distances in pc, a memmap when a path is given
+    """
+    a, b = _inputs(galaxy, rows, cols)
+    return _matrix(a, b, (None, 0.0, None), path, tile, workers, dtype)
+
+
+def travel_time_matrix(
+    galaxy,
+    speed: float,
+    rows: np.ndarray = None,
+    cols: np.ndarray = None,
+    jump_time: float = 0.0,
+    jump_range: float = None,
+    path: str = None,
+    tile: int = 2048,
+    workers: int = 1,
+    dtype: str = "<f4",
+) -> np.ndarray:
+    """Straight line travel times between two sets of systems
+
+    Every pair is flown directly, in as few jumps of at most jump_range as cover the
+    distance, like Route.travel_time does along a route. That is a lower bound on the
+    time of the routed trip, see routing.Router for routes through actual systems.
+
+    Args:
+        galaxy (GalaxyCatalog): In-memory or memory-mapped catalog
+        speed (float): Distance covered per unit time, in pc
+        rows (np.ndarray, optional): System indices of the rows. Defaults to every system.
+        cols (np.ndarray, optional): System indices of the columns. Defaults to rows.
+        jump_time (float, optional): Fixed cost of every jump in the same time unit. Defaults to 0.0.
+        jump_range (float, optional): Longest jump in pc, needed for jump_time. Defaults to None.
+        path (str, optional): .npy file to write the matrix to. Defaults to an in-memory array.
+        tile (int, optional): Edge of the square tiles computed at once. Defaults to 2048.
+        workers (int, optional): Worker processes, more than one needs a path. Defaults to 1.
+        dtype (str, optional): Stored precision. Defaults to "<f4".
+
+    Returns:
+        np.ndarray: (len(rows), len(cols)) travel times, a memmap when a path is given
+    """
+    if jump_time and not jump_range:
+        raise ValueError("jump_time needs a jump_range to count the jumps")
+    a, b = _inputs(galaxy, rows, cols)
+    return _matrix(a, b, (float(speed), float(jump_time), jump_range), path, tile, workers, dtype)
@@ -2,6 +2,7 @@ from typing import Tuple
 import numpy as np
 
 import constants as const
+import instrument
 
 
 # Source for some formulae: https://github.com/lortordermur/sfcalcsheet/wiki/Formulas
@@ -164,31 +165,27 @@ def atmos_temp(teff: float, eta: float) -> float:
     Returns:
         float: Rough temperature of the atmosphere in K
     """
-    return teff * (1 / (1 - (eta / 2.0)) ** 0.25)
+    # as an array so a runaway eta > 2 gives nan rather than a complex python float
+    eta = np.asarray(eta, dtype=float)
+    return (teff * (1 / (1 - (eta / 2.0)) ** 0.25))[()]
 
 
 def find_molecular_mass(comp: dict) -> float:
     """Find mean molecular mass
 
     Args:
-        comp (dict): Dict of primary atmosphere composition
+        comp (dict): Dict of primary atmosphere composition, or an array of species fractions
+            (last axis in const.atmos_species order). Dict keys must be in const.atmos_species.
 
     Returns:
         float: Mean molecular mass in kg
     """
-    masses = {
-        "N2": 4.6518e-26,
-        "CO2": 7.3079e-26,
-        "O2": 5.3134e-26,
-        "CH4": 2.664e-26,
-        "H2": 3.348e-27,
-        "He": 6.646477e-27,
-        "Other": 3e-26,
-    }
-    average_mass = 0.0
-    for key in comp:
-        average_mass += comp[key] * masses[key]
-    return average_mass
+    if isinstance(comp, dict):
+        unknown = set(comp) - set(const.atmos_species)
+        if unknown:
+            raise ValueError(f"Unknown atmosphere species: {', '.join(sorted(unknown))}")
+        comp = [comp.get(species, 0.0) for species in const.atmos_species]
+    return (np.asarray(comp, dtype=float) @ np.asarray(const.species_mass))[()]
 
 
 def scale_height(temp: float, g: float, bigM: float) -> float:
@@ -205,7 +202,10 @@ def scale_height(temp: float, g: float, bigM: float) -> float:
     return (const.k_b * temp / (bigM * g * const.g)) / 1000.0
 
 
-def gen_tilt_spin(sma: float, radius: float, smass: float, pmass: float, age: float) -> Tuple[float, float]:
+@instrument.timed("tilt_spin")
+def gen_tilt_spin(
+    sma: float, radius: float, smass: float, pmass: float, age: float, rng: np.random.Generator = None
+) -> Tuple[float, float]:
     """Generate axial tilt and spin rate
 
     Args:
@@ -214,19 +214,28 @@ def gen_tilt_spin(sma: float, radius: float, smass: float, pmass: float, age: fl
         smass (float): star mass in kg
         pmass (float): planet mass in kg
         age (float): planet age in years
+        rng (np.random.Generator, optional): Random generator. Defaults to the global np.random state.
 
     Returns:
-        Tuple[float, float]: A Tuple with axial tilt in degrees and spin rate in days/revolution
+        Tuple[float, float]: A Tuple with axial tilt in degrees and spin rate in days/revolution,
+            arrays if any argument is an array
     """
+    if rng is None:
+        rng = np.random
+    sma, radius, smass, pmass, age = np.broadcast_arrays(
+        *(np.asarray(arg, dtype=float) for arg in (sma, radius, smass, pmass, age))
+    )
+    shape = sma.shape
     tlock = 6.0 * 1e10 * ((sma**6.0) * radius * 3.0e10) / (smass * (pmass**2.0))
-    if tlock <= age:
-        return np.random.uniform(0, 5), orbital_period(sma, smass)
-    else:
-        tilt = np.random.triangular(0, 15, 55)
-        if tilt > 40:
-            tilt += np.random.uniform(25, 125)
-        if pmass < 8.0 * const.earth_mass:
-            spin = np.random.triangular(0.08, 0.7, 3.0)
-        else:
-            spin = np.random.triangular(0.08, 0.2, 1.0)
-        return (tilt, spin)
+    locked = tlock <= age
+
+    # tidally locked bodies: small tilt, spin matches the orbit
+    locked_tilt = rng.uniform(0, 5, shape)
+    tilt = rng.triangular(0, 15, 55, shape)
+    tilt = np.where(tilt > 40, tilt + rng.uniform(25, 125, shape), tilt)
+    tilt = np.where(locked, locked_tilt, tilt)
+    spin = np.where(
+        pmass < 8.0 * const.earth_mass, rng.triangular(0.08, 0.7, 3.0, shape), rng.triangular(0.08, 0.2, 1.0, shape)
+    )
+    spin = np.where(locked, orbital_period(sma, smass), spin)
+    return tilt[()], spin[()]
@@ -0,0 +1,155 @@
+import matplotlib.pyplot as plt
+import numpy as np
+import plotly.graph_objects as go
+
+import constants as const
+import ephemeris
+import positioner as posi
+from records import StarSystem
+
+
+# Quick-look plots of the generator's distributions. Nothing in the generation core imports
+# this module, so matplotlib and plotly are only loaded when a plot is asked for.
+
+
+def test_func() -> None:
+    # testing for sma distribution
+    # not bad
+    # a = np.random.f(2.5, 25, 100000) * 10
+
+    # weird but not horrible
+    # a = np.abs(np.random.vonmises(1, 1, 100000) * 20)
+    a = np.random.choice(15, size=100000, p=const.n_p_prob) + 1
+    plt.hist(a, bins=200, density=True)
+    plt.show()
+    # for n in range(0, 10):
+    #     b, c = putil.gen_tilt_spin(const.au * 1000, const.earth_radius, const.sun_mass, const.earth_mass, 5e9)
+    #     print(b, c)
+    # a = atms.gen_gas_atmos(1, 5.2, 2.36)
+    # a.getitems()
+    return
+
+
+def visualize_solar_system(ssystem: StarSystem):
+    nplanets = len(ssystem.planets)
+    x = []
+    y = np.arange(nplanets)
+    colors = []
+    for planet in ssystem.planets:
+        planet.getitems()
+        x.append(planet.sma)
+        if planet.type == "T":
+            colors.append("green")
+        elif planet.type == "S":
+            colors.append("grey")
+        elif planet.type == "N":
+            colors.append("blue")
+        else:
+            colors.append("orange")
+
+    plt.scatter(x, y, c=colors)
+    plt.vlines(ssystem.star.hab_zone, 0, nplanets, colors=["green"])
+    plt.show()
+
+
+def animate_solar_system(ssystem: StarSystem, days: float = 3650.0, n_frames: int = 500, seed: int = 0):
+    # planets moving along their orbits, frames streamed from the ephemeris as they are drawn
+    from matplotlib.animation import FuncAnimation
+
+    from generate_galaxy import GalaxyCatalog
+
+    orbits = ephemeris.Ephemeris(GalaxyCatalog.from_systems([ssystem]), seed=seed)
+    colors = [{"T": "green", "S": "grey", "N": "blue"}.get(planet.type, "orange") for planet in ssystem.planets]
+    fig, ax = plt.subplots()
+    reach = 1.1 * max(orbits.sma.max(initial=0.0), ssystem.star.hab_zone[1])
+    ax.set_xlim(-reach, reach)
+    ax.set_ylim(-reach, reach)
+    ax.set_aspect("equal")
+    ax.scatter([0], [0], c="yellow")
+    dots = ax.scatter(np.zeros(len(orbits)), np.zeros(len(orbits)), c=colors)
+
+    def draw(frame):
+        time, positions = frame
+        dots.set_offsets(positions)
+        ax.set_title(f"day {time:.0f}")
+        return (dots,)
+
+    frames = orbits.frames(0.0, days / n_frames, n_frames)
+    animation = FuncAnimation(fig, draw, frames=frames, save_count=n_frames, interval=30, blit=False)
+    plt.show()
+    return animation
+
+
+def old_working():
+    xbins = np.arange(11)
+    ybins = np.arange(11)
+    zbins = np.arange(11)
+    prob = [1, 2, 8, 12, 16, 30, 16, 12, 8, 2, 1]
+    sump = np.sum(prob)
+    probx = [elem / sump for elem in prob]
+    proby = probx
+    pz = [0, 1, 1, 2, 10, 100, 10, 2, 1, 1, 0]
+    sumz = np.sum(pz)
+    probz = [num / sumz for num in pz]
+    pos = np.array([xbins, ybins, zbins])
+    probs = np.array([probx, proby, probz])
+    xbin = np.random.choice(xbins, size=1000, p=probx)
+    ybin = np.random.choice(ybins, size=1000, p=proby)
+    zbin = np.random.choice(zbins, size=1000, p=probz)
+    x = posi.randomize_pos_in_bin(xbin)
+    y = posi.randomize_pos_in_bin(ybin)
+    z = posi.randomize_pos_in_bin(zbin)
+    fig = go.Figure(data=[go.Scatter3d(x=x, y=y, z=z, mode="markers", marker_size=2)])
+    fig.show()
+
+
+def generate_disc():
+    bins = np.arange(-50, 51)
+    xysig = 2.5
+    zsig = 0.5
+    probxy = posi.find_prob_array(xysig, bins)
+    probz = posi.find_prob_array(zsig, bins)
+    nstars = 10000
+    xbin = np.random.choice(bins, size=nstars, p=probxy)
+    ybin = np.random.choice(bins, size=nstars, p=probxy)
+    zbin = np.random.choice(bins, size=nstars, p=probz)
+    x = posi.randomize_pos_in_bin(xbin)
+    y = posi.randomize_pos_in_bin(ybin)
+    z = posi.randomize_pos_in_bin(zbin)
+    fig = go.Figure(data=[go.Scatter3d(x=x, y=y, z=z, mode="markers", marker_size=1)])
+    fig.update_layout(
+        scene=dict(
+            xaxis=dict(
+                range=[-100, 100],
+            ),
+            yaxis=dict(
+                range=[-100, 100],
+            ),
+            zaxis=dict(
+                range=[-100, 100],
+            ),
+        )
+    )
+    fig.show()
+
+
+def vis_gal(x: np.ndarray, y: np.ndarray, z: np.ndarray, xymax: float):
+    fig = go.Figure(data=[go.Scatter3d(x=x, y=y, z=z, mode="markers", marker_size=1, marker_color="white")])
+    fig.update_layout(
+        scene=dict(
+            xaxis=dict(
+                backgroundcolor="black",
+                range=[-xymax, xymax],
+            ),
+            yaxis=dict(
+                backgroundcolor="black",
+                range=[-xymax, xymax],
+            ),
+            zaxis=dict(
+                backgroundcolor="black",
+                range=[-xymax, xymax],
+            ),
+            bgcolor="black",
+        )
+    )
+    fig.show()
@@ -1,116 +1,123 @@
+from functools import lru_cache
 from typing import Tuple
 import numpy as np
-import plotly.graph_objects as go
 
+import instrument
 
-def randomize_pos_in_bin(bins: np.ndarray) -> np.ndarray:
-    return [num + np.random.uniform(0, 1) for num in bins]
+
+def randomize_pos_in_bin(bins: np.ndarray, rng: np.random.Generator = None) -> np.ndarray:
+    if rng is None:
+        rng = np.random
+    bins = np.asarray(bins, dtype=float)
+    return bins + rng.uniform(0, 1, bins.shape)
 
 
 def find_prob_array(sig: float, arr: np.ndarray) -> np.ndarray:
-    coeff = 1.0 / (sig * 2.0 * np.pi)
     coeff = 1.0 / (sig * 2.0 * np.pi)
     den = 2 * sig**2
-    expo = [-0.5 * (elem / den) ** 2 for elem in arr]
+    expo = -0.5 * (np.asarray(arr, dtype=float) / den) ** 2
     raw_prob = coeff * np.exp(expo)
-    sump = np.sum(raw_prob)
-    prob = [num / sump for num in raw_prob]
-    return prob
-
-
-def old_working():
-    xbins = np.arange(11)
-    ybins = np.arange(11)
-    zbins = np.arange(11)
-    prob = [1, 2, 8, 12, 16, 30, 16, 12, 8, 2, 1]
-    sump = np.sum(prob)
-    probx = [elem / sump for elem in prob]
-    proby = probx
-    pz = [0, 1, 1, 2, 10, 100, 10, 2, 1, 1, 0]
-    sumz = np.sum(pz)
-    probz = [num / sumz for num in pz]
-    pos = np.array([xbins, ybins, zbins])
-    probs = np.array([probx, proby, probz])
-    xbin = np.random.choice(xbins, size=1000, p=probx)
-    ybin = np.random.choice(ybins, size=1000, p=proby)
-    zbin = np.random.choice(zbins, size=1000, p=probz)
-    x = randomize_pos_in_bin(xbin)
-    y = randomize_pos_in_bin(ybin)
-    z = randomize_pos_in_bin(zbin)
-    fig = go.Figure(data=[go.Scatter3d(x=x, y=y, z=z, mode="markers", marker_size=2)])
-    fig.show()
-
-
-def generate_disc():
-    bins = np.arange(-50, 51)
-    xysig = 2.5
-    zsig = 0.5
-    probxy = find_prob_array(xysig, bins)
-    probz = find_prob_array(zsig, bins)
-    nstars = 10000
-    xbin = np.random.choice(bins, size=nstars, p=probxy)
-    ybin = np.random.choice(bins, size=nstars, p=probxy)
-    zbin = np.random.choice(bins, size=nstars, p=probz)
-    x = randomize_pos_in_bin(xbin)
-    y = randomize_pos_in_bin(ybin)
-    z = randomize_pos_in_bin(zbin)
-    fig = go.Figure(data=[go.Scatter3d(x=x, y=y, z=z, mode="markers", marker_size=1)])
-    fig.update_layout(
-        scene=dict(
-            xaxis=dict(
-                range=[-100, 100],
-            ),
-            yaxis=dict(
-                range=[-100, 100],
-            ),
-            zaxis=dict(
-                range=[-100, 100],
-            ),
-        )
-    )
-    fig.show()
-
-
-def vis_gal(x: np.ndarray, y: np.ndarray, z: np.ndarray, xymax: float):
-    fig = go.Figure(data=[go.Scatter3d(x=x, y=y, z=z, mode="markers", marker_size=1, marker_color="white")])
-    fig.update_layout(
-        scene=dict(
-            xaxis=dict(
-                backgroundcolor="black",
-                range=[-xymax, xymax],
-            ),
-            yaxis=dict(
-                backgroundcolor="black",
-                range=[-xymax, xymax],
-            ),
-            zaxis=dict(
-                backgroundcolor="black",
-                range=[-xymax, xymax],
-            ),
-            bgcolor="black",
-        )
-    )
-    fig.show()
-
-
-def local_kpc(xymax: float = 500.0, nstars: int = 1) -> tuple[float, float, float]:
-    bins = np.arange(-xymax, xymax)
-    xysig = 50.0
-    zsig = 9
-    probxy = find_prob_array(xysig, bins)
-    probz = find_prob_array(zsig, bins)
-    xbin = np.random.choice(bins, size=nstars, p=probxy)
-    ybin = np.random.choice(bins, size=nstars, p=probxy)
-    zbin = np.random.choice(bins, size=nstars, p=probz)
-    x = randomize_pos_in_bin(xbin)
-    y = randomize_pos_in_bin(ybin)
-    z = randomize_pos_in_bin(zbin)
-    return x, y, z
+    return raw_prob / np.sum(raw_prob)
+
+
+class DiscSampler:
+    """Inverse-CDF sampler for positions in a gaussian disc binned at 1 pc
+
+    The cumulative bin tables are built once, so each call to sample only draws uniforms
+    and looks them up with searchsorted. Use get_disc_sampler to share one sampler per
+    disc shape.
+    """
+
+    def __init__(self, xymax: float = 500.0, xysig: float = 50.0, zsig: float = 9.0):
+        self.xymax = xymax
+        self.xysig = xysig
+        self.zsig = zsig
+        self.bins = np.arange(-xymax, xymax)
+        self.cdf_xy = np.cumsum(find_prob_array(xysig, self.bins))
+        self.cdf_z = np.cumsum(find_prob_array(zsig, self.bins))
+
+    def _draw_bins(self, cdf: np.ndarray, nstars: int, rng) -> np.ndarray:
+        idx = np.searchsorted(cdf, rng.uniform(0, cdf[-1], nstars), side="right")
+        return self.bins[np.minimum(idx, len(self.bins) - 1)]
+
+    def sample(self, nstars: int, rng: np.random.Generator = None) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Draw star positions
+
+        Args:
+            nstars (int): Number of positions
+            rng (np.random.Generator, optional): Random generator. Defaults to the global np.random state.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: x, y and z positions in pc
+        """
+        if rng is None:
+            rng = np.random
+        x = randomize_pos_in_bin(self._draw_bins(self.cdf_xy, nstars, rng), rng)
+        y = randomize_pos_in_bin(self._draw_bins(self.cdf_xy, nstars, rng), rng)
+        z = randomize_pos_in_bin(self._draw_bins(self.cdf_z, nstars, rng), rng)
+        return x, y, z
+
+    def _axis_tables(self):
+        # positions of the bin edges and the cumulative probability at each, per axis
+        edges = np.append(self.bins, self.bins[-1] + 1).astype(float)
+        return [(edges, np.append(0.0, cdf) / cdf[-1]) for cdf in (self.cdf_xy, self.cdf_xy, self.cdf_z)]
+
+    def box_fraction(self, lo: np.ndarray, hi: np.ndarray) -> float:
+        """Fraction of the disc's stars inside an axis aligned box
+
+        Args:
+            lo (np.ndarray): Lower (x, y, z) corner in pc
+            hi (np.ndarray): Upper (x, y, z) corner in pc
+
+        Returns:
+            float: Probability that a star drawn by sample lands in the box
+        """
+        frac = 1.0
+        for (edges, cdf), a, b in zip(self._axis_tables(), lo, hi):
+            frac *= np.interp(b, edges, cdf) - np.interp(a, edges, cdf)
+        return float(frac)
+
+    def sample_box(
+        self, nstars: int, lo: np.ndarray, hi: np.ndarray, rng: np.random.Generator = None
+    ) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Draw star positions from the disc density restricted to an axis aligned box
+
+        Args:
+            nstars (int): Number of positions
+            lo (np.ndarray): Lower (x, y, z) corner in pc
+            hi (np.ndarray): Upper (x, y, z) corner in pc
+            rng (np.random.Generator, optional): Random generator. Defaults to the global np.random state.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, np.ndarray]: x, y and z positions in pc
+        """
+        if rng is None:
+            rng = np.random
+        pos = []
+        for (edges, cdf), a, b in zip(self._axis_tables(), lo, hi):
+            u = rng.uniform(np.interp(a, edges, cdf), np.interp(b, edges, cdf), nstars)
+            pos.append(np.clip(np.interp(u, cdf, edges), a, b))
+        return pos[0], pos[1], pos[2]
+
+
+@lru_cache(maxsize=None)
+def get_disc_sampler(xymax: float = 500.0, xysig: float = 50.0, zsig: float = 9.0) -> DiscSampler:
+    """Get the shared DiscSampler for a disc shape, building its tables on first use"""
+    return DiscSampler(xymax, xysig, zsig)
+
+
+@instrument.timed("position")
+def local_kpc(
+    xymax: float = 500.0, nstars: int = 1, rng: np.random.Generator = None
+) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    return get_disc_sampler(float(xymax), 50.0, 9.0).sample(nstars, rng)
 
 
 def main():
+    import plots
+
     x, y, z = local_kpc(xymax=500, nstars=1000)
-    vis_gal(x, y, z, 500.0)
+    plots.vis_gal(x, y, z, 500.0)
 
 
 if __name__ == "__main__":
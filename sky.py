@@ -0,0 +1,179 @@
+from dataclasses import dataclass
+from typing import Tuple
+import numpy as np
+
+import octree
+import star_utils as sutil
+
+# naked eye limit
+default_limit = 6.5
+
+
+@dataclass(frozen=True)
+class SkyView:
+    observer: np.ndarray  # (3,) observer position in pc
+    index: np.ndarray  # system indices of the visible stars, brightest first
+    direction: np.ndarray  # (n, 3) unit vectors from the observer to each star
+    magnitude: np.ndarray  # apparent magnitudes, ascending
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    @property
+    def lon(self) -> np.ndarray:
+        """Longitude in degrees, 0 towards +x (spinward) and 90 towards +y (coreward)"""
+        return np.degrees(np.arctan2(self.direction[:, 1], self.direction[:, 0]))
+
+    @property
+    def lat(self) -> np.ndarray:
+        """Latitude in degrees, 90 towards +z (galactic north)"""
+        return np.degrees(np.arcsin(np.clip(self.direction[:, 2], -1.0, 1.0)))
+
+    def brightest(self, count: int) -> "SkyView":
+        """The count brightest stars of the view"""
+        return SkyView(self.observer, self.index[:count], self.direction[:count], self.magnitude[:count])
+
+    def image(self, width: int = 720, height: int = 360) -> np.ndarray:
+        """Equirectangular image of the sky
+
+        Each pixel holds the summed flux of the stars in it, relative to a magnitude 0 star.
+        Rows run from north (top) to south, columns from longitude -180 to 180.
+
+        Args:
+            width (int, optional): Pixels around the sky. Defaults to 720.
+            height (int, optional): Pixels from pole to pole. Defaults to 360.
+
+        Returns:
+            np.ndarray: (height, width) flux image
+        """
+        col = np.clip(((self.lon + 180.0) / 360.0 * width).astype(np.int64), 0, width - 1)
+        row = np.clip(((90.0 - self.lat) / 180.0 * height).astype(np.int64), 0, height - 1)
+        flux = 10 ** (-0.4 * self.magnitude)
+        return np.bincount(row * width + col, weights=flux, minlength=width * height).reshape(height, width)
+
+
+class SkyIndex:
+    """Octree over star positions that knows the brightest star under every node
+
+    A node can only hold a star brighter than the limit if its brightest absolute magnitude,
+    moved to the node's nearest point, is. Nodes failing that are dropped with everything
+    below them, so faint and distant stars are never evaluated one by one.
+    """
+
+    def __init__(self, points: np.ndarray, abs_mag: np.ndarray, leaf_size: int = 64):
+        """Build the index
+
+        Args:
+            points (np.ndarray): (n, 3) star positions in pc
+            abs_mag (np.ndarray): Absolute magnitude of each star
+            leaf_size (int, optional): Nodes with more stars than this are split. Defaults to 64.
+        """
+        self.tree = octree.Octree(points, leaf_size=leaf_size)
+        tree = self.tree
+        # magnitudes in the tree's point order
+        self.abs_mag = np.asarray(abs_mag, dtype=float)[tree.order]
+        self.node_mag = np.full(tree.n_nodes, np.inf)
+        if len(tree) == 0:
+            return
+        # leaves split the sorted points into disjoint runs, parents take the brightest of their children
+        leaves = np.flatnonzero(tree.n_children == 0)
+        leaves = leaves[np.argsort(tree.start[leaves])]
+        self.node_mag[leaves] = np.minimum.reduceat(self.abs_mag, tree.start[leaves])
+        for depth in range(int(tree.depth.max()), 0, -1):
+            nodes = np.flatnonzero(tree.depth == depth)
+            np.minimum.at(self.node_mag, tree.parent[nodes], self.node_mag[nodes])
+
+    @classmethod
+    def from_galaxy(cls, galaxy, leaf_size: int = 64) -> "SkyIndex":
+        """Build the index over the positions and magnitudes of a GalaxyCatalog"""
+        stars = galaxy.stars
+        points = np.column_stack([stars["gal_x"], stars["gal_y"], stars["gal_z"]])
+        return cls(points, stars["magnitude"], leaf_size)
+
+    def __len__(self) -> int:
+        return len(self.tree)
+
+    def _candidate_slots(self, observer: np.ndarray, limit: float) -> np.ndarray:
+        # sorted positions of the stars in every leaf that could hold one brighter than limit
+        tree = self.tree
+        frontier = np.zeros(1 if len(tree) else 0, dtype=np.int64)
+        leaves = []
+        while len(frontier):
+            lo = tree.node_lo[frontier]
+            hi = lo + tree.node_size[frontier, None]
+            nearest = np.linalg.norm(np.maximum(lo - observer, 0) + np.maximum(observer - hi, 0), axis=1)
+            # farthest distance at which the node's brightest star still reaches the limit
+            reach = 10 ** ((limit - self.node_mag[frontier] + 5) / 5)
+            frontier = frontier[nearest <= reach]
+            n_children = tree.n_children[frontier]
+            leaves.append(frontier[n_children == 0])
+            inner = n_children > 0
+            first, n_children = tree.first_child[frontier[inner]], n_children[inner]
+            skip = np.cumsum(n_children) - n_children
+            frontier = np.repeat(first - skip, n_children) + np.arange(int(n_children.sum()))
+        if not leaves:
+            return np.empty(0, dtype=np.int64)
+        leaves = np.concatenate(leaves)
+        starts = tree.start[leaves]
+        lens = tree.stop[leaves] - starts
+        skip = np.cumsum(lens) - lens
+        return np.repeat(starts - skip, lens) + np.arange(int(lens.sum()))
+
+    def view(self, observer, limit: float = default_limit, dust=None, **options) -> SkyView:
+        """The sky seen from an observer, down to a limiting magnitude
+
+        Stars at the observer's own position are left out.
+
+        Args:
+            observer (StarSystem or np.ndarray): Observing system, or a (3,) position in pc
+            limit (float, optional): Faintest apparent magnitude kept. Defaults to 6.5.
+            dust (dust.DustField, optional): Dust dimming the stars. Defaults to none.
+            **options: max_pieces and tolerance passed to dust.extinction
+
+        Returns:
+            SkyView: Visible stars sorted from brightest to faintest
+        """
+        observer = _position(observer)
+        slots = self._candidate_slots(observer, limit)
+        offset = self.tree.points[slots] - observer
+        dist = np.linalg.norm(offset, axis=1)
+        keep = dist > 0
+        slots, offset, dist = slots[keep], offset[keep], dist[keep]
+        mag = sutil.apparent_magnitude(self.abs_mag[slots], dist)
+        keep = mag <= limit
+        slots, offset, dist, mag = slots[keep], offset[keep], dist[keep], mag[keep]
+        if dust is not None:
+            # extinction only dims, so only the stars that made the cut need it
+            mag = mag + dust.extinction(observer, self.tree.points[slots], **options)
+            keep = mag <= limit
+            slots, offset, dist, mag = slots[keep], offset[keep], dist[keep], mag[keep]
+        order = np.argsort(mag, kind="stable")
+        return SkyView(observer, self.tree.order[slots[order]], offset[order] / dist[order, None], mag[order])
+
+
+def _position(observer) -> np.ndarray:
+    if hasattr(observer, "gal_x"):
+        return np.array([observer.gal_x, observer.gal_y, observer.gal_z], dtype=float)
+    return np.asarray(observer, dtype=float).reshape(3)
+
+
+def sky_view(galaxy, observer, limit: float = default_limit, dust=None, **options) -> Tuple[SkyView, SkyIndex]:
+    """The sky seen from one system of a catalog
+
+    Builds the index on the way, keep it and call SkyIndex.view for more observers.
+
+    Args:
+        galaxy (GalaxyCatalog): In-memory or memory-mapped catalog
+        observer (StarSystem, int or np.ndarray): Observing system, its index, or a (3,) position in pc
+        limit (float, optional): Faintest apparent magnitude kept. Defaults to 6.5.
+        dust (dust.DustField, optional): Dust dimming the stars. Defaults to none.
+        **options: max_pieces and tolerance passed to dust.extinction
+
+    Returns:
+        Tuple[SkyView, SkyIndex]: The view and the index it was found with
+    """
+    index = SkyIndex.from_galaxy(galaxy)
+    if isinstance(observer, (int, np.integer)):
+        stars = galaxy.stars
+        observer = [stars["gal_x"][observer], stars["gal_y"][observer], stars["gal_z"][observer]]
+    return index.view(observer, limit, dust, **options), index
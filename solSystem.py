@@ -1,22 +1,131 @@
-from generate_galaxy import Star, Planet, System, Atmosphere
+from generate_galaxy import Star, Planet, StarSystem, Atmosphere
+import star_utils as sutil
 
-sol = Star(name="Sol", temperature=5778, age=4.603, metallicity=1.0)
-sun_planets = []
-mercury = Planet(
-    name="Mercury",
-    parent=sol.name,
-    type="rocky",
-    orbit=0.38709893,
-    axial_tilt=0.034,
-    rotation_period=175.942,
-    radius=0.383,
-    density=5429,
-    atmos=Atmosphere(10, 5e-15, 0.05, 0, 0, 0.01, 0, 0.94),
-    ocean_coverage=0.0,
-    moons=0,
+# The real solar system, for adding to a galaxy with overlay.OverlayCatalog.add.
+# Planet masses and radii in earth units, rotation periods in days (retrograde given as
+# positive with the tilt past 90 degrees), gas giant pressures and temperatures at 1 bar.
+
+sol = Star(
+    name="Sol",
+    temperature=5778,
+    mass=1.0,
+    age=4.603,
+    metallicity=0.0,
+    magnitude=4.83,
+    luminosity=1.0,
+    radius=1.0,
+    hab_zone=tuple(float(edge) for edge in sutil.habitable_zone(1.0)),
+    lifespan=10.0,
+    harv_class=sutil.stellar_class(5778),
 )
-sun_planets.append(mercury)
 
-sun_stations = []
+
+def _airless(temp: float, albedo: float) -> Atmosphere:
+    return Atmosphere(scale_height=0, pressure=0, comp={"Other": 1}, eta=0, temp=temp, ocean=0, albedo=albedo)
+
+
+sun_planets = [
+    Planet("Mercury", sol.name, "S", 0.0553, 0.387, 0.034, 58.646, 0.383, 5429, _airless(440, 0.088), 0, 0.38),
+    Planet(
+        "Venus",
+        sol.name,
+        "T",
+        0.815,
+        0.723,
+        177.36,
+        243.02,
+        0.949,
+        5243,
+        Atmosphere(15.9, 92.0, {"CO2": 0.965, "N2": 0.035}, 1.98, 737, 0.0, 0.76),
+        0,
+        0.904,
+    ),
+    Planet(
+        "Earth",
+        sol.name,
+        "T",
+        1.0,
+        1.0,
+        23.44,
+        0.9973,
+        1.0,
+        5514,
+        Atmosphere(8.5, 1.0, {"N2": 0.78, "O2": 0.21, "Other": 0.01}, 0.771, 288, 0.71, 0.306),
+        1,
+        1.0,
+    ),
+    Planet(
+        "Mars",
+        sol.name,
+        "S",
+        0.107,
+        1.524,
+        25.19,
+        1.026,
+        0.532,
+        3934,
+        Atmosphere(11.1, 0.006, {"CO2": 0.95, "N2": 0.028, "Other": 0.022}, 0.05, 210, 0.0, 0.25),
+        2,
+        0.379,
+    ),
+    Planet(
+        "Jupiter",
+        sol.name,
+        "G",
+        317.8,
+        5.204,
+        3.13,
+        0.4135,
+        11.21,
+        1326,
+        Atmosphere(27.0, 1.0, {"H2": 0.898, "He": 0.102}, 1.6, 165, 0.0, 0.343),
+        95,
+        2.528,
+    ),
+    Planet(
+        "Saturn",
+        sol.name,
+        "G",
+        95.16,
+        9.583,
+        26.73,
+        0.444,
+        9.45,
+        687,
+        Atmosphere(59.5, 1.0, {"H2": 0.963, "He": 0.0325, "Other": 0.0045}, 1.7, 134, 0.0, 0.342),
+        146,
+        1.065,
+    ),
+    Planet(
+        "Uranus",
+        sol.name,
+        "N",
+        14.54,
+        19.19,
+        97.77,
+        0.718,
+        4.007,
+        1270,
+        Atmosphere(27.7, 1.0, {"H2": 0.83, "He": 0.15, "CH4": 0.02}, 1.5, 76, 0.0, 0.3),
+        28,
+        0.886,
+    ),
+    Planet(
+        "Neptune",
+        sol.name,
+        "N",
+        17.15,
+        30.07,
+        28.32,
+        0.671,
+        3.883,
+        1638,
+        Atmosphere(19.7, 1.0, {"H2": 0.80, "He": 0.19, "CH4": 0.01}, 1.7, 72, 0.0, 0.29),
+        16,
+        1.14,
+    ),
+]
+
+# asteroid belts by number, inner and outer edge in AU (StarSystem does not hold belts yet)
 sun_belts = {1: [2.06, 3.27], 2: [30, 1000]}
-sol_system = System(0, 0, 0, sol, sun_planets, sun_stations, sun_belts)
+sol_system = StarSystem(0.0, 0.0, 0.0, sol, sun_planets)
@@ -0,0 +1,210 @@
+import json
+import os
+from typing import List, Tuple
+import numpy as np
+
+import catalog
+
+
+class GridIndex:
+    """Uniform grid over system positions for radius, nearest neighbour and box queries
+
+    Points are sorted by cell (x fastest, then y, then z), so every run of cells along x is
+    one contiguous slice of the sorted arrays and a query only touches the cells its
+    search volume overlaps. Results are system indices into the catalog.
+    """
+
+    def __init__(self, points: np.ndarray, cell_size: float = None, per_cell: float = 4.0):
+        """Build the grid
+
+        Args:
+            points (np.ndarray): (n, 3) positions in pc
+            cell_size (float, optional): Cell edge in pc. Defaults to a size holding about per_cell points.
+            per_cell (float, optional): Target mean occupancy when picking the cell size. Defaults to 4.0.
+        """
+        points = np.asarray(points, dtype=float).reshape(-1, 3)
+        if len(points):
+            origin = points.min(axis=0)
+            extent = np.maximum(points.max(axis=0) - origin, 1.0)
+        else:
+            origin = np.zeros(3)
+            extent = np.ones(3)
+        if cell_size is None:
+            cell_size = max(float(np.cbrt(np.prod(extent) * per_cell / max(len(points), 1))), 1e-3)
+        self.origin = origin
+        self.cell_size = float(cell_size)
+        self.shape = np.floor(extent / self.cell_size).astype(np.int64) + 1
+
+        cell = self._cell_ids(self._cells(points))
+        self.order = np.argsort(cell, kind="stable")
+        self.points = points[self.order]
+        counts = np.bincount(cell, minlength=int(np.prod(self.shape)))
+        self.cell_start = np.concatenate([[0], np.cumsum(counts)]).astype(np.int64)
+
+    @classmethod
+    def from_galaxy(cls, galaxy, cell_size: float = None) -> "GridIndex":
+        """Build the grid over the gal_x/gal_y/gal_z columns of a GalaxyCatalog"""
+        stars = galaxy.stars
+        return cls(np.column_stack([stars["gal_x"], stars["gal_y"], stars["gal_z"]]), cell_size)
+
+    def __len__(self) -> int:
+        return len(self.order)
+
+    def _cells(self, points: np.ndarray) -> np.ndarray:
+        return np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+
+    def _cell_ids(self, cells: np.ndarray) -> np.ndarray:
+        cells = np.clip(cells, 0, self.shape - 1)
+        return cells[..., 0] + self.shape[0] * (cells[..., 1] + self.shape[1] * cells[..., 2])
+
+    def _slots_in_box(self, lo: np.ndarray, hi: np.ndarray) -> np.ndarray:
+        # sorted positions of every point in the cells overlapping [lo, hi]
+        c0 = self._cells(lo)
+        c1 = self._cells(hi)
+        if np.any(c1 < 0) or np.any(c0 >= self.shape):
+            return np.empty(0, dtype=np.int64)
+        c0 = np.clip(c0, 0, self.shape - 1)
+        c1 = np.clip(c1, 0, self.shape - 1)
+        iy, iz = np.meshgrid(np.arange(c0[1], c1[1] + 1), np.arange(c0[2], c1[2] + 1), indexing="ij")
+        row = self.shape[0] * (iy.ravel() + self.shape[1] * iz.ravel())
+        starts = self.cell_start[row + c0[0]]
+        lens = self.cell_start[row + c1[0] + 1] - starts
+        total = int(lens.sum())
+        if total == 0:
+            return np.empty(0, dtype=np.int64)
+        skip = np.cumsum(lens) - lens
+        return np.repeat(starts - skip, lens) + np.arange(total)
+
+    def query_radius(self, centers: np.ndarray, radius: float) -> List[np.ndarray]:
+        """Find every system within radius of each center
+
+        Args:
+            centers (np.ndarray): (m, 3) or (3,) positions in pc
+            radius (float): Search radius in pc, scalar or one per center
+
+        Returns:
+            List[np.ndarray]: Sorted system indices for each center
+        """
+        centers = np.atleast_2d(np.asarray(centers, dtype=float))
+        radii = np.broadcast_to(np.asarray(radius, dtype=float), len(centers))
+        found = []
+        for center, r in zip(centers, radii):
+            slots = self._slots_in_box(center - r, center + r)
+            d2 = np.sum((self.points[slots] - center) ** 2, axis=1)
+            found.append(np.sort(self.order[slots[d2 <= r * r]]))
+        return found
+
+    def query_box(self, lo: np.ndarray, hi: np.ndarray) -> List[np.ndarray]:
+        """Find every system inside axis aligned boxes
+
+        Args:
+            lo (np.ndarray): (m, 3) or (3,) lower corners in pc
+            hi (np.ndarray): (m, 3) or (3,) upper corners in pc
+
+        Returns:
+            List[np.ndarray]: Sorted system indices for each box
+        """
+        lo, hi = np.broadcast_arrays(np.atleast_2d(np.asarray(lo, dtype=float)), np.atleast_2d(hi))
+        found = []
+        for box_lo, box_hi in zip(lo, hi):
+            slots = self._slots_in_box(box_lo, box_hi)
+            pts = self.points[slots]
+            inside = np.all((pts >= box_lo) & (pts <= box_hi), axis=1)
+            found.append(np.sort(self.order[slots[inside]]))
+        return found
+
+    def query_knn(self, centers: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Find the k nearest systems to each center
+
+        The search cube grows until the k-th candidate is closer than any point outside it.
+
+        Args:
+            centers (np.ndarray): (m, 3) or (3,) positions in pc
+            k (int): Number of neighbours
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: (m, k) distances in pc and system indices, nearest first.
+                Missing neighbours (fewer than k systems) have distance inf and index -1.
+        """
+        centers = np.atleast_2d(np.asarray(centers, dtype=float))
+        dist = np.full((len(centers), k), np.inf)
+        idx = np.full((len(centers), k), -1, dtype=np.int64)
+        mean_occupancy = max(len(self) / np.prod(self.shape), 1e-9)
+        start_half = max(1.0, 0.5 * np.cbrt(k / mean_occupancy)) * self.cell_size
+        for row, center in enumerate(centers):
+            half = start_half
+            while True:
+                slots = self._slots_in_box(center - half, center + half)
+                d = np.sqrt(np.sum((self.points[slots] - center) ** 2, axis=1))
+                # everything closer than the nearest inner face of the searched cells has been seen,
+                # faces on the edge of the grid have nothing behind them
+                c0 = self._cells(center - half)
+                c1 = self._cells(center + half)
+                lo_face = np.where(c0 <= 0, -np.inf, self.origin + c0 * self.cell_size)
+                hi_face = np.where(c1 >= self.shape - 1, np.inf, self.origin + (c1 + 1) * self.cell_size)
+                covered = min(np.min(center - lo_face), np.min(hi_face - center))
+                if (len(d) >= k and np.partition(d, k - 1)[k - 1] <= covered) or np.isinf(covered):
+                    break
+                half *= 2
+            take = np.argsort(d)[:k]
+            dist[row, : len(take)] = d[take]
+            idx[row, : len(take)] = self.order[slots[take]]
+        return dist, idx
+
+    def save(self, path: str) -> None:
+        """Save the grid next to the catalog in path"""
+        meta = {
+            "n_points": len(self),
+            "origin": self.origin.tolist(),
+            "cell_size": self.cell_size,
+            "shape": self.shape.tolist(),
+        }
+        self.order.astype("<i8").tofile(os.path.join(path, "spatial.order.bin"))
+        self.points.astype("<f8").tofile(os.path.join(path, "spatial.points.bin"))
+        self.cell_start.astype("<i8").tofile(os.path.join(path, "spatial.cell_start.bin"))
+        with open(os.path.join(path, "spatial.json"), "w") as f:
+            json.dump(meta, f)
+
+    @classmethod
+    def load(cls, path: str) -> "GridIndex":
+        """Memory map a grid saved with save"""
+        with open(os.path.join(path, "spatial.json")) as f:
+            meta = json.load(f)
+        index = cls.__new__(cls)
+        index.origin = np.array(meta["origin"])
+        index.cell_size = meta["cell_size"]
+        index.shape = np.array(meta["shape"], dtype=np.int64)
+        n = meta["n_points"]
+        ncells = int(np.prod(index.shape))
+        index.order = _map(os.path.join(path, "spatial.order.bin"), "<i8", (n,))
+        index.points = _map(os.path.join(path, "spatial.points.bin"), "<f8", (n, 3))
+        index.cell_start = _map(os.path.join(path, "spatial.cell_start.bin"), "<i8", (ncells + 1,))
+        return index
+
+
+def _map(fname: str, dtype: str, shape: tuple) -> np.ndarray:
+    if shape[0] == 0:
+        return np.zeros(shape, dtype=dtype)
+    return np.memmap(fname, dtype=dtype, mode="r", shape=shape)
+
+
+def open_spatial_index(path: str, cell_size: float = None) -> GridIndex:
+    """Load the spatial index of an on-disk catalog, building and saving it on first use
+
+    Args:
+        path (str): Catalog directory
+        cell_size (float, optional): Cell edge in pc for a new index. Defaults to automatic.
+
+    Returns:
+        GridIndex: Index over the catalog's system positions
+    """
+    manifest = catalog.read_manifest(path)
+    if os.path.exists(os.path.join(path, "spatial.json")):
+        with open(os.path.join(path, "spatial.json")) as f:
+            n_points = json.load(f)["n_points"]
+        if n_points == manifest["n_systems"]:
+            return GridIndex.load(path)
+    _, stars, _, _ = catalog.open_columns(path)
+    index = GridIndex(np.column_stack([stars["gal_x"], stars["gal_y"], stars["gal_z"]]), cell_size)
+    index.save(path)
+    return index
@@ -1,4 +1,3 @@
-from ast import Raise
 from typing import Tuple
 import warnings
 import numpy as np
@@ -6,18 +5,23 @@ import numpy as np
 import constants as const
 
 
-def apparent_magnitude(abs_mag: float, dist: float) -> float:
+def apparent_magnitude(abs_mag: float, dist: float, extinction: float = 0.0) -> float:
     """Find apparent magnitude of a star.
-    m = M - 5 + 5*log10(d)
+    m = M - 5 + 5*log10(d) + A
+
+    Works elementwise on arrays, with extinctions for many observer/star pairs from
+    dust.DustField.extinction.
 
     Args:
         abs_mag (float): Absolute magnitude
         dist (float): Distance in pc
+        extinction (float, optional): Interstellar extinction along the line of sight in magnitudes.
+            Defaults to 0.0.
 
     Returns:
-        float: _description_
+        float: Apparent magnitude
     """
-    return abs_mag - 5 + (5 * np.log10(dist))
+    return abs_mag - 5 + (5 * np.log10(dist)) + extinction
 
 
 def absolute_magnitude(luminosity: float) -> float:
@@ -37,32 +41,28 @@ def calculate_luminosity(mass: float) -> float:
     """Calcuate stellar luminosity based on mass
 
     Args:
-        mass (float): Stellar mass in solar units
+        mass (float): Stellar mass in solar units, scalar or array
 
     Returns:
         float: Stellar luminosity in solar units
     """
-    if mass < 0.43:
-        return 0.23 * (mass**2.3)
-    elif 0.43 <= mass <= 2.0:
-        return mass**4.0
-    elif mass > 2.0:
-        return 1.4 * (mass**3.5)
+    mass = np.asarray(mass, dtype=float)
+    lum = np.where(mass < 0.43, 0.23 * (mass**2.3), mass**4.0)
+    lum = np.where(mass > 2.0, 1.4 * (mass**3.5), lum)
+    return lum[()]
 
 
 def star_radius(mass: float) -> float:
     """Calculate stellar radius from mass
 
     Args:
-        mass (float): Stellar mass in solar units
+        mass (float): Stellar mass in solar units, scalar or array
 
     Returns:
         float: Stellar radius in solar units
     """
-    if mass <= 1.0:
-        return mass**0.8
-    else:
-        return mass**0.57
+    mass = np.asarray(mass, dtype=float)
+    return np.where(mass <= 1.0, mass**0.8, mass**0.57)[()]
 
 
 def stellar_temp(mass: float) -> float:
@@ -103,57 +103,32 @@ def stellar_lifespan(mass: float) -> float:
     return 1e10 * (1 / mass) ** 2.5
 
 
+# harvard classes and the lower edge of their temperature ranges in K, O stars top out at 50000 K
+harv_types = np.array(["T", "L", "M", "K", "G", "F", "A", "B", "O"])
+harv_edges = np.array([600.0, 1300.0, 2500.0, 3800.0, 5300.0, 6000.0, 7300.0, 10000.0, 30000.0, 50000.0])
+
+
 def stellar_class(temp: float) -> str:
     """Classify a star based on its characteristics
 
     Args:
-        temp (float): star temperature in K
-        mass (float): Star mass in km
-        lum (float): Star luminosity in W
+        temp (float): star temperature in K, scalar or array
 
     Returns:
-        str: Stellar classification
+        str: Stellar classification, an array of strings for array input
     """
-    if 30000 < temp:
-        type = "O"
-        mint = 30000.0
-        trange = 50000.0 - mint
-    if 10000 < temp < 30000:
-        type = "B"
-        mint = 10000.0
-        trange = 30000.0 - mint
-    if 7300 <= temp < 10000:
-        type = "A"
-        mint = 7300.0
-        trange = 10000 - mint
-    elif 6000 <= temp < 7300:
-        type = "F"
-        mint = 6000
-        trange = 7300.0 - mint
-    elif 5300 <= temp < 6000:
-        type = "G"
-        mint = 5300
-        trange = 6000.0 - mint
-    elif 3800 <= temp < 5300:
-        type = "K"
-        mint = 3800
-        trange = 5300.0 - mint
-    elif 2500 <= temp < 3800:
-        type = "M"
-        mint = 2500.0
-        trange = 3800.0 - mint
-    elif 1300 <= temp < 2500:
-        type = "L"
-        mint = 1300.0
-        trange = 2500.0 - mint
-    elif 600 <= temp < 1300:
-        type = "T"
-        mint = 600.0
-        trange = 1300.0 - mint
-    else:
-        warnings.warn(f"Star Temperature {temp} out of bounds for habitability.")
-    stype = int(9 - 10 * (temp - mint) / trange)
-    return type + str(stype)
+    temp = np.asarray(temp, dtype=float)
+    bins = np.searchsorted(harv_edges, temp, side="right") - 1
+    cold = bins < 0
+    if np.any(cold):
+        warnings.warn(f"Star Temperature {np.min(temp)} out of bounds for habitability.")
+    # anything hotter than 50000 K is still O, with a negative subtype
+    bins = np.clip(bins, 0, len(harv_types) - 1)
+    mint = harv_edges[bins]
+    trange = harv_edges[bins + 1] - mint
+    stype = np.trunc(9 - 10 * (temp - mint) / trange).astype(int)
+    harv_class = np.char.add(harv_types[bins], stype.astype(str))
+    return np.where(cold, "", harv_class)[()]
 
 
 # main sequence
@@ -0,0 +1,236 @@
+from typing import Dict, Iterator, Tuple
+import numpy as np
+
+import catalog
+
+
+class Histogram:
+    """Fixed-bin histogram filled in streaming passes
+
+    Bins are uniform in value, or in log10 of the value with log=True, so filling one
+    is an arithmetic bin lookup and a bincount. Values outside the range go to the
+    under and over counters. Quantiles are interpolated within bins, which makes them
+    exact to the bin width.
+    """
+
+    def __init__(self, lo: float, hi: float, bins: int = 1000, log: bool = False):
+        self.log = log
+        self.lo = np.log10(lo) if log else lo
+        self.hi = np.log10(hi) if log else hi
+        self.bins = bins
+        self.counts = np.zeros(bins, dtype=np.int64)
+        self.under = 0
+        self.over = 0
+        self.nan = 0
+        self.sum = 0.0
+
+    @property
+    def edges(self) -> np.ndarray:
+        edges = np.linspace(self.lo, self.hi, self.bins + 1)
+        return 10**edges if self.log else edges
+
+    @property
+    def total(self) -> int:
+        return int(self.counts.sum()) + self.under + self.over
+
+    @property
+    def mean(self) -> float:
+        return self.sum / self.total if self.total else np.nan
+
+    def add(self, values: np.ndarray) -> None:
+        values = np.asarray(values, dtype=float).ravel()
+        bad = np.isnan(values)
+        if np.any(bad):
+            self.nan += int(bad.sum())
+            values = values[~bad]
+        self.sum += float(values.sum())
+        with np.errstate(divide="ignore"):
+            x = np.log10(values) if self.log else values
+        idx = np.floor((x - self.lo) / (self.hi - self.lo) * self.bins)
+        self.under += int(np.count_nonzero(idx < 0))
+        self.over += int(np.count_nonzero(idx >= self.bins))
+        inside = idx[(idx >= 0) & (idx < self.bins)].astype(np.int64)
+        self.counts += np.bincount(inside, minlength=self.bins)
+
+    def merge(self, other: "Histogram") -> None:
+        self.counts += other.counts
+        self.under += other.under
+        self.over += other.over
+        self.nan += other.nan
+        self.sum += other.sum
+
+    def quantile(self, q) -> np.ndarray:
+        """Values below which a fraction q of the added values fall (nan outside the binned range)"""
+        q = np.asarray(q, dtype=float)
+        cum = np.concatenate([[self.under], self.under + np.cumsum(self.counts)])
+        target = q * self.total
+        pos = np.interp(target, cum, np.linspace(self.lo, self.hi, self.bins + 1))
+        pos = np.where((target < self.under) | (target > cum[-1]), np.nan, pos)
+        return (10**pos if self.log else pos)[()]
+
+
+def _codes(column: np.ndarray) -> np.ndarray:
+    # fixed width unicode strings as int64 codes, 21 bits per character, up to 3 characters
+    column = np.ascontiguousarray(column)
+    width = column.dtype.itemsize // 4
+    chars = column.view(np.uint32).reshape(len(column), width).astype(np.int64)
+    return sum(chars[:, i] << (21 * i) for i in range(width))
+
+
+def _decode(code: int) -> str:
+    return "".join(chr((code >> (21 * i)) & 0x1FFFFF) for i in range(3)).rstrip("\0")
+
+
+def iter_system_blocks(
+    stars: Dict[str, np.ndarray], planets: Dict[str, np.ndarray], offsets: np.ndarray, block: int = 1_000_000
+) -> Iterator[Tuple[int, int, int, int]]:
+    """Split a catalog into runs of whole systems holding about block planets each
+
+    Yields:
+        Tuple[int, int, int, int]: First and stop system, first and stop planet row
+    """
+    n = len(offsets) - 1
+    first = 0
+    while first < n:
+        stop = int(np.searchsorted(offsets, offsets[first] + block, side="right")) - 1
+        stop = min(max(stop, first + 1), n)
+        yield first, stop, int(offsets[first]), int(offsets[stop])
+        first = stop
+
+
+class CatalogStats:
+    """Aggregates over a whole catalog, filled one block of systems at a time
+
+    Attributes:
+        n_systems, n_planets: Row counts
+        type_by_class: planet type counts per stellar harvard class, {class: {type: count}}
+        sma: semimajor axis histogram in au
+        pressure: surface pressure histogram in atm per planet type, airless planets excluded
+        airless: airless planets per type
+        in_hz: planets inside their star's habitable zone per type
+        hz_with_atmosphere: habitable zone planets with an atmosphere
+        systems_with_hz_planet: systems with at least one habitable zone planet
+    """
+
+    def __init__(self, sma_range=(1e-3, 1e3), pressure_range=(1e-4, 1e4), bins: int = 1000):
+        self.n_systems = 0
+        self.n_planets = 0
+        self._pair_counts: Dict[Tuple[int, int], int] = {}  # (class code, type code) -> planets
+        self.sma = Histogram(*sma_range, bins=bins, log=True)
+        self._pressure_range = pressure_range
+        self._bins = bins
+        self.pressure: Dict[str, Histogram] = {}
+        self.airless: Dict[str, int] = {}
+        self.in_hz: Dict[str, int] = {}
+        self.hz_with_atmosphere = 0
+        self.systems_with_hz_planet = 0
+
+    def add_block(self, stars: Dict[str, np.ndarray], planets: Dict[str, np.ndarray], first_system: int) -> None:
+        """Add a block of whole systems
+
+        Args:
+            stars (Dict[str, np.ndarray]): Star rows of the block
+            planets (Dict[str, np.ndarray]): Planet rows of the block
+            first_system (int): Catalog index of the first star row, to localize planets["system"]
+        """
+        self.n_systems += len(stars["mass"])
+        self.n_planets += len(planets["sma"])
+        system = np.asarray(planets["system"]) - first_system
+        ptype = _codes(planets["type"])
+        type_names = {code: _decode(code) for code in np.unique(ptype).tolist()}
+
+        classes, class_idx = np.unique(_codes(stars["harv_class"]), return_inverse=True)
+        pair = class_idx[system] * 128 + ptype
+        for code, count in zip(*np.unique(pair, return_counts=True)):
+            key = (int(classes[code >> 7]), int(code & 127))
+            self._pair_counts[key] = self._pair_counts.get(key, 0) + int(count)
+
+        sma = np.asarray(planets["sma"])
+        self.sma.add(sma)
+
+        pressure = np.asarray(planets["pressure"])
+        hz = (np.asarray(stars["hab_in"])[system] < sma) & (sma < np.asarray(stars["hab_out"])[system])
+        for code, name in type_names.items():
+            of_type = ptype == code
+            p = pressure[of_type]
+            if name not in self.pressure:
+                self.pressure[name] = Histogram(*self._pressure_range, bins=self._bins, log=True)
+            self.pressure[name].add(p[p > 0])
+            self.airless[name] = self.airless.get(name, 0) + int(np.count_nonzero(p == 0))
+            self.in_hz[name] = self.in_hz.get(name, 0) + int(np.count_nonzero(hz & of_type))
+        self.hz_with_atmosphere += int(np.count_nonzero(hz & (pressure > 0)))
+        self.systems_with_hz_planet += len(np.unique(system[hz]))
+
+    @property
+    def type_by_class(self) -> Dict[str, Dict[str, int]]:
+        table: Dict[str, Dict[str, int]] = {}
+        for (cls, ptype), count in self._pair_counts.items():
+            table.setdefault(_decode(cls), {})[_decode(ptype)] = count
+        return {cls: dict(sorted(table[cls].items())) for cls in sorted(table)}
+
+    def report(self) -> str:
+        """Plain text summary of the aggregates"""
+        lines = [f"{self.n_systems} systems, {self.n_planets} planets"]
+        types = sorted(self.airless)
+        lines.append("planet types per stellar class")
+        lines.append(f"  {'class':<6}" + "".join(f"{t:>12}" for t in types))
+        for cls, counts in self.type_by_class.items():
+            lines.append(f"  {cls:<6}" + "".join(f"{counts.get(t, 0):>12}" for t in types))
+        q = self.sma.quantile([0.05, 0.25, 0.5, 0.75, 0.95])
+        lines.append("sma au, 5/25/50/75/95%: " + " ".join(f"{v:.3g}" for v in q))
+        lines.append("surface pressure atm, median (airless)")
+        for t in types:
+            lines.append(f"  {t}: {self.pressure[t].quantile(0.5):.3g} ({self.airless[t]} airless)")
+        in_hz = sum(self.in_hz.values())
+        lines.append(
+            f"habitable zone: {in_hz} planets ({self.hz_with_atmosphere} with atmospheres) in "
+            f"{self.systems_with_hz_planet} systems"
+        )
+        return "\n".join(lines)
+
+
+# columns read by CatalogStats.add_block
+star_columns = ["mass", "harv_class", "hab_in", "hab_out"]
+planet_columns = ["system", "type", "sma", "pressure"]
+
+
+def galaxy_stats(galaxy, block: int = 1_000_000, **options) -> CatalogStats:
+    """Aggregate an in-memory or memory mapped GalaxyCatalog in one streaming pass
+
+    Args:
+        galaxy (GalaxyCatalog): Catalog to aggregate
+        block (int, optional): Planet rows per block. Defaults to 1_000_000.
+        **options: Histogram ranges and bins passed to CatalogStats
+
+    Returns:
+        CatalogStats: The aggregates
+    """
+    return _aggregate(galaxy.stars, galaxy.planets, galaxy.offsets, block, options)
+
+
+def catalog_stats(path: str, block: int = 1_000_000, **options) -> CatalogStats:
+    """Aggregate an on-disk catalog in one streaming pass, without building Planet objects
+
+    Only the columns the aggregates need are read, a block of whole systems at a time.
+
+    Args:
+        path (str): Catalog directory
+        block (int, optional): Planet rows per block. Defaults to 1_000_000.
+        **options: Histogram ranges and bins passed to CatalogStats
+
+    Returns:
+        CatalogStats: The aggregates
+    """
+    _, stars, planets, offsets = catalog.open_columns(path)
+    return _aggregate(stars, planets, offsets, block, options)
+
+
+def _aggregate(stars, planets, offsets, block, options) -> CatalogStats:
+    result = CatalogStats(**options)
+    for s0, s1, p0, p1 in iter_system_blocks(stars, planets, offsets, block):
+        result.add_block(
+            {key: stars[key][s0:s1] for key in star_columns},
+            {key: planets[key][p0:p1] for key in planet_columns},
+            s0,
+        )
+    return result
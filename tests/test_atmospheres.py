@@ -0,0 +1,58 @@
+import numpy as np
+
+import atmospheres as atms
+import constants as const
+
+
+def _scalar_terrestrial(n, lum, sma, p_atmos, lil_g):
+    np.random.seed(11)
+    with np.errstate(invalid="ignore"):
+        return [atms.gen_terrestrial_atmos(lum, sma, p_atmos, lil_g) for _ in range(n)]
+
+
+def test_terrestrial_batch_matches_scalar_distributions():
+    n = 20_000
+    lum, sma, p_atmos, lil_g = 1.0, 1.0, 0.7, 9.8
+    batch = atms.gen_terrestrial_atmos_batch(lum, np.full(n, sma), p_atmos, lil_g, rng=np.random.default_rng(5))
+    scalar = _scalar_terrestrial(n, lum, sma, p_atmos, lil_g)
+    assert batch["comp"].shape == (n, len(const.atmos_species))
+    np.testing.assert_allclose(batch["comp"].sum(axis=1), 1)
+
+    airless = batch["pressure"] == 0
+    assert abs(airless.mean() - np.mean([a.pressure == 0 for a in scalar])) < 0.02
+    assert np.all(batch["albedo"][airless] == 0.2)
+    assert np.all(batch["comp"][airless, const.atmos_species.index("Other")] == 1)
+
+    for key in ("ocean", "albedo", "eta"):
+        expected = np.mean([getattr(a, key) for a in scalar])
+        assert abs(batch[key].mean() - expected) < 0.02
+
+    # main species pair frequencies
+    main = batch["comp"][~airless, :4] > 0
+    for i, gas in enumerate(atms.gasses):
+        expected = np.mean([gas in a.comp for a in scalar if a.pressure > 0])
+        assert abs(main[:, i].mean() - expected) < 0.02
+    assert np.all(main.sum(axis=1) == 2)
+
+
+def test_runaway_greenhouse_is_rare():
+    n = 400_000
+    batch = atms.gen_terrestrial_atmos_batch(1.0, np.ones(n), 1.0, 9.8, rng=np.random.default_rng(2))
+    runaway = batch["eta"] >= 2
+    assert 0.0005 < runaway.mean() < 0.0015
+    assert np.all(batch["eta"][~runaway] < 1)
+
+
+def test_mixed_batch_columns():
+    rng = np.random.default_rng(9)
+    n = 1000
+    gas = rng.uniform(0, 1, n) < 0.4
+    atmos = atms.gen_atmos_batch(
+        rng.uniform(0.1, 3, n), rng.uniform(0.1, 20, n), rng.uniform(3, 25, n), np.where(gas, np.nan, 0.5), gas, rng
+    )
+    assert set(atmos) == {"scale_height", "pressure", "comp", "eta", "temp", "ocean", "albedo"}
+    assert np.all(atmos["pressure"][gas] == 1)
+    assert np.all(atmos["ocean"][gas] == 0)
+    assert np.all(atmos["comp"][gas, const.atmos_species.index("H2")] >= 0.8)
+    assert np.all((atmos["albedo"][gas] >= 0.4) & (atmos["albedo"][gas] <= 0.6))
+    np.testing.assert_allclose(atmos["comp"].sum(axis=1), 1)
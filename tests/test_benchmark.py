@@ -0,0 +1,18 @@
+import json
+
+import benchmark
+
+
+def test_benchmark_results_and_regressions(tmp_path):
+    out = tmp_path / "bench.json"
+    assert benchmark.main(["--sizes", "200", "--scalar-calls", "20", "--repeat", "1", "--out", str(out)]) == 0
+    results = json.loads(out.read_text())
+    assert {"generate_star", "generate_system[200]", "generate_galaxy[200]"} <= set(results["results"])
+    for r in results["results"].values():
+        assert r["per_sec"] > 0 and r["peak_mb"] >= 0
+
+    assert benchmark.compare(results, results) == []
+    faster = json.loads(out.read_text())
+    faster["results"]["generate_galaxy[200]"]["per_sec"] *= 10
+    regressions = benchmark.compare(results, faster)
+    assert len(regressions) == 1 and regressions[0].startswith("generate_galaxy[200]")
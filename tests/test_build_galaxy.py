@@ -0,0 +1,59 @@
+import os
+
+import numpy as np
+import pytest
+
+import build_galaxy
+import generate_galaxy as gen
+
+
+def test_catalog_and_npz_outputs_match(tmp_path, capsys):
+    args = ["--systems", "1500", "--seed", "8", "--chunk-size", "500", "--quiet"]
+    assert build_galaxy.main(args + ["--out", str(tmp_path / "cat")]) == 0
+    assert build_galaxy.main(args + ["--format", "npz", "--out", str(tmp_path / "g.npz")]) == 0
+    assert capsys.readouterr().out == ""
+    a = gen.open_galaxy(str(tmp_path / "cat"))
+    b = gen.open_galaxy(str(tmp_path / "g.npz"))
+    expected = gen.generate_galaxy(1500, seed=8, chunk_size=500)
+    for galaxy in (a, b):
+        np.testing.assert_array_equal(galaxy.offsets, expected.offsets)
+        np.testing.assert_array_equal(galaxy.stars["mass"], expected.stars["mass"])
+        np.testing.assert_array_equal(galaxy.planets["comp"], expected.planets["comp"])
+    assert repr(b[3]) == repr(expected[3])
+
+
+def test_summary_and_bad_arguments(tmp_path, capsys):
+    build_galaxy.main(["--systems", "100", "--seed", "1", "--out", str(tmp_path / "cat")])
+    assert "100 systems" in capsys.readouterr().out
+    with pytest.raises(SystemExit):
+        build_galaxy.main(["--systems", "100", "--out", str(tmp_path), "--format", "csv"])
+
+
+def test_refuses_a_directory_that_is_not_a_catalog(tmp_path, capsys):
+    (tmp_path / "package.json").write_text("{}")
+    args = ["--systems", "20", "--seed", "1", "--quiet", "--out", str(tmp_path)]
+    assert build_galaxy.main(args) == 1
+    assert "not a catalog" in capsys.readouterr().err
+    assert os.listdir(tmp_path) == ["package.json"]
+    assert build_galaxy.main(args + ["--overwrite"]) == 0
+    assert (tmp_path / "package.json").read_text() == "{}" and len(gen.open_galaxy(str(tmp_path))) == 20
+
+
+def test_refuses_to_resume_with_other_parameters(tmp_path, capsys):
+    out = str(tmp_path / "galaxy")
+    assert build_galaxy.main(["--systems", "100", "--seed", "1", "--quiet", "--out", out]) == 0
+    files = {name: os.path.getsize(os.path.join(out, name)) for name in os.listdir(out)}
+    capsys.readouterr()
+    assert build_galaxy.main(["--systems", "200", "--seed", "1", "--quiet", "--out", out]) == 1
+    err = capsys.readouterr().err
+    assert "n_systems is 100, not 200" in err and "--overwrite" in err
+    assert {name: os.path.getsize(os.path.join(out, name)) for name in os.listdir(out)} == files
+    assert len(gen.open_galaxy(out)) == 100
+
+
+def test_npz_output_gets_its_suffix(tmp_path, capsys):
+    out = str(tmp_path / "galaxy")
+    assert build_galaxy.main(["--systems", "30", "--seed", "2", "--format", "npz", "--out", out]) == 0
+    assert f"written to {out}.npz " in capsys.readouterr().out
+    assert os.listdir(tmp_path) == ["galaxy.npz"]
+    assert len(gen.open_galaxy(out + ".npz")) == 30
@@ -0,0 +1,95 @@
+import os
+
+import numpy as np
+import pytest
+
+import catalog
+import generate_galaxy as gen
+
+
+def read_column(path, table, key, dtype, width=1):
+    return np.fromfile(os.path.join(path, f"{table}.{key}.bin"), dtype=dtype).reshape(-1, width).squeeze(axis=1)
+
+
+def test_stream_matches_in_memory(tmp_path):
+    manifest = gen.stream_galaxy(str(tmp_path), 2500, seed=5, chunk_size=1000, progress=False)
+    ref = gen.generate_galaxy(2500, seed=5, chunk_size=1000)
+    assert manifest["chunks_done"] == 3
+    assert manifest["n_systems"] == 2500 and manifest["n_planets"] == ref.offsets[-1]
+    np.testing.assert_array_equal(np.fromfile(tmp_path / "offsets.bin", dtype="<i8"), ref.offsets)
+    np.testing.assert_array_equal(read_column(tmp_path, "stars", "gal_x", "<f8"), ref.stars["gal_x"])
+    np.testing.assert_array_equal(read_column(tmp_path, "stars", "harv_class", "<U3"), ref.stars["harv_class"])
+    np.testing.assert_array_equal(read_column(tmp_path, "planets", "system", "<i8"), ref.planets["system"])
+    comp = np.fromfile(tmp_path / "planets.comp.bin").reshape(-1, len(ref.planets["comp"][0]))
+    np.testing.assert_array_equal(comp, ref.planets["comp"])
+
+
+def test_resume_after_interruption(tmp_path):
+    full, partial = str(tmp_path / "full"), str(tmp_path / "partial")
+    gen.stream_galaxy(full, 2500, seed=5, chunk_size=1000, progress=False)
+    gen.stream_galaxy(partial, 2500, seed=5, chunk_size=1000, progress=False)
+
+    # roll back to one completed chunk, leaving a torn write behind
+    manifest = catalog.read_manifest(partial)
+    offsets = np.fromfile(os.path.join(partial, "offsets.bin"), dtype="<i8")
+    moon_planet = np.fromfile(os.path.join(partial, "moons.planet.bin"), dtype="<i8")
+    n_moons = int(np.searchsorted(moon_planet, offsets[1000]))
+    manifest.update(chunks_done=1, n_systems=1000, n_planets=int(offsets[1000]), n_moons=n_moons)
+    catalog.write_manifest(partial, manifest)
+    with open(os.path.join(partial, "stars.mass.bin"), "ab") as f:
+        f.write(b"torn")
+
+    manifest = gen.stream_galaxy(partial, 2500, chunk_size=1000, progress=False)
+    assert manifest["chunks_done"] == 3
+    for name in os.listdir(full):
+        if name.endswith(".bin"):
+            with open(os.path.join(full, name), "rb") as a, open(os.path.join(partial, name), "rb") as b:
+                assert a.read() == b.read(), name
+
+
+def test_resume_rejects_other_parameters(tmp_path):
+    gen.stream_galaxy(str(tmp_path), 100, seed=5, chunk_size=50, progress=False)
+    with pytest.raises(ValueError):
+        gen.stream_galaxy(str(tmp_path), 100, seed=6, chunk_size=50, progress=False)
+    manifest = gen.stream_galaxy(str(tmp_path), 100, seed=6, chunk_size=50, progress=False, resume=False)
+    assert manifest["params"]["seed"] == 6
+
+
+def test_open_is_memory_mapped(tmp_path):
+    gen.stream_galaxy(str(tmp_path), 2500, seed=5, chunk_size=1000, progress=False)
+    ref = gen.generate_galaxy(2500, seed=5, chunk_size=1000)
+    galaxy = gen.open_galaxy(str(tmp_path))
+    assert len(galaxy) == 2500
+    assert all(isinstance(col, np.memmap) for col in galaxy.stars.values())
+    assert all(isinstance(col, np.memmap) for col in galaxy.planets.values())
+    assert galaxy.planets["comp"].shape == ref.planets["comp"].shape
+    for index in (0, 999, 1000, 2499):
+        assert repr(galaxy[index]) == repr(ref[index])
+
+
+def test_save_round_trip(tmp_path):
+    ref = gen.generate_galaxy(300, seed=9)
+    manifest = gen.save_galaxy(ref, str(tmp_path))
+    assert manifest["params"]["species"] == gen.const.atmos_species
+    galaxy = gen.open_galaxy(str(tmp_path))
+    for key in ref.planets:
+        np.testing.assert_array_equal(galaxy.planets[key], ref.planets[key])
+    assert repr(galaxy[-1]) == repr(ref[-1])
+
+
+def test_writer_leaves_other_files_alone(tmp_path):
+    with open(tmp_path / "notes.journal", "w") as f:
+        f.write("mine")
+    (tmp_path / "data.bin").write_bytes(b"mine")
+    ref = gen.generate_galaxy(50, seed=2)
+    with pytest.raises(FileExistsError):
+        gen.save_galaxy(ref, str(tmp_path))
+    assert sorted(os.listdir(tmp_path)) == ["data.bin", "notes.journal"]
+
+    gen.save_galaxy(ref, str(tmp_path), overwrite=True)
+    (tmp_path / "spatial.json").write_text("{}")
+    # replacing the catalog drops its columns and derived files, not the neighbours
+    gen.save_galaxy(gen.generate_galaxy(30, seed=3), str(tmp_path))
+    assert (tmp_path / "notes.journal").read_text() == "mine" and (tmp_path / "data.bin").read_bytes() == b"mine"
+    assert not (tmp_path / "spatial.json").exists()
+    assert len(gen.open_galaxy(str(tmp_path))) == 30
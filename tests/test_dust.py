@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+import dust
+import star_utils as sutil
+
+
+@pytest.fixture(scope="module")
+def field():
+    return dust.generate_dust(map_size=60.0, voxel=2.0, seed=4, n_clouds=20)
+
+
+def _marched(field, a, b, steps=4000):
+    t = (np.arange(steps) + 0.5) / steps
+    points = a[:, None, :] + t[None, :, None] * (b - a)[:, None, :]
+    return field.density_at(points).mean(axis=1) * np.linalg.norm(b - a, axis=1)
+
+
+def test_axis_aligned_lines_are_exact():
+    rng = np.random.default_rng(1)
+    density = rng.uniform(0, 0.01, (10, 12, 14)).astype(np.float32)
+    field = dust.DustField(density, origin=[0.0, 0.0, 0.0], voxel=1.0)
+    a = np.array([[0.25, 3.5, 7.5], [2.5, 0.0, 9.5], [4.5, 6.5, 13.9]])
+    b = np.array([[9.75, 3.5, 7.5], [2.5, 11.5, 9.5], [4.5, 6.5, 0.2]])
+    expected = [
+        density[1:9, 3, 7].sum() + 0.75 * density[0, 3, 7] + 0.75 * density[9, 3, 7],
+        density[2, 0:11, 9].sum() + 0.5 * density[2, 11, 9],
+        density[4, 6, 1:13].sum() + 0.8 * density[4, 6, 0] + 0.9 * density[4, 6, 13],
+    ]
+    np.testing.assert_allclose(field.extinction(a, b), expected, rtol=1e-5)
+    np.testing.assert_allclose(field.extinction(b, a), expected, rtol=1e-5)
+
+
+def test_lines_match_a_fine_march(field):
+    rng = np.random.default_rng(2)
+    a = rng.uniform(-70, 70, (500, 3))
+    b = rng.uniform(-70, 70, (500, 3))
+    marched = _marched(field, a, b)
+    err = np.abs(field.extinction(a, b) - marched) / np.maximum(marched, 1e-3)
+    assert np.median(err) < 0.03 and np.percentile(err, 90) < 0.15
+    assert field.extinction(a[0], a[0]) == 0.0
+    assert field.extinction([500.0, 0, 0], [500.0, 10.0, 0]) == 0.0
+
+
+def test_apparent_magnitude_adds_extinction(field):
+    rng = np.random.default_rng(3)
+    stars = rng.uniform(-50, 50, (1000, 3))
+    observer = np.array([1.0, -2.0, 0.5])
+    abs_mag = rng.uniform(-2, 12, 1000)
+    dist = np.linalg.norm(stars - observer, axis=1)
+    extinction = field.extinction(observer, stars)
+    assert extinction.shape == (1000,) and np.all(extinction >= 0) and extinction.max() > 0
+    np.testing.assert_allclose(
+        field.apparent_magnitude(abs_mag, observer, stars), sutil.apparent_magnitude(abs_mag, dist) + extinction
+    )
+
+
+def test_memory_mapped_field(tmp_path):
+    built = dust.generate_dust(str(tmp_path / "dust"), map_size=40.0, voxel=4.0, seed=9)
+    opened = dust.open_dust(str(tmp_path / "dust"))
+    assert isinstance(opened.density, np.memmap)
+    np.testing.assert_array_equal(opened.density, dust.generate_dust(map_size=40.0, voxel=4.0, seed=9).density)
+    for axis in range(3):
+        np.testing.assert_allclose(opened.cumulative[axis], dust.cumulate(built.density, axis, 4.0), rtol=1e-6)
+    a, b = np.zeros(3), np.array([[30.0, -20.0, 5.0]])
+    assert opened.extinction(a, b) == pytest.approx(built.extinction(a, b))
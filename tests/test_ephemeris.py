@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+import constants as const
+import ephemeris
+import generate_galaxy as gen
+import planet_utils as putil
+
+
+@pytest.fixture(scope="module")
+def galaxy():
+    return gen.generate_galaxy(500, seed=5, map_size=50.0)
+
+
+def test_orbits_follow_keplers_law(galaxy):
+    orbits = ephemeris.Ephemeris(galaxy)
+    planets = galaxy.planets
+    assert len(orbits) == len(planets["sma"])
+    host = galaxy.stars["mass"][planets["system"]] * const.sun_mass + planets["mass"] * const.earth_mass
+    period = putil.orbital_period(planets["sma"] * const.au * 1000, host) / 86400
+    np.testing.assert_allclose(orbits.period, period)
+
+    times = np.array([[0.0, 10.0], [100.0, 1000.0]])
+    positions = orbits.positions(times)
+    assert positions.shape == (2, 2, len(orbits), 2)
+    np.testing.assert_allclose(np.linalg.norm(positions, axis=-1), np.broadcast_to(orbits.sma, (2, 2, len(orbits))))
+    start = orbits.sma[:, None] * np.column_stack([np.cos(orbits.phase), np.sin(orbits.phase)])
+    np.testing.assert_allclose(positions[0, 0], start)
+    # every planet is back where it started after one of its periods
+    single = orbits.positions(np.array([123.0]))[0]
+    back = np.array([orbits.positions(123.0 + p)[i] for i, p in enumerate(orbits.period[:50])])
+    np.testing.assert_allclose(back, single[:50], atol=1e-9 * orbits.sma.max())
+
+
+def test_phases_are_seeded_per_planet(galaxy):
+    everything = ephemeris.Ephemeris(galaxy, seed=3)
+    some = ephemeris.Ephemeris(galaxy, systems=[40, 2], seed=3)
+    rows = np.r_[galaxy.offsets[40] : galaxy.offsets[41], galaxy.offsets[2] : galaxy.offsets[3]]
+    np.testing.assert_array_equal(some.rows, rows)
+    np.testing.assert_array_equal(some.phase, everything.phase[rows])
+    assert not np.allclose(ephemeris.Ephemeris(galaxy, seed=4).phase, everything.phase)
+    phases = ephemeris.orbital_phases(np.arange(100_000), seed=1)
+    assert np.all((phases >= 0) & (phases < 2 * np.pi))
+    np.testing.assert_allclose(np.histogram(phases, bins=8)[0] / 100_000, 1 / 8, atol=0.01)
+
+
+def test_frames_stream_the_same_positions(galaxy):
+    orbits = ephemeris.Ephemeris(galaxy, systems=np.arange(20))
+    frames = list(orbits.frames(5.0, 2.5, 23, block=4))
+    times = 5.0 + 2.5 * np.arange(23)
+    assert [time for time, _ in frames] == pytest.approx(times.tolist())
+    np.testing.assert_allclose(np.stack([positions for _, positions in frames]), orbits.positions(times))
+    assert list(orbits.frames(0.0, 1.0, 0)) == []
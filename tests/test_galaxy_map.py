@@ -0,0 +1,45 @@
+import numpy as np
+
+import galaxy_map as gm
+import generate_galaxy as gen
+
+
+def test_density_map_matches_histogram2d():
+    rng = np.random.default_rng(0)
+    x, y, z = rng.uniform(-100, 100, (3, 5000))
+    hist = gm.density_map(x, y, z, "edge", bins=(40, 20), extent=((-100, 100), (-50, 50)))
+    expected, _, _ = np.histogram2d(x, z, bins=(40, 20), range=((-100, 100), (-50, 50)))
+    np.testing.assert_array_equal(hist, expected)
+
+
+def test_angle_views_match_named_views():
+    np.testing.assert_allclose(gm.projection_basis((0, 0)), gm.views["side"], atol=1e-12)
+    np.testing.assert_allclose(gm.projection_basis((-90, 90))[0], gm.views["top"][0], atol=1e-12)
+
+
+def test_catalog_density_blocks(tmp_path):
+    galaxy = gen.generate_galaxy(3000, seed=5)
+    gen.save_galaxy(galaxy, str(tmp_path))
+    s = galaxy.stars
+    expected = gm.density_map(s["gal_x"], s["gal_y"], s["gal_z"], "top", bins=64)
+    np.testing.assert_array_equal(gm.catalog_density_map(str(tmp_path), "top", bins=64, block=700), expected)
+    cube = gm.catalog_density_cube(str(tmp_path), bins=16, block=700)
+    np.testing.assert_array_equal(cube, gm.density_cube(s["gal_x"], s["gal_y"], s["gal_z"], bins=16))
+    assert cube.sum() == len(galaxy)
+
+    gm.render_catalog(str(tmp_path), str(tmp_path / "map.png"), bins=64)
+    assert (tmp_path / "map.png").stat().st_size > 0
+    image = gm.log_scale(expected)
+    assert image.dtype == np.uint8 and image.max() == 255 and np.all(image[expected == 0] == 0)
+
+
+def test_lod_viewer_hover_only_for_shown_points():
+    galaxy = gen.generate_galaxy(5000, seed=2)
+    viewer = gm.LodViewer(galaxy, budget=300)
+    fig = viewer.figure()
+    trace = fig.data[0]
+    assert len(trace.x) <= 300 and len(trace.hovertext) == len(trace.x)
+    index = int(trace.hovertext[0].split("A")[0])
+    assert trace.x[0] == galaxy.stars["gal_x"][index]
+    assert trace.hovertext[0].count("<br>") == 1
+    assert f"{galaxy.offsets[index + 1] - galaxy.offsets[index]} planets" in trace.hovertext[0]
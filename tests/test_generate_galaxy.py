@@ -0,0 +1,85 @@
+import pickle
+
+import numpy as np
+import pytest
+
+import generate_galaxy as gen
+
+
+def assert_catalogs_equal(a: gen.GalaxyCatalog, b: gen.GalaxyCatalog):
+    np.testing.assert_array_equal(a.offsets, b.offsets)
+    for table_a, table_b in ((a.stars, b.stars), (a.planets, b.planets)):
+        assert table_a.keys() == table_b.keys()
+        for key in table_a:
+            np.testing.assert_array_equal(table_a[key], table_b[key])
+
+
+@pytest.fixture(scope="module")
+def catalog():
+    return gen.generate_galaxy(2500, seed=11, chunk_size=1000)
+
+
+def test_tables_are_consistent(catalog):
+    assert len(catalog) == 2500
+    n_planets = np.diff(catalog.offsets)
+    assert np.all((n_planets >= 1) & (n_planets <= 15))
+    np.testing.assert_array_equal(catalog.planets["system"], np.repeat(np.arange(2500), n_planets))
+    for key, column in catalog.planets.items():
+        assert len(column) == catalog.offsets[-1], key
+    np.testing.assert_allclose(catalog.planets["comp"].sum(axis=1), 1.0)
+    # smas are sorted within each system
+    sma = catalog.planets["sma"]
+    same_system = np.diff(catalog.planets["system"]) == 0
+    assert np.all(np.diff(sma)[same_system] >= 0)
+
+
+def test_views(catalog):
+    system = catalog[1234]
+    assert system.star.name == "1234A"
+    assert system.gal_x == catalog.stars["gal_x"][1234]
+    assert [p.name for p in system.planets] == ["1234A" + c for c in "abcdefghijklmno"[: len(system.planets)]]
+    assert catalog[-1].star.name == "2499A"
+    with pytest.raises(IndexError):
+        catalog[2500]
+
+
+def test_seed_repeats(catalog):
+    assert_catalogs_equal(catalog, gen.generate_galaxy(2500, seed=11, chunk_size=1000))
+
+
+def test_worker_count_does_not_change_galaxy(catalog):
+    assert_catalogs_equal(catalog, gen.generate_galaxy(2500, seed=11, chunk_size=1000, workers=2))
+
+
+def test_chunks_are_independent(catalog):
+    last = gen.generate_chunk(gen.chunk_rng(11, 2), 500)
+    np.testing.assert_array_equal(last.stars["mass"], catalog.stars["mass"][2000:])
+
+
+def test_records_are_slotted_and_frozen(catalog):
+    system = catalog[3]
+    planet = system.planets[0]
+    for obj in (system, system.star, planet, planet.atmos):
+        assert not hasattr(obj, "__dict__")
+    with pytest.raises(AttributeError):
+        planet.mass = 1.0
+    with pytest.raises(AttributeError):
+        system.star.hab_zone = (0.0, 1.0)
+
+
+def test_record_fields():
+    atmos = gen.Atmosphere(8.5, 1.0, {"N2": 0.78, "O2": 0.21, "Other": 0.01}, 0.6, 288.0, 0.7, 0.3)
+    assert atmos.comp == {"N2": 0.78, "O2": 0.21, "Other": 0.01}
+    np.testing.assert_array_equal(atmos.fractions, [0.78, 0, 0.21, 0, 0, 0, 0.01])
+    earth = gen.Planet("SolC", "Sol", "T", 1.0, 1.0, 23.4, 1.0, 1.0, 5513.0, atmos, 1, 1.0)
+    assert earth.name == "SolC" and earth.atmos == atmos and earth.moons == 1
+    assert gen.Planet("Earth", "Sol", "T", 1.0, 1.0, 23.4, 1.0, 1.0, 5513.0, atmos, 1, 1.0).name == "Earth"
+    sun = gen.Star("Sol", 5778.0, 1.0, 4.6, 0.0, 4.83, 1.0, 1.0, [0.91, 1.41], 10.0, "G2")
+    assert sun.hab_zone == (0.91, 1.41)
+    assert repr(sun).startswith("Star(name='Sol', temperature=5778.0")
+
+
+def test_records_pickle(catalog):
+    system = catalog[7]
+    # repr, since nan temperatures never compare equal
+    assert repr(pickle.loads(pickle.dumps(system))) == repr(system)
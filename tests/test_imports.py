@@ -0,0 +1,48 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# importing a core module on top of numpy, in a fresh interpreter
+PROBE = """
+import json, sys, time
+import numpy
+before = set(sys.modules)
+start = time.perf_counter()
+import {module}
+print(json.dumps({{"seconds": time.perf_counter() - start, "modules": sorted(set(sys.modules) - before)}}))
+"""
+
+# the module checks catch a heavy import coming back, the time limit is only a backstop
+# loose enough for a loaded CI runner, and GALAXY_IMPORT_SECONDS moves it
+SECONDS = float(os.environ.get("GALAXY_IMPORT_SECONDS", 2.0))
+MODULES = 80
+HEAVY = ("matplotlib", "plotly", "tqdm", "concurrent", "multiprocessing", "pandas", "scipy")
+
+
+def _probe(module: str) -> dict:
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE.format(module=module)], cwd=ROOT, capture_output=True, text=True, check=True
+    )
+    return json.loads(out.stdout)
+
+
+@pytest.mark.parametrize("module", ["generate_galaxy", "atmospheres", "positioner", "catalog", "sectors"])
+def test_core_imports_only_numpy(module):
+    result = _probe(module)
+    roots = {name.split(".")[0] for name in result["modules"]}
+    assert not roots & set(HEAVY)
+    local = {name[:-3] for name in os.listdir(ROOT) if name.endswith(".py")}
+    # numpy's compiled parts register a few underscore and cython modules of their own
+    third_party = roots - local - set(sys.stdlib_module_names) - {"numpy", "cython_runtime"}
+    assert not {name for name in third_party if not name.startswith("_")}
+    assert len(result["modules"]) <= MODULES
+    assert result["seconds"] < SECONDS
+
+
+def test_atmospheres_does_not_import_the_generator():
+    assert "generate_galaxy" not in _probe("atmospheres")["modules"]
@@ -0,0 +1,36 @@
+import io
+
+import numpy as np
+
+import generate_galaxy as gen
+import instrument
+
+
+def test_disabled_records_nothing():
+    instrument.reset()
+    np.random.seed(1)
+    gen.generate_system(500.0, 0)
+    assert instrument.snapshot() == {}
+
+
+def test_scalar_stages_counted():
+    np.random.seed(1)
+    out = io.StringIO()
+    with instrument.profiling(out=out):
+        system = gen.generate_system(500.0, 0)
+    stats = instrument.snapshot()
+    assert not instrument.enabled()
+    assert stats["system"][0] == 1 and stats["star"][0] == 1
+    assert stats["planet"][0] == stats["tilt_spin"][0] == len(system.planets)
+    assert stats["terrestrial_atmos"][0] + stats["gas_atmos"][0] == len(system.planets)
+    lines = out.getvalue().splitlines()
+    assert lines[1].startswith("system")
+
+
+def test_worker_stats_are_merged():
+    with instrument.profiling(out=io.StringIO()):
+        gen.generate_galaxy(3000, seed=2, workers=2, chunk_size=1000)
+    assert instrument.snapshot()["chunk"][0] == 3
+    with instrument.profiling(out=io.StringIO()):
+        gen.generate_galaxy(3000, seed=2, chunk_size=1000)
+    assert instrument.snapshot()["chunk"][0] == 3
@@ -0,0 +1,76 @@
+import numpy as np
+import pytest
+
+import catalog
+import constants as const
+import generate_galaxy as gen
+import moons
+import planet_utils as putil
+
+
+@pytest.fixture(scope="module")
+def galaxy():
+    return gen.generate_galaxy(2000, seed=17, map_size=100.0)
+
+
+def test_moon_table_is_ragged_by_planet(galaxy):
+    table, planets = galaxy.moons, galaxy.planets
+    np.testing.assert_array_equal(np.bincount(table["planet"], minlength=len(planets["sma"])), planets["n_moons"])
+    assert np.all(np.diff(table["planet"]) >= 0)
+    same = table["planet"][1:] == table["planet"][:-1]
+    assert np.all(np.diff(table["sma"])[same] > 0)
+    giants = planets["n_moons"][planets["type"] == "G"]
+    assert giants.mean() > 10 and giants.max() < 120
+
+
+def test_moons_stay_outside_the_roche_limit_and_inside_the_hill_sphere(galaxy):
+    table, planets = galaxy.moons, galaxy.planets
+    host = table["planet"]
+    rigid = putil.roche_rigid(planets["radius"][host], planets["density"][host], table["density"])
+    fluid = putil.roche_liquid(planets["radius"][host], planets["density"][host], table["density"])
+    limit = np.where(table["density"] >= moons.rigid_density, rigid, fluid)
+    distance = table["sma"] * planets["radius"][host] * const.earth_radius
+    assert np.all(distance > limit)
+    hill = moons.hill_radius(planets["sma"], planets["mass"], galaxy.stars["mass"][planets["system"]])
+    assert np.all(distance < moons.hill_fraction * hill[host])
+
+    mass = planets["mass"][host] * (1 + table["mass"]) * const.earth_mass
+    np.testing.assert_allclose(table["period"] * 86400, putil.orbital_period(distance, mass))
+
+
+def test_sorted_uniform():
+    rng = np.random.default_rng(3)
+    values = moons.sorted_uniform(np.full(20000, 3), rng).reshape(-1, 3)
+    assert np.all(np.diff(values, axis=1) > 0) and np.all((values > 0) & (values < 1))
+    np.testing.assert_allclose(values.mean(axis=0), [0.25, 0.5, 0.75], atol=0.01)
+    assert len(moons.sorted_uniform(np.array([0, 2, 0]), rng)) == 2
+
+
+def test_moons_survive_catalog_round_trips(galaxy, tmp_path):
+    system = next(galaxy[i] for i in range(len(galaxy)) if any(p.type == "G" for p in galaxy[i].planets))
+    giant = next(p for p in system.planets if p.type == "G")
+    assert isinstance(giant.moons, dict) and len(giant.moons) > 0
+    assert list(giant.moons) == sorted(giant.moons)
+
+    gen.save_galaxy(galaxy, str(tmp_path / "cat"))
+    opened = gen.open_galaxy(str(tmp_path / "cat"))
+    assert catalog.read_manifest(str(tmp_path / "cat"))["n_moons"] == len(galaxy.moons["planet"])
+    catalog.save_npz(str(tmp_path / "cat.npz"), galaxy.stars, galaxy.planets, galaxy.offsets, galaxy.moons)
+    for copy in (opened, gen.open_galaxy(str(tmp_path / "cat.npz"))):
+        for index in (0, 7, 1999):
+            assert copy.star(index) == galaxy.star(index)
+            assert [p.moons for p in copy[index].planets] == [p.moons for p in galaxy[index].planets]
+
+    picked = galaxy.take([1999, 7])
+    joined = gen.concatenate_catalogs([picked, gen.GalaxyCatalog.from_systems([galaxy[0]])])
+    for index, original in enumerate([1999, 7, 0]):
+        assert [p.moons for p in joined[index].planets] == [p.moons for p in galaxy[original].planets]
+
+
+def test_scalar_planets_get_moon_dicts():
+    np.random.seed(2)
+    system = gen.generate_system(100.0, 0)
+    for planet in system.planets:
+        assert isinstance(planet.moons, dict)
+    table = gen.GalaxyCatalog.from_systems([system])
+    assert [p.moons for p in table[0].planets] == [dict(sorted(p.moons.items())) for p in system.planets]
@@ -0,0 +1,38 @@
+import numpy as np
+
+import octree
+
+
+def _tree(n=20_000, seed=0):
+    points = np.random.default_rng(seed).normal(0, [150, 150, 20], (n, 3))
+    return points, octree.Octree(points, leaf_size=32)
+
+
+def test_nodes_hold_their_points():
+    points, tree = _tree()
+    assert sorted(tree.order.tolist()) == list(range(len(points)))
+    for node in range(tree.n_nodes):
+        pts = tree.points[tree.start[node] : tree.stop[node]]
+        assert np.all(pts >= tree.node_lo[node] - 1e-9)
+        assert np.all(pts <= tree.node_lo[node] + tree.node_size[node] + 1e-9)
+        kids = tree.children(node)
+        if len(kids):
+            assert tree.start[kids[0]] == tree.start[node] and tree.stop[kids[-1]] == tree.stop[node]
+            assert np.array_equal(tree.stop[kids][:-1], tree.start[kids][1:])
+        else:
+            assert tree.count(node) <= 32 or tree.depth[node] == octree.MORTON_BITS
+
+
+def test_select_respects_budget_and_view():
+    points, tree = _tree()
+    idx, weight = tree.select(2000)
+    assert len(idx) <= 2000 and len(np.unique(idx)) == len(idx)
+    assert np.isclose(weight.sum(), len(points))
+
+    lo, hi = np.array([-30, -30, -10]), np.array([30, 30, 10])
+    idx, weight = tree.select(2000, lo, hi)
+    assert np.all((points[idx] >= lo) & (points[idx] <= hi))
+    # a small view within budget shows every system in it
+    inside = np.flatnonzero(np.all((points >= lo) & (points <= hi), axis=1))
+    assert len(inside) < 2000
+    assert np.array_equal(np.sort(idx), inside)
@@ -0,0 +1,100 @@
+import os
+
+import numpy as np
+import pytest
+
+import catalog
+import generate_galaxy as gen
+import overlay
+from solSystem import sol_system
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "galaxy")
+    gen.save_galaxy(gen.generate_galaxy(200, seed=8, map_size=50.0), path)
+    return path
+
+
+def test_edits_merge_into_reads_and_survive_reopening(path):
+    edits = overlay.OverlayCatalog(path)
+    base = gen.open_galaxy(path)
+    sol = edits.add(sol_system)
+    assert sol == 200
+    edits.replace(3, base[10])
+    edits.delete(5)
+
+    for reopened in (edits, overlay.open_overlay(path)):
+        assert len(reopened) == 200
+        assert 5 not in reopened and sol in reopened
+        with pytest.raises(KeyError):
+            reopened[5]
+        earth = reopened[sol].planets[2]
+        assert reopened[sol].star.name == "Sol" and earth.name == "Earth"
+        assert earth.mass == 1.0 and earth.atmos.pressure == 1.0
+        assert reopened[3].star.mass == base[10].star.mass
+        assert reopened[4] == base[4]
+        assert reopened.edited_ids() == [3, sol]
+
+    merged = edits.to_catalog()
+    assert len(merged) == 200
+    expected = [base.stars["mass"][10], base.stars["mass"][4], 1.0]
+    np.testing.assert_array_equal(merged.stars["mass"][[3, 4, 199]], expected)
+
+
+def test_compaction_folds_the_journal_into_the_columns(path):
+    edits = overlay.OverlayCatalog(path)
+    base = gen.open_galaxy(path)
+    expected = [base[i].star.mass for i in range(200) if i != 7] + [1.0]
+    moon_dicts = [[p.moons for p in base[i].planets] for i in (8, 150)]
+    n_moons = len(base.moons["planet"]) - int(base.planets["n_moons"][base.offsets[7] : base.offsets[8]].sum())
+    assert n_moons > 0
+    edits.delete(7)
+    sol = edits.add(sol_system)
+
+    remap = edits.compact(block=64)
+    assert remap[7] == -1 and remap[8] == 7 and remap[sol] == 199
+    assert not os.path.exists(edits.journal_path)
+    assert edits.edited_ids() == []
+
+    compacted = gen.open_galaxy(path)
+    assert len(compacted) == 200
+    np.testing.assert_array_equal(compacted.stars["mass"], expected)
+    # moon rows of the kept systems survive, Sol only carries moon counts
+    assert catalog.read_manifest(path)["n_moons"] == len(compacted.moons["planet"]) == n_moons
+    assert [[p.moons for p in compacted[i].planets] for i in (7, 149)] == moon_dicts
+    assert overlay.open_overlay(path)[199].planets[4].name == "Jupiter"
+
+
+def test_compaction_leaves_other_files_alone(path):
+    with open(os.path.join(path, "notes.txt"), "w") as f:
+        f.write("keep me")
+    edits = overlay.OverlayCatalog(path)
+    edits.delete(3)
+    edits.compact()
+    with open(os.path.join(path, "notes.txt")) as f:
+        assert f.read() == "keep me"
+    assert not os.path.exists(path + ".compacting")
+    assert sorted(os.listdir(path)) == sorted(catalog.catalog_files(path) + ["notes.txt"])
+    assert len(gen.open_galaxy(path)) == 199
+
+
+def test_torn_journal_line_is_dropped(path):
+    edits = overlay.OverlayCatalog(path)
+    edits.delete(1)
+    with open(edits.journal_path, "a") as f:
+        f.write('{"op": "delete", "id"')
+    reopened = overlay.OverlayCatalog(path)
+    assert 1 not in reopened and len(reopened) == 199
+    reopened.delete(2)
+    assert len(overlay.OverlayCatalog(path)) == 198
+
+
+def test_journal_must_match_the_base(path):
+    overlay.OverlayCatalog(path).delete(0)
+    journal = open(os.path.join(path, overlay.JOURNAL)).read()
+    gen.save_galaxy(gen.generate_galaxy(50, seed=8, map_size=50.0), path)
+    with open(os.path.join(path, overlay.JOURNAL), "w") as f:
+        f.write(journal)
+    with pytest.raises(ValueError):
+        overlay.OverlayCatalog(path)
@@ -0,0 +1,50 @@
+import numpy as np
+import pytest
+
+import generate_galaxy as gen
+import pairwise
+
+
+@pytest.fixture(scope="module")
+def galaxy():
+    return gen.generate_galaxy(800, seed=6, map_size=80.0)
+
+
+def _points(galaxy, systems):
+    stars = galaxy.stars
+    return np.column_stack([stars["gal_x"], stars["gal_y"], stars["gal_z"]])[systems]
+
+
+def test_tiled_distances_match_brute_force(galaxy):
+    rows = np.arange(0, 800, 3)
+    cols = np.array([5, 799, 5, 12, 400])
+    found = pairwise.distance_matrix(galaxy, rows, cols, tile=7, dtype="<f8")
+    expected = np.linalg.norm(_points(galaxy, rows)[:, None] - _points(galaxy, cols)[None], axis=-1)
+    np.testing.assert_allclose(found, expected, atol=1e-8)
+
+    square = pairwise.distance_matrix(galaxy, tile=100)
+    assert square.shape == (800, 800) and square.dtype == np.float32
+    assert np.all(np.diag(square) == 0.0)
+    np.testing.assert_allclose(square, square.T, atol=1e-4)
+
+
+def test_travel_times_count_the_jumps(galaxy):
+    rows = np.arange(50)
+    dist = pairwise.distance_matrix(galaxy, rows, dtype="<f8")
+    times = pairwise.travel_time_matrix(galaxy, 2.0, rows, jump_time=0.5, jump_range=3.0, dtype="<f8")
+    np.testing.assert_allclose(times, dist / 2.0 + 0.5 * np.ceil(dist / 3.0))
+    np.testing.assert_allclose(pairwise.travel_time_matrix(galaxy, 4.0, rows, dtype="<f8"), dist / 4.0)
+    with pytest.raises(ValueError):
+        pairwise.travel_time_matrix(galaxy, 1.0, rows, jump_time=1.0)
+
+
+def test_memory_mapped_output_with_workers(galaxy, tmp_path):
+    rows = np.arange(300)
+    path = str(tmp_path / "times.npy")
+    written = pairwise.travel_time_matrix(galaxy, 1.5, rows, path=path, tile=64, workers=2)
+    assert isinstance(written, np.memmap)
+    opened = np.load(path, mmap_mode="r")
+    np.testing.assert_array_equal(opened, pairwise.travel_time_matrix(galaxy, 1.5, rows, tile=64))
+    assert np.all(np.diag(opened) == 0.0)
+    with pytest.raises(ValueError):
+        pairwise.distance_matrix(galaxy, rows, workers=2)
@@ -0,0 +1,62 @@
+import numpy as np
+import pytest
+
+import constants as const
+import planet_utils as putil
+
+
+def test_molecular_mass_dict_matches_array():
+    comp = {"N2": 0.78, "O2": 0.21, "Other": 0.01}
+    fracs = np.zeros(len(const.atmos_species))
+    for species, frac in comp.items():
+        fracs[const.atmos_species.index(species)] = frac
+    expected = 0.78 * 4.6518e-26 + 0.21 * 5.3134e-26 + 0.01 * 3e-26
+    assert putil.find_molecular_mass(comp) == pytest.approx(expected)
+    assert putil.find_molecular_mass(fracs) == pytest.approx(expected)
+    with pytest.raises(ValueError):
+        putil.find_molecular_mass({"N2": 0.9, "Xe": 0.1})
+
+
+def test_molecular_mass_rows():
+    fracs = np.random.default_rng(1).dirichlet(np.ones(len(const.atmos_species)), size=50)
+    expected = [putil.find_molecular_mass(dict(zip(const.atmos_species, row))) for row in fracs]
+    np.testing.assert_allclose(putil.find_molecular_mass(fracs), expected, rtol=1e-12)
+
+
+def test_tilt_spin_branches():
+    rng = np.random.default_rng(3)
+    sma = rng.uniform(0.01, 30, 200) * const.au * 1000
+    radius = rng.uniform(0.3, 11, 200) * const.earth_radius
+    smass = rng.uniform(0.1, 3, 200) * const.sun_mass
+    pmass = rng.uniform(0.01, 300, 200) * const.earth_mass
+    # every other planet old enough to be tidally locked, the rest brand new
+    locked = np.arange(200) % 2 == 0
+    age = np.where(locked, np.inf, 0.0)
+
+    tilt, spin = putil.gen_tilt_spin(sma, radius, smass, pmass, age, rng=np.random.default_rng(7))
+    assert tilt.shape == spin.shape == (200,)
+    # locked planets take the first uniform(0, 5) draw as tilt and spin once per orbit
+    np.testing.assert_array_equal(tilt[locked], np.random.default_rng(7).uniform(0, 5, 200)[locked])
+    np.testing.assert_array_equal(spin[locked], putil.orbital_period(sma, smass)[locked])
+    free = ~locked
+    assert np.all((tilt[free] <= 40) | ((tilt[free] >= 65) & (tilt[free] <= 180)))
+    small = free & (pmass < 8.0 * const.earth_mass)
+    assert np.all((spin[small] >= 0.08) & (spin[small] <= 3.0))
+    assert np.all((spin[free & ~small] >= 0.08) & (spin[free & ~small] <= 1.0))
+
+    t, s = putil.gen_tilt_spin(sma[0], radius[0], smass[0], pmass[0], np.inf, rng=np.random.default_rng(7))
+    assert np.ndim(t) == np.ndim(s) == 0
+    assert (t, s) == (tilt[0], spin[0])
+
+
+def test_tilt_spin_distribution():
+    n = 20000
+    sma = np.full(n, const.au * 1000)
+    tilt, spin = putil.gen_tilt_spin(
+        sma, const.earth_radius, const.sun_mass, const.earth_mass, 4.6, rng=np.random.default_rng(0)
+    )
+    # triangular(0, 15, 55) with the tail above 40 pushed out by 25-125 degrees
+    assert np.mean(tilt > 40) == pytest.approx(15**2 / (55 * 40), abs=0.01)
+    assert np.all((tilt <= 40) | (tilt >= 65))
+    assert np.all((spin >= 0.08) & (spin <= 3.0))
+    assert np.mean(spin) == pytest.approx((0.08 + 0.7 + 3.0) / 3, rel=0.02)
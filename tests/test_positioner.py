@@ -0,0 +1,29 @@
+import numpy as np
+
+import positioner as posi
+
+
+def test_sampler_is_cached_per_shape():
+    assert posi.get_disc_sampler(100.0, 20.0, 5.0) is posi.get_disc_sampler(100.0, 20.0, 5.0)
+    assert posi.get_disc_sampler(100.0, 20.0, 5.0) is not posi.get_disc_sampler(100.0, 20.0, 6.0)
+
+
+def test_sample_returns_arrays_in_bounds():
+    x, y, z = posi.local_kpc(xymax=200.0, nstars=10000, rng=np.random.default_rng(0))
+    for pos in (x, y, z):
+        assert isinstance(pos, np.ndarray) and pos.shape == (10000,)
+        assert np.all((pos >= -200.0) & (pos < 200.0))
+
+
+def test_sample_matches_bin_probabilities():
+    sampler = posi.DiscSampler(xymax=50.0, xysig=2.5, zsig=0.5)
+    x, _, z = sampler.sample(200000, rng=np.random.default_rng(1))
+    for pos, sig in ((x, 2.5), (z, 0.5)):
+        counts = np.bincount(np.floor(pos).astype(int) + 50, minlength=100) / len(pos)
+        np.testing.assert_allclose(counts, posi.find_prob_array(sig, sampler.bins), atol=5e-3)
+
+
+def test_seeded_samples_repeat():
+    a = posi.local_kpc(xymax=500.0, nstars=100, rng=np.random.default_rng(5))
+    b = posi.local_kpc(xymax=500.0, nstars=100, rng=np.random.default_rng(5))
+    np.testing.assert_array_equal(np.array(a), np.array(b))
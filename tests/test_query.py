@@ -0,0 +1,81 @@
+import numpy as np
+import pytest
+
+import generate_galaxy as gen
+import query
+from query import planet, star
+
+
+@pytest.fixture(scope="module")
+def galaxy():
+    return gen.generate_galaxy(5000, seed=21, map_size=100.0)
+
+
+def _hz_terrestrials(g):
+    p, s = g.planets, g.stars
+    sy = p["system"]
+    return (
+        (p["type"] == "T")
+        & (s["hab_in"][sy] < p["sma"])
+        & (p["sma"] < s["hab_out"][sy])
+        & (p["pressure"] >= 0.5)
+        & (p["pressure"] <= 2)
+        & (p["comp"][:, 0] > 0)
+        & (p["comp"][:, 2] > 0)
+    )
+
+
+def test_planet_query_matches_brute_force(galaxy):
+    engine = query.QueryEngine(galaxy)
+    terms = [planet.type == "T", query.in_hab_zone(), planet.pressure.between(0.5, 2), query.has_species("N2", "O2")]
+    expected = _hz_terrestrials(galaxy)
+    np.testing.assert_array_equal(engine.find_planets(*terms), np.flatnonzero(expected))
+
+    s = galaxy.stars
+    near = np.sqrt(s["gal_x"] ** 2 + s["gal_y"] ** 2 + s["gal_z"] ** 2)[galaxy.planets["system"]] <= 30
+    found = engine.find_planets(*terms, query.within(30))
+    np.testing.assert_array_equal(found, np.flatnonzero(expected & near))
+    np.testing.assert_array_equal(
+        engine.systems_with_planets(*terms, query.within(30)), np.unique(galaxy.planets["system"][found])
+    )
+
+
+def test_operators_and_star_fields(galaxy):
+    engine = query.QueryEngine(galaxy)
+    s, p = galaxy.stars, galaxy.planets
+    found = engine.find_systems((star.mass > 2) | (star.temperature < 2500), star.harv_class != "A5")
+    expected = ((s["mass"] > 2) | (s["temperature"] < 2500)) & (s["harv_class"] != "A5")
+    np.testing.assert_array_equal(found, np.flatnonzero(expected))
+
+    found = engine.find_planets(planet.n_moons == 0, star.mass >= 1.5)
+    np.testing.assert_array_equal(found, np.flatnonzero((p["n_moons"] == 0) & (s["mass"][p["system"]] >= 1.5)))
+    with pytest.raises(ValueError):
+        engine.find_systems(query.in_hab_zone())
+
+
+def test_indexes_saved_with_catalog(galaxy, tmp_path):
+    gen.save_galaxy(galaxy, str(tmp_path))
+    terms = [planet.pressure.between(0.5, 2), planet.mass < 1, query.within(40, (10, 0, 0))]
+    first = query.open_query_engine(str(tmp_path)).find_planets(*terms)
+    assert (tmp_path / "sorted.planets.pressure.json").exists()
+    assert (tmp_path / "spatial.json").exists()
+    again = query.open_query_engine(str(tmp_path))
+    np.testing.assert_array_equal(again.find_planets(*terms), first)
+    assert isinstance(again.sorted_index("planets", "pressure").order, np.memmap)
+    np.testing.assert_array_equal(first, query.QueryEngine(galaxy).find_planets(*terms))
+
+
+def test_incomplete_terms_fail_when_created():
+    class NoMask(query.Term):
+        pass
+
+    class NoCandidates(query.IndexedTerm):
+        def estimate(self, engine, table):
+            return 0
+
+        def mask(self, engine, table, rows):
+            return np.ones(len(rows), dtype=bool)
+
+    for cls in (NoMask, NoCandidates):
+        with pytest.raises(TypeError):
+            cls()
@@ -0,0 +1,59 @@
+import heapq
+
+import numpy as np
+import pytest
+
+import generate_galaxy as gen
+import routing
+
+
+@pytest.fixture(scope="module")
+def router():
+    return routing.Router(gen.generate_galaxy(1500, seed=2, map_size=80.0), max_cached_nodes=500)
+
+
+def dijkstra(positions, source, target, jump_range):
+    dist = {source: 0.0}
+    heap = [(0.0, source)]
+    while heap:
+        d, node = heapq.heappop(heap)
+        if node == target:
+            return d
+        if d > dist[node]:
+            continue
+        step = np.linalg.norm(positions - positions[node], axis=1)
+        for nbr in np.nonzero(step <= jump_range)[0]:
+            if d + step[nbr] < dist.get(nbr, np.inf):
+                dist[nbr] = d + step[nbr]
+                heapq.heappush(heap, (dist[nbr], nbr))
+    return np.inf
+
+
+@pytest.mark.parametrize("pair", [(0, 5), (10, 1499), (7, 700), (300, 1200)])
+def test_route_is_shortest(router, pair):
+    route = router.route(*pair, jump_range=25.0)
+    assert route.distance == pytest.approx(dijkstra(router.positions, *pair, 25.0))
+    assert route.path[0] == pair[0] and route.path[-1] == pair[1]
+    hops = np.linalg.norm(np.diff(router.positions[route.path], axis=0), axis=1)
+    assert np.all(hops <= 25.0)
+    assert np.sum(hops) == pytest.approx(route.distance)
+
+
+def test_unreachable(router):
+    route = router.route(0, 1, jump_range=0.01)
+    assert route.distance == np.inf and route.jumps == 0
+    assert route.travel_time(1.0) == np.inf
+
+
+def test_batch_and_travel_time(router):
+    pairs = [(0, 5), (5, 0), (3, 3)]
+    routes = router.routes(pairs, 25.0)
+    assert routes[0].distance == pytest.approx(routes[1].distance)
+    assert routes[2].distance == 0.0 and routes[2].jumps == 0
+    times = router.travel_times(pairs, 25.0, speed=2.0, jump_time=1.5)
+    assert times[0] == pytest.approx(routes[0].distance / 2.0 + 1.5 * routes[0].jumps)
+
+
+def test_neighbour_cache_is_bounded(router):
+    router.routes([(0, 1499), (10, 700)], 30.0)
+    assert len(router._adjacency[30.0]) <= 500
@@ -0,0 +1,51 @@
+import numpy as np
+
+import sectors
+
+
+def _same(a, b):
+    assert len(a) == len(b)
+    for key in a.stars:
+        np.testing.assert_array_equal(a.stars[key], b.stars[key])
+    for key in a.planets:
+        np.testing.assert_array_equal(a.planets[key], b.planets[key])
+
+
+def test_sector_is_pure_function_of_seed_and_coords():
+    a = sectors.SectorGalaxy(1e6, seed=3, sector_size=25.0)
+    b = sectors.SectorGalaxy(1e6, seed=3, sector_size=25.0)
+    center = a.sector_of((0, 0, 0))
+    b.sector((0, 0, 1))
+    _same(a.sector(center), b.sector(center))
+    c = sectors.SectorGalaxy(1e6, seed=4, sector_size=25.0)
+    assert len(c.sector(center)) != len(a.sector(center)) or not np.array_equal(
+        c.sector(center).stars["gal_x"], a.sector(center).stars["gal_x"]
+    )
+
+
+def test_sector_positions_and_counts():
+    galaxy = sectors.SectorGalaxy(1e6, seed=1, sector_size=25.0)
+    coords = galaxy.sector_of((10.0, -5.0, 1.0))
+    part = galaxy.sector(coords)
+    lo, hi = galaxy.bounds(coords)
+    pos = np.column_stack([part.stars["gal_x"], part.stars["gal_y"], part.stars["gal_z"]])
+    assert np.all((pos >= lo) & (pos <= hi))
+    expected = galaxy.expected_count(coords)
+    assert abs(len(part) - expected) < 5 * np.sqrt(expected)
+    total = sum(galaxy.expected_count(c) for c in galaxy.sectors_in_box((-500,) * 3, (499.9,) * 3))
+    assert np.isclose(total, 1e6)
+
+
+def test_lru_cache_hits_and_eviction():
+    galaxy = sectors.SectorGalaxy(1e6, seed=2, sector_size=25.0, max_cached_systems=500)
+    first = galaxy.sector_of((0, 0, 0))
+    kept = galaxy.sector(first)
+    assert galaxy.sector(first) is kept
+    assert (galaxy.hits, galaxy.misses) == (1, 1)
+    for coords in galaxy.sectors_in_box((-60, -60, 0), (60, 60, 0)):
+        galaxy.sector(coords)
+    assert galaxy.cached_systems() <= 500
+    assert galaxy.misses == 37
+    # evicted, then regenerated identically
+    assert galaxy.sector(first) is not kept
+    _same(galaxy.sector(first), kept)
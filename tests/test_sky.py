@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import dust
+import generate_galaxy as gen
+import sky
+import star_utils as sutil
+
+
+@pytest.fixture(scope="module")
+def galaxy():
+    return gen.generate_galaxy(5000, seed=8, map_size=60.0)
+
+
+def _brute(galaxy, observer, limit):
+    stars = galaxy.stars
+    points = np.column_stack([stars["gal_x"], stars["gal_y"], stars["gal_z"]])
+    dist = np.linalg.norm(points - observer, axis=1)
+    mag = sutil.apparent_magnitude(stars["magnitude"], np.where(dist > 0, dist, 1.0))
+    return np.flatnonzero((mag <= limit) & (dist > 0)), mag
+
+
+@pytest.mark.parametrize("limit", [6.5, 10.0, 14.0])
+def test_culled_view_matches_brute_force(galaxy, limit):
+    view, index = sky.sky_view(galaxy, 12, limit)
+    observer = view.observer
+    np.testing.assert_array_equal(observer, [galaxy.stars[c][12] for c in ("gal_x", "gal_y", "gal_z")])
+    expected, mag = _brute(galaxy, observer, limit)
+    assert sorted(view.index.tolist()) == expected.tolist()
+    assert 12 not in view.index
+    assert np.all(np.diff(view.magnitude) >= 0)
+    np.testing.assert_allclose(view.magnitude, mag[view.index])
+    np.testing.assert_allclose(np.linalg.norm(view.direction, axis=1), 1.0)
+    if limit < 7.0:
+        # faint stars are culled without being looked at
+        assert len(index._candidate_slots(observer, limit)) < len(index)
+
+
+def test_star_system_observer_and_dust(galaxy):
+    index = sky.SkyIndex.from_galaxy(galaxy)
+    system = galaxy[40]
+    clear = index.view(system, 12.0)
+    field = dust.generate_dust(map_size=60.0, voxel=2.0, seed=1, n_clouds=50)
+    dusty = index.view(system, 12.0, dust=field)
+    assert set(dusty.index.tolist()) <= set(clear.index.tolist()) and len(dusty) < len(clear)
+    seen = dict(zip(clear.index.tolist(), clear.magnitude))
+    points = index.tree.points[np.argsort(index.tree.order)][dusty.index]
+    extinction = field.extinction(dusty.observer, points)
+    np.testing.assert_allclose(dusty.magnitude, [seen[i] for i in dusty.index.tolist()] + extinction)
+
+
+def test_sky_image_holds_the_flux():
+    direction = np.array([[1.0, 0, 0], [0, 1.0, 0], [0, 0, 1.0], [-1.0, 0, 0]])
+    view = sky.SkyView(np.zeros(3), np.arange(4), direction, np.array([0.0, 1.0, 2.5, 5.0]))
+    np.testing.assert_allclose(view.lon[:2], [0.0, 90.0])
+    np.testing.assert_allclose(view.lat[2], 90.0)
+    image = view.image(36, 18)
+    assert image.shape == (18, 36)
+    assert image[9, 18] == pytest.approx(1.0) and image[9, 27] == pytest.approx(10**-0.4)
+    assert image[0].sum() == pytest.approx(0.1) and image.sum() == pytest.approx(1 + 10**-0.4 + 0.1 + 0.01)
+    assert len(view.brightest(2)) == 2 and view.brightest(2).magnitude[-1] == 1.0
@@ -0,0 +1,60 @@
+import numpy as np
+import pytest
+
+import generate_galaxy as gen
+import spatial
+
+
+@pytest.fixture(scope="module")
+def points():
+    rng = np.random.default_rng(4)
+    return rng.normal(0, [80.0, 80.0, 20.0], (5000, 3))
+
+
+@pytest.fixture(scope="module")
+def queries(points):
+    rng = np.random.default_rng(5)
+    return np.vstack([points[:20] + rng.normal(0, 3, (20, 3)), [[1000.0, 0.0, 0.0], [0.0, 0.0, 0.0]]])
+
+
+@pytest.mark.parametrize("cell_size", [None, 3.0, 500.0])
+def test_radius_matches_brute_force(points, queries, cell_size):
+    index = spatial.GridIndex(points, cell_size)
+    for center, found in zip(queries, index.query_radius(queries, 15.0)):
+        d = np.linalg.norm(points - center, axis=1)
+        np.testing.assert_array_equal(found, np.nonzero(d <= 15.0)[0])
+
+
+def test_box_matches_brute_force(points, queries):
+    index = spatial.GridIndex(points)
+    for center, found in zip(queries, index.query_box(queries - [10, 10, 4], queries + [10, 10, 4])):
+        inside = np.all((points >= center - [10, 10, 4]) & (points <= center + [10, 10, 4]), axis=1)
+        np.testing.assert_array_equal(found, np.nonzero(inside)[0])
+
+
+@pytest.mark.parametrize("cell_size", [None, 3.0])
+def test_knn_matches_brute_force(points, queries, cell_size):
+    index = spatial.GridIndex(points, cell_size)
+    dist, idx = index.query_knn(queries, 7)
+    for center, row_d, row_i in zip(queries, dist, idx):
+        d = np.linalg.norm(points - center, axis=1)
+        np.testing.assert_allclose(row_d, np.sort(d)[:7])
+        np.testing.assert_allclose(np.linalg.norm(points[row_i] - center, axis=1), row_d)
+
+
+def test_knn_pads_small_sets():
+    dist, idx = spatial.GridIndex(np.zeros((2, 3))).query_knn([1.0, 0.0, 0.0], 4)
+    np.testing.assert_array_equal(idx[0, 2:], [-1, -1])
+    assert np.all(np.isinf(dist[0, 2:]))
+
+
+def test_catalog_index_is_saved(tmp_path):
+    gen.stream_galaxy(str(tmp_path), 3000, seed=2, chunk_size=1000, progress=False)
+    built = spatial.open_spatial_index(str(tmp_path))
+    loaded = spatial.open_spatial_index(str(tmp_path))
+    assert isinstance(loaded.order, np.memmap)
+    center = [0.0, 0.0, 0.0]
+    np.testing.assert_array_equal(built.query_radius(center, 60.0)[0], loaded.query_radius(center, 60.0)[0])
+    # regenerating the catalog drops the stale index
+    gen.stream_galaxy(str(tmp_path), 1000, seed=3, chunk_size=1000, progress=False, resume=False)
+    assert len(spatial.open_spatial_index(str(tmp_path))) == 1000
@@ -0,0 +1,74 @@
+import numpy as np
+import pytest
+
+import star_utils as sutil
+
+
+masses = np.array([0.08, 0.1, 0.3, 0.42999, 0.43, 0.8, 1.0, 1.00001, 2.0, 2.00001, 2.7, 3.0])
+temps = np.array([650.0, 1300.0, 2499.0, 2500.0, 3000.0, 3800.0, 5300.0, 5778.0, 6000.0, 7300.0, 9999.0, 10001.0, 4e4])
+
+
+# the original scalar formulas evaluated at masses (two rows of six), and their classes at temps
+baseline = {
+    sutil.calculate_luminosity: [
+        [0.000689977305173, 0.00115273063734, 0.0144246977501, 0.0330127766667, 0.03418801, 0.4096],
+        [1.0, 1.0000400006, 16.0, 15.8394690862, 45.2794570174, 65.4715205261],
+    ],
+    sutil.star_radius: [
+        [0.132578160694, 0.158489319246, 0.381677890962, 0.509057317303, 0.509066788335, 0.836511642073],
+        [1.0, 1.00000569999, 1.48452357063, 1.48452780152, 1.76147849542, 1.87050604123],
+    ],
+    sutil.stellar_temp: [
+        [1477.22323672, 1666.39340251, 3015.94220664, 3663.06857934, 3663.11458149, 5122.07732515],
+        [5778.0, 5778.03120113, 8401.05320508, 8401.07588789, 9879.02239974, 10457.3830188],
+    ],
+    sutil.stellar_lifespan: [
+        [5524271728020.0, 3162277660170.0, 202860206483.0, 82481036716.8, 82476241391.3, 17469281074.2],
+        [10000000000.0, 9999750004.37, 1767766952.97, 1767744856.07, 834815664.541, 641500299.1],
+    ],
+}
+baseline_classes = ["T8", "L9", "L0", "M9", "M5", "K9", "G9", "G2", "F9", "A9", "A0", "B8", "O4"]
+
+
+@pytest.mark.parametrize("func", list(baseline), ids=lambda func: func.__name__)
+def test_mass_kernels_match_baseline(func):
+    expected = np.ravel(baseline[func])
+    np.testing.assert_allclose(func(masses), expected, rtol=1e-10)
+    np.testing.assert_allclose([func(float(m)) for m in masses], expected, rtol=1e-10)
+
+
+def test_luminosity_pieces():
+    assert sutil.calculate_luminosity(0.2) == pytest.approx(0.23 * 0.2**2.3)
+    assert sutil.calculate_luminosity(0.43) == pytest.approx(0.43**4.0)
+    assert sutil.calculate_luminosity(2.0) == pytest.approx(16.0)
+    assert sutil.calculate_luminosity(2.5) == pytest.approx(1.4 * 2.5**3.5)
+
+
+def test_radius_pieces():
+    assert sutil.star_radius(0.5) == pytest.approx(0.5**0.8)
+    assert sutil.star_radius(1.0) == pytest.approx(1.0)
+    assert sutil.star_radius(2.0) == pytest.approx(2.0**0.57)
+
+
+def test_scalar_in_scalar_out():
+    assert np.ndim(sutil.calculate_luminosity(1.0)) == 0
+    assert np.ndim(sutil.star_radius(1.0)) == 0
+    assert isinstance(sutil.stellar_class(5778.0), str)
+
+
+def test_stellar_class_known_values():
+    assert sutil.stellar_class(5778.0) == "G2"
+    assert sutil.stellar_class(3800.0) == "K9"
+    assert sutil.stellar_class(9999.0) == "A0"
+    assert sutil.stellar_class(10001.0) == "B8"
+    assert sutil.stellar_class(40000.0) == "O4"
+
+
+def test_stellar_class_matches_baseline():
+    assert list(sutil.stellar_class(temps)) == baseline_classes
+    assert [sutil.stellar_class(float(t)) for t in temps] == baseline_classes
+
+
+def test_stellar_class_out_of_bounds_warns():
+    with pytest.warns(UserWarning):
+        assert list(sutil.stellar_class([300.0, 5778.0])) == ["", "G2"]
@@ -0,0 +1,36 @@
+import numpy as np
+
+import generate_galaxy as gen
+import stats
+
+
+def test_histogram_quantiles_and_overflow():
+    values = np.random.default_rng(0).lognormal(1, 1, 100_000)
+    hist = stats.Histogram(1e-2, 1e2, bins=2000, log=True)
+    for part in np.array_split(values, 7):
+        hist.add(part)
+    assert hist.total == len(values)
+    assert hist.over == np.count_nonzero(values >= 1e2)
+    np.testing.assert_allclose(hist.quantile([0.1, 0.5, 0.9]), np.quantile(values, [0.1, 0.5, 0.9]), rtol=5e-3)
+    assert np.isclose(hist.mean, values.mean())
+
+
+def test_streaming_matches_whole_catalog(tmp_path):
+    galaxy = gen.generate_galaxy(4000, seed=12, chunk_size=1500)
+    gen.save_galaxy(galaxy, str(tmp_path))
+    result = stats.catalog_stats(str(tmp_path), block=3000)
+    whole = stats.galaxy_stats(galaxy, block=10**9)
+
+    s, p = galaxy.stars, galaxy.planets
+    assert (result.n_systems, result.n_planets) == (len(galaxy), len(p["sma"]))
+    cls = s["harv_class"][p["system"]]
+    assert result.type_by_class == whole.type_by_class
+    assert result.type_by_class["G2"].get("T", 0) == np.count_nonzero((cls == "G2") & (p["type"] == "T"))
+
+    hz = (s["hab_in"][p["system"]] < p["sma"]) & (p["sma"] < s["hab_out"][p["system"]])
+    assert sum(result.in_hz.values()) == np.count_nonzero(hz)
+    assert result.systems_with_hz_planet == len(np.unique(p["system"][hz]))
+    assert result.hz_with_atmosphere == np.count_nonzero(hz & (p["pressure"] > 0))
+    assert result.airless["T"] == np.count_nonzero((p["type"] == "T") & (p["pressure"] == 0))
+    np.testing.assert_array_equal(result.sma.counts, whole.sma.counts)
+    assert "planet types per stellar class" in result.report()